@@ -49,8 +49,8 @@ export default function CollectionSettings() {
   });
 
   const {
-    parseStatus, parseError, parseWarnings, parseStats, fileEntries,
-    parseDbFile, isImporting, progress, logs, summary, startImport, stopImport, reset,
+    parseStatus, parseError, parseStats, selectedFile,
+    selectDbFile, isImporting, progress, logs, summary, startImport, stopImport, reset,
   } = useNexusImport();
 
   const dbInputRef = useRef<HTMLInputElement>(null);
@@ -124,7 +124,7 @@ export default function CollectionSettings() {
 
   const handleDbChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
-    if (file) parseDbFile(file);
+    if (file) selectDbFile(file);
     e.target.value = '';
   };
 
@@ -547,10 +547,6 @@ export default function CollectionSettings() {
             </div>
           )}
 
-          {parseStatus === 'parsing' && (
-            <div className="collection-import-parsing"><span className="collection-import-parsing-icon">⏳</span><span>Analyse du fichier en cours…</span></div>
-          )}
-
           {parseStatus === 'error' && (
             <div className="collection-import-parse-error">
               <p>❌ {parseError}</p>
@@ -558,19 +554,18 @@ export default function CollectionSettings() {
             </div>
           )}
 
-          {parseStatus === 'ready' && parseStats && fileEntries && (
+          {parseStatus === 'ready' && selectedFile && (
             <>
-              <div className="collection-import-preview">
-                <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.total}</span><span className="collection-import-stat-label">jeux détectés</span></div>
-                <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_f95}</span><span className="collection-import-stat-label">avec ID F95</span></div>
-                <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_lc}</span><span className="collection-import-stat-label">Lewdcorner seul</span></div>
-                <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_paths}</span><span className="collection-import-stat-label">avec chemins exe</span></div>
-                <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_labels}</span><span className="collection-import-stat-label">avec labels</span></div>
-              </div>
-
-              {parseWarnings.length > 0 && (
-                <div className="collection-import-warnings">
-                  {parseWarnings.map((w, i) => <p key={i} className="collection-import-warning-line">⚠️ {w}</p>)}
+              {!parseStats && (
+                <div className="collection-import-parsing"><span className="collection-import-parsing-icon">🗄️</span><span>{selectedFile.name} ({(selectedFile.size / (1024 * 1024)).toFixed(1)} Mo) — analysé au lancement de l&apos;import</span></div>
+              )}
+              {parseStats && (
+                <div className="collection-import-preview">
+                  <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.total}</span><span className="collection-import-stat-label">jeux détectés</span></div>
+                  <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_f95}</span><span className="collection-import-stat-label">avec ID F95</span></div>
+                  <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_lc}</span><span className="collection-import-stat-label">Lewdcorner seul</span></div>
+                  <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_paths}</span><span className="collection-import-stat-label">avec chemins exe</span></div>
+                  <div className="collection-import-preview-stat"><span className="collection-import-stat-value">{parseStats.with_labels}</span><span className="collection-import-stat-label">avec labels</span></div>
                 </div>
               )}
 
@@ -585,7 +580,7 @@ export default function CollectionSettings() {
                   </div>
                   <div className="collection-import-actions">
                     {!isImporting ? (
-                      <button type="button" className="form-btn form-btn--primary" onClick={() => startImport(importOptions)}>▶️ Lancer l&apos;import ({fileEntries.length} jeux)</button>
+                      <button type="button" className="form-btn form-btn--primary" onClick={() => startImport(importOptions)}>▶️ Lancer l&apos;import ({selectedFile.name})</button>
                     ) : (
                       <button type="button" className="form-btn form-btn--danger" onClick={stopImport}>⏹️ Arrêter</button>
                     )}
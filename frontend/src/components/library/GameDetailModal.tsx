@@ -95,8 +95,23 @@ export default function GameDetailModal({
   const canEditSynopsis = typeof f95JeuId === 'number' && f95JeuId > 0;
   const canSyncFromApi  = typeof game.site_id === 'number' && game.site_id > 0;
 
-  // ── Chargement synopsis Supabase ──────────────────────────────────────────
+  // ── Chargement synopsis (détail à la demande, la liste /api/jeux est légère) ──
   const loadSynopsisData = useCallback(async () => {
+    const base = (localStorage.getItem('apiBase') || localStorage.getItem('apiUrl') || '').replace(/\/+$/, '');
+    const key = localStorage.getItem('apiKey') || '';
+    if (base && key && canEditSynopsis) {
+      try {
+        const res = await fetch(`${base}/api/jeux/${f95JeuId}`, { headers: { 'X-API-KEY': key } });
+        const data = await res.json().catch(() => ({}));
+        if (res.ok && data.ok && data.jeu) {
+          if (data.jeu.synopsis_fr) setSynopsisFr(data.jeu.synopsis_fr);
+          if (data.jeu.synopsis_en) setSynopsisEn(data.jeu.synopsis_en);
+          return;
+        }
+      } catch (e) {
+        console.warn('Erreur chargement détail jeu:', e);
+      }
+    }
     try {
       const { createClient } = await import('@supabase/supabase-js');
       const supabase = createClient(
@@ -121,7 +136,7 @@ export default function GameDetailModal({
     } catch (e) {
       console.warn('Erreur chargement synopsis:', e);
     }
-  }, [game.site_id, game.nom_url]);
+  }, [game.site_id, game.nom_url, f95JeuId, canEditSynopsis]);
 
   useEffect(() => {
     if (game.synopsis_en) setSynopsisEn(game.synopsis_en);
@@ -1,8 +1,8 @@
-import { useCallback, useEffect, useRef, useState } from 'react';
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import { createPortal } from 'react-dom';
 import { useEscapeKey } from '../../hooks/useEscapeKey';
 import { useModalScrollLock } from '../../hooks/useModalScrollLock';
-import { apiFetch } from '../../lib/api-helpers';
+import { createApiHeaders } from '../../lib/api-helpers';
 import { getSupabase } from '../../lib/supabase';
 import { useApp } from '../../state/appContext';
 import { useAuth } from '../../state/authContext';
@@ -13,7 +13,12 @@ import LogsViewer from './components/LogsViewer';
 import { USER_SOURCES, ADMIN_SOURCES, ADMIN_FILTERS } from './constants';
 import { exportLogsAsTxt, filterLogs } from './utils/logsUtils';
 
-const DEFAULT_REFRESH_MS = 30000;
+/** Historique demandé au flux (plafond serveur : 1000) et lignes gardées en mémoire */
+const STREAM_BACKLOG = 1000;
+const MAX_LINES = 5000;
+const FLUSH_MS = 250;
+const RECONNECT_MS = 5000;
+const REQUEST_USER_RE = / \| ([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}) \| /i;
 
 interface LogsModalProps {
   onClose: () => void;
@@ -37,6 +42,8 @@ export default function LogsModal({ onClose, inlineMode = false }: LogsModalProp
   const [logs, setLogs] = useState<string>('');
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [connected, setConnected] = useState(false);
+  const [pseudos, setPseudos] = useState<Record<string, string>>({});
 
   const [activeCategories, setActiveCategories] = useState<Set<string>>(() => {
     const defaults = new Set<string>();
@@ -50,95 +57,165 @@ export default function LogsModal({ onClose, inlineMode = false }: LogsModalProp
   const prevLogsRef = useRef<string>('');
   const userAtBottomRef = useRef(true);
 
+  // Lignes reçues du flux SSE, publiées dans l'état par paquets (FLUSH_MS)
+  const linesRef = useRef<string[]>([]);
+  const flushTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const knownUserIdsRef = useRef<Set<string>>(new Set());
+  const pendingUserIdsRef = useRef<Set<string>>(new Set());
+
   const isAdmin = profile?.is_master_admin === true;
 
   useEscapeKey(onClose, true);
   useModalScrollLock();
 
-  const displayedLogs = filterLogs(logs, activeCategories);
+  const enrichedLogs = useMemo(() => {
+    let enriched = logs;
+    Object.entries(pseudos).forEach(([uuid, pseudo]) => {
+      enriched = enriched.split(` | ${uuid} | `).join(` | @${pseudo} | `);
+    });
+    return enriched;
+  }, [logs, pseudos]);
 
-  const fetchLogs = useCallback(async () => {
-    const base = getBaseUrl(apiUrl);
-    const apiKey = localStorage.getItem('apiKey') || '';
-    if (!apiKey) {
-      setError('Cle API manquante. Configurez-la dans Parametres.');
-      setLoading(false);
-      return;
-    }
-    try {
-      setError(null);
-      const res = await apiFetch(`${base}/api/logs`, apiKey);
-      if (!res.ok) {
-        const data = await res.json().catch(() => ({}));
-        throw new Error(data.error || `Erreur ${res.status}`);
-      }
-      const data = await res.json();
-      setLogs(data.logs || '');
-      if (data.unique_user_ids?.length > 0) {
-        await enrichLogsWithUsernames(data.logs, data.unique_user_ids);
-      }
-    } catch (e: unknown) {
-      setError(e instanceof Error ? e.message : String(e));
-    } finally {
-      setLoading(false);
-    }
-  }, [apiUrl]);
+  const displayedLogs = filterLogs(enrichedLogs, activeCategories);
 
-  const enrichLogsWithUsernames = async (rawLogs: string, userIds: string[]) => {
+  const resolveUsernames = useCallback(async () => {
+    const userIds = [...pendingUserIdsRef.current];
+    pendingUserIdsRef.current.clear();
+    if (userIds.length === 0) return;
     try {
       const sb = getSupabase();
-      if (!sb || userIds.length === 0) return;
+      if (!sb) return;
       const { data: profiles } = await sb.from('profiles').select('id, pseudo').in('id', userIds);
       if (!profiles?.length) return;
-      const uuidToPseudo: Record<string, string> = {};
-      profiles.forEach((p: { id: string; pseudo?: string }) => {
-        uuidToPseudo[p.id] = p.pseudo || 'Utilisateur';
+      setPseudos((prev) => {
+        const next = { ...prev };
+        profiles.forEach((p: { id: string; pseudo?: string }) => {
+          next[p.id] = p.pseudo || 'Utilisateur';
+        });
+        return next;
       });
-      let enriched = rawLogs;
-      Object.entries(uuidToPseudo).forEach(([uuid, pseudo]) => {
-        const regex = new RegExp(` \\| ${uuid.replace(/-/g, '\\-')} \\| `, 'g');
-        enriched = enriched.replace(regex, ` | @${pseudo} | `);
-      });
-      setLogs(enriched);
     } catch (e) {
       console.warn('[Logs] Erreur enrichissement pseudos :', e);
     }
-  };
+  }, []);
 
-  const [autoRefreshEnabled, setAutoRefreshEnabled] = useState(
-    () => (localStorage.getItem('logs_auto_refresh_enabled') ?? '1') === '1'
-  );
-  const [refreshMs, setRefreshMs] = useState(() => {
-    const n = Number(localStorage.getItem('logs_refresh_ms'));
-    return Number.isFinite(n) && n >= 1000 ? n : DEFAULT_REFRESH_MS;
-  });
-  const [refreshSecondsInput, setRefreshSecondsInput] = useState(() => {
-    const n = Number(localStorage.getItem('logs_refresh_ms'));
-    const ms = Number.isFinite(n) && n >= 1000 ? n : DEFAULT_REFRESH_MS;
-    return String(Math.round(ms / 1000));
-  });
+  const flushLines = useCallback(() => {
+    flushTimerRef.current = null;
+    setLogs(linesRef.current.join('\n'));
+    resolveUsernames();
+  }, [resolveUsernames]);
 
-  const applyRefreshSeconds = useCallback((raw: string) => {
-    const clamped = Math.min(Math.max(Number(raw) || 30, 5), 600);
-    const ms = Math.round(clamped * 1000);
-    setRefreshMs(ms);
-    setRefreshSecondsInput(String(clamped));
-    localStorage.setItem('logs_refresh_ms', String(ms));
-  }, []);
+  const pushLine = useCallback((line: string) => {
+    const lines = linesRef.current;
+    lines.push(line);
+    if (lines.length > MAX_LINES) lines.splice(0, lines.length - MAX_LINES);
+    const userId = REQUEST_USER_RE.exec(line)?.[1];
+    if (userId && !knownUserIdsRef.current.has(userId)) {
+      knownUserIdsRef.current.add(userId);
+      pendingUserIdsRef.current.add(userId);
+    }
+    if (flushTimerRef.current === null) {
+      flushTimerRef.current = setTimeout(flushLines, FLUSH_MS);
+    }
+  }, [flushLines]);
 
-  useEffect(() => {
-    localStorage.setItem('logs_auto_refresh_enabled', autoRefreshEnabled ? '1' : '0');
-  }, [autoRefreshEnabled]);
+  const [liveEnabled, setLiveEnabled] = useState(
+    () => (localStorage.getItem('logs_live_enabled') ?? '1') === '1'
+  );
+  const [reconnectToken, setReconnectToken] = useState(0);
 
   useEffect(() => {
-    fetchLogs();
-  }, [fetchLogs]);
+    localStorage.setItem('logs_live_enabled', liveEnabled ? '1' : '0');
+  }, [liveEnabled]);
 
+  // Flux SSE /api/logs/stream : historique récent puis lignes en direct (fetch : en-têtes d'auth)
   useEffect(() => {
-    if (!autoRefreshEnabled || loading || error) return;
-    const interval = setInterval(fetchLogs, refreshMs);
-    return () => clearInterval(interval);
-  }, [autoRefreshEnabled, loading, error, fetchLogs, refreshMs]);
+    if (!liveEnabled) {
+      setLoading(false);
+      return;
+    }
+    const base = getBaseUrl(apiUrl);
+    const apiKey = localStorage.getItem('apiKey') || '';
+    if (!apiKey) {
+      setError('Cle API manquante. Configurez-la dans Parametres.');
+      setLoading(false);
+      return;
+    }
+    const controller = new AbortController();
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+
+    (async () => {
+      try {
+        setError(null);
+        const headers = await createApiHeaders(apiKey);
+        const res = await fetch(`${base}/api/logs/stream?source=file&backlog=${STREAM_BACKLOG}`, {
+          headers,
+          signal: controller.signal,
+        });
+        if (!res.ok) {
+          const data = await res.json().catch(() => ({}));
+          throw new Error(data.error || `Erreur ${res.status}`);
+        }
+        const reader = res.body?.getReader();
+        if (!reader) throw new Error('Stream indisponible');
+        // Nouvelle connexion : l'historique renvoyé par le serveur remplace l'affichage
+        linesRef.current = [];
+        setConnected(true);
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split('\n\n');
+          buffer = events.pop() ?? '';
+          for (const block of events) {
+            let event = 'message';
+            let data = '';
+            for (const row of block.split('\n')) {
+              if (row.startsWith('event:')) event = row.slice(6).trim();
+              else if (row.startsWith('data:')) data += row.slice(5).trim();
+            }
+            if (!data) continue; // commentaire « : ping »
+            const payload = JSON.parse(data);
+            if (event === 'log' && typeof payload.line === 'string') pushLine(payload.line);
+            if (event === 'ready') {
+              flushLines();
+              setLoading(false);
+            }
+          }
+        }
+      } catch (e: unknown) {
+        if (controller.signal.aborted) return;
+        // Erreur (clé refusée, API injoignable) : pas de boucle, bouton « Reconnecter »
+        setConnected(false);
+        setError(e instanceof Error ? e.message : String(e));
+        setLoading(false);
+        return;
+      }
+      setConnected(false);
+      if (!controller.signal.aborted) {
+        // Flux terminé par le serveur (redémarrage) : reconnexion automatique
+        reconnectTimer = setTimeout(() => setReconnectToken((n) => n + 1), RECONNECT_MS);
+      }
+    })();
+
+    return () => {
+      controller.abort();
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      setConnected(false);
+    };
+  }, [apiUrl, liveEnabled, reconnectToken, pushLine, flushLines]);
+
+  useEffect(() => () => {
+    if (flushTimerRef.current) clearTimeout(flushTimerRef.current);
+  }, []);
+
+  const reconnect = useCallback(() => {
+    setLoading(true);
+    setLiveEnabled(true);
+    setReconnectToken((n) => n + 1);
+  }, []);
 
   useEffect(() => {
     const container = logsContainerRef.current;
@@ -243,13 +320,10 @@ export default function LogsModal({ onClose, inlineMode = false }: LogsModalProp
       />
 
       <LogsFooter
-        refreshMs={refreshMs}
-        refreshSecondsInput={refreshSecondsInput}
-        onRefreshSecondsChange={setRefreshSecondsInput}
-        onRefreshSecondsBlur={applyRefreshSeconds}
-        autoRefreshEnabled={autoRefreshEnabled}
-        onAutoRefreshChange={setAutoRefreshEnabled}
-        onRefresh={fetchLogs}
+        liveEnabled={liveEnabled}
+        onLiveChange={setLiveEnabled}
+        connected={connected}
+        onReconnect={reconnect}
         onClose={onClose}
       />
     </div>
@@ -1,33 +1,28 @@
 import Toggle from '../../shared/Toggle';
 
 interface LogsFooterProps {
-  refreshMs: number;
-  refreshSecondsInput: string;
-  onRefreshSecondsChange: (value: string) => void;
-  onRefreshSecondsBlur: (value: string) => void;
-  autoRefreshEnabled: boolean;
-  onAutoRefreshChange: (enabled: boolean) => void;
-  onRefresh: () => void;
+  liveEnabled: boolean;
+  onLiveChange: (enabled: boolean) => void;
+  connected: boolean;
+  onReconnect: () => void;
   onClose: () => void;
 }
 
 export default function LogsFooter({
-  refreshMs,
-  refreshSecondsInput,
-  onRefreshSecondsChange,
-  onRefreshSecondsBlur,
-  autoRefreshEnabled,
-  onAutoRefreshChange,
-  onRefresh,
+  liveEnabled,
+  onLiveChange,
+  connected,
+  onReconnect,
   onClose,
 }: LogsFooterProps) {
+  const statusLabel = !liveEnabled ? '⏸️ En pause' : connected ? '🟢 En direct' : '🟠 Connexion…';
   return (
     <div className="logs-footer">
       <div style={{ display: 'flex', alignItems: 'center', gap: 8, flexWrap: 'wrap' }}>
-        <span>Auto-refresh : {Math.round(refreshMs / 1000)}s • fichier courant complet</span>
+        <span>{statusLabel} • 1000 dernieres lignes puis flux continu</span>
         <span
           style={{ textDecoration: 'underline dotted', cursor: 'help' }}
-          title="Seul le fichier de logs courant (max 5 Mo) est affiche. Pour l'historique complet, contactez le developpeur."
+          title="Les lignes du fichier de logs courant arrivent en direct (lecture partagee cote serveur). Pour l'historique complet, contactez le developpeur."
         >
           ℹ️
         </span>
@@ -35,28 +30,13 @@ export default function LogsFooter({
 
       <div style={{ display: 'flex', alignItems: 'center', gap: 10, justifyContent: 'flex-end', whiteSpace: 'nowrap' }}>
         <Toggle
-          checked={autoRefreshEnabled}
-          onChange={onAutoRefreshChange}
-          label="Auto-refresh"
-          title="Active/desactive l'actualisation automatique"
+          checked={liveEnabled}
+          onChange={onLiveChange}
+          label="Direct"
+          title="Active/desactive la reception des logs en direct"
         />
-        <label style={{ display: 'flex', alignItems: 'center', gap: 6 }}>
-          Delai (s)
-          <input
-            type="number"
-            min={5}
-            max={600}
-            step={5}
-            value={refreshSecondsInput}
-            onChange={(e) => onRefreshSecondsChange(e.target.value)}
-            onBlur={(e) => onRefreshSecondsBlur(e.target.value)}
-            disabled={!autoRefreshEnabled}
-            className="server-input"
-            style={{ width: 64, padding: '4px 6px' }}
-          />
-        </label>
-        <button type="button" onClick={onRefresh} className="server-btn server-btn--default">
-          🔄 Rafraichir
+        <button type="button" onClick={onReconnect} className="server-btn server-btn--default">
+          🔄 Reconnecter
         </button>
       </div>
 
@@ -541,13 +541,42 @@ export function AppProvider({ children }: { children: React.ReactNode }) {
         formData.append('history_payload', JSON.stringify(postToRow(newPostForHistory)));
       }
 
+      // Clé d'idempotence : un renvoi (double clic, retry réseau) ne crée pas de second post
+      formData.append(
+        'idempotency_key',
+        isEditMode && pubState.editingPostId ? `${pubState.editingPostId}_${now}` : postId
+      );
+
       const apiKey = localStorage.getItem('apiKey') || '';
       const headers = await createApiHeaders(apiKey);
       const response = await fetch(apiEndpoint, { method: 'POST', headers, body: formData });
-      const res = await response.json();
+      let res = await response.json();
+      let httpStatus = response.status;
+
+      // 202 : publication mise en file côté serveur (rate limit / file chargée), on suit son état
+      if (httpStatus === 202 && res.queued && res.idempotency_key) {
+        pubState.setLastPublishResult('⏳ Publication en file d\'attente…');
+        const statusUrl = `${baseUrl}/api/forum-post/status?key=${encodeURIComponent(res.idempotency_key)}`;
+        const deadline = Date.now() + 5 * 60 * 1000;
+        let job: any = null;
+        while (Date.now() < deadline) {
+          await new Promise(resolve => setTimeout(resolve, 3000));
+          const statusResponse = await fetch(statusUrl, { headers });
+          if (!statusResponse.ok) continue;
+          job = await statusResponse.json();
+          if ((job.status === 'done' || job.status === 'failed') && job.result) break;
+          job = null;
+        }
+        if (!job) {
+          pubState.setLastPublishResult('⏳ Publication toujours en file : vérifiez l\'historique dans quelques minutes.');
+          return { ok: false, error: 'queued' };
+        }
+        httpStatus = job.result.http_status;
+        res = job.result.body || {};
+      }
 
-      if (!response.ok) {
-        if (response.status === 429) {
+      if (httpStatus < 200 || httpStatus >= 300) {
+        if (httpStatus === 429) {
           const cooldownEnd = Date.now() + 60000;
           pubState.setRateLimitCooldown(cooldownEnd);
           pubState.setLastPublishResult('❌ Rate limit Discord (429). Cooldown de 60 secondes activé.');
@@ -556,8 +585,8 @@ export function AppProvider({ children }: { children: React.ReactNode }) {
           return { ok: false, error: 'rate_limit_429' };
         }
         pubState.setLastPublishResult('Erreur API: ' + (res.error || 'unknown'));
-        const isNetworkError = !response.status || response.status === 0;
-        showErrorModal({ code: res.error || 'API_ERROR', message: isNetworkError ? 'L\'API n\'est pas accessible. Vérifiez l\'URL de l\'API.' : (res.error || 'Erreur inconnue'), context: isEditMode ? 'Mise à jour du post Discord' : 'Publication du post Discord', httpStatus: response.status || 0, discordError: res });
+        const isNetworkError = !httpStatus || httpStatus === 0;
+        showErrorModal({ code: res.error || 'API_ERROR', message: isNetworkError ? 'L\'API n\'est pas accessible. Vérifiez l\'URL de l\'API.' : (res.error || 'Erreur inconnue'), context: isEditMode ? 'Mise à jour du post Discord' : 'Publication du post Discord', httpStatus: httpStatus || 0, discordError: res });
         return { ok: false, error: res.error };
       }
 
@@ -1,6 +1,7 @@
 /**
  * Hook RSS F95Zone — récupère le flux des dernières MAJ de jeux.
  * Utilise un proxy backend (/api/rss/f95-updates) pour éviter les problèmes CORS.
+ * Le proxy sert un cache partagé côté serveur (ETag → 304 si le flux n'a pas changé).
  * Fallback sur fetch direct (fonctionne dans Tauri sans CORS).
  * Cache localStorage 5 min pour limiter les requêtes.
  */
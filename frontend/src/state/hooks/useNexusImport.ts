@@ -1,25 +1,15 @@
 /**
  * Hook pour l'import en masse de jeux depuis Nexus.
- * Étape 1 : parseDbFile(file) — envoie le .db au backend → reçoit les entrées parsées
- * Étape 2 : startImport(options) — POST /api/collection/import-batch (streaming NDJSON)
+ * Étape 1 : selectDbFile(file) — vérifie et retient le fichier .db choisi
+ * Étape 2 : startImport(options) — POST multipart /api/collection/nexus-import (streaming NDJSON) :
+ *           le backend parse le .db, rapproche le catalogue et écrit la collection en une requête.
  */
 
 import { useCallback, useRef, useState } from 'react';
 import { createApiHeaders } from '../../lib/api-helpers';
 import { useAuth } from '../authContext';
 
-/** Entrée normalisée retournée par le backend (parse_nexus_db) */
-export type NexusExportEntry = {
-  f95_thread_id:        number | null;
-  f95_url:              string | null;
-  lewdcorner_thread_id: number | null;
-  lewdcorner_url:       string | null;
-  game_site:            string | null;
-  title:                string | null;
-  executable_paths:     { path: string }[];
-  labels:               { label: string; color: string }[];
-};
-
+/** Statistiques de parsing envoyées par le backend en début d'import (parse_nexus_db) */
 export type NexusParseStats = {
   total:       number;
   with_f95:    number;
@@ -39,16 +29,18 @@ export type ImportOptions = {
 export type ImportProgress = { current: number; total: number };
 export type ImportSummary  = { imported: number; skipped: number; errors: number };
 
-/** État de parsing du fichier .db */
-export type ParseStatus = 'idle' | 'parsing' | 'ready' | 'error';
+/** État de sélection du fichier .db */
+export type ParseStatus = 'idle' | 'ready' | 'error';
+
+/** Même limite que le backend (_NEXUS_MAX_BYTES) */
+const NEXUS_MAX_BYTES = 200 * 1024 * 1024;
 
 export function useNexusImport() {
   const { profile } = useAuth();
 
   const [parseStatus,  setParseStatus]  = useState<ParseStatus>('idle');
   const [parseError,   setParseError]   = useState<string | null>(null);
-  const [parseWarnings,setParseWarnings]= useState<string[]>([]);
-  const [fileEntries,  setFileEntries]  = useState<NexusExportEntry[] | null>(null);
+  const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [parseStats,   setParseStats]   = useState<NexusParseStats | null>(null);
 
   const [isImporting,  setIsImporting]  = useState(false);
@@ -66,17 +58,14 @@ export function useNexusImport() {
     return { base, key };
   };
 
-  // ─── Étape 1A : envoi du fichier .db au backend pour parsing ──────
+  // ─── Étape 1 : sélection du fichier .db ───────────────────────────
 
   /**
-   * Envoie le fichier .db Nexus à l'API backend.
-   * Le backend lit le SQLite, extrait les jeux et retourne les entrées normalisées.
+   * Retient le fichier .db Nexus. Il n'est envoyé qu'une fois, au lancement de l'import :
+   * le parsing se fait côté backend dans la même requête.
    */
-  const parseDbFile = useCallback(async (file: File) => {
-    setParseStatus('parsing');
+  const selectDbFile = useCallback((file: File) => {
     setParseError(null);
-    setParseWarnings([]);
-    setFileEntries(null);
     setParseStats(null);
     setSummary(null);
     setLogs([]);
@@ -88,47 +77,26 @@ export function useNexusImport() {
       setParseStatus('error');
       return;
     }
-
-    try {
-      const formData = new FormData();
-      formData.append('file', file, file.name);
-
-      const headers = await createApiHeaders(key);
-      const res = await fetch(`${base}/api/collection/nexus-parse-db`, {
-        method:  'POST',
-        headers, // pas de Content-Type : laissé au navigateur pour le multipart boundary
-        body:    formData,
-      });
-
-      const data = await res.json().catch(() => ({}));
-      if (!res.ok || !data.ok) {
-        setParseError(data?.error || `Erreur HTTP ${res.status}`);
-        setParseStatus('error');
-        return;
-      }
-
-      const entries: NexusExportEntry[] = data.entries ?? [];
-      if (entries.length === 0) {
-        setParseError('Aucun jeu adulte trouvé dans ce fichier .db.');
-        setParseStatus('error');
-        return;
-      }
-
-      setFileEntries(entries);
-      setParseStats(data.stats ?? null);
-      setParseWarnings(data.warnings ?? []);
-      setParseStatus('ready');
-    } catch (e: any) {
-      setParseError(e?.message || 'Erreur réseau lors de l\'analyse du fichier.');
+    if (file.size === 0) {
+      setParseError('Fichier vide.');
+      setParseStatus('error');
+      return;
+    }
+    if (file.size > NEXUS_MAX_BYTES) {
+      setParseError('Fichier trop volumineux (max 200 Mo).');
       setParseStatus('error');
+      return;
     }
+
+    setSelectedFile(file);
+    setParseStatus('ready');
   }, []);
 
   // ─── Étape 2 : import en masse ─────────────────────────────────────
 
   const startImport = useCallback(
     async (options: ImportOptions) => {
-      if (!fileEntries?.length) return;
+      if (!selectedFile) return;
       if (!profile?.id) {
         setLogs(['❌ Vous devez être connecté pour importer.']);
         return;
@@ -141,24 +109,25 @@ export function useNexusImport() {
 
       setIsImporting(true);
       setSummary(null);
-      setProgress({ current: 0, total: fileEntries.length });
-      setLogs(['🚀 Démarrage de l\'import…']);
+      setProgress({ current: 0, total: 0 });
+      setLogs(['🚀 Envoi du fichier et démarrage de l\'import…']);
       abortRef.current = new AbortController();
 
       try {
+        const formData = new FormData();
+        formData.append('owner_id',         profile.id);
+        formData.append('skip_existing',    String(options.skipExisting));
+        formData.append('overwrite_labels', String(options.overwriteLabels));
+        formData.append('overwrite_paths',  String(options.overwritePaths));
+        formData.append('overwrite_all',    String(options.overwriteAll));
+        formData.append('file', selectedFile, selectedFile.name);
+
         const headers = await createApiHeaders(key);
-        const res = await fetch(`${base}/api/collection/import-batch`, {
+        const res = await fetch(`${base}/api/collection/nexus-import`, {
           method:  'POST',
-          headers: { 'Content-Type': 'application/json', ...headers },
-          body:    JSON.stringify({
-            owner_id:         profile.id,
-            entries:          fileEntries,
-            skip_existing:    options.skipExisting,
-            overwrite_labels: options.overwriteLabels,
-            overwrite_paths:  options.overwritePaths,
-            overwrite_all:    options.overwriteAll,
-          }),
-          signal: abortRef.current.signal,
+          headers, // pas de Content-Type : laissé au navigateur pour le multipart boundary
+          body:    formData,
+          signal:  abortRef.current.signal,
         });
 
         if (!res.ok) {
@@ -170,12 +139,17 @@ export function useNexusImport() {
         const decoder      = new TextDecoder();
         if (!streamReader) throw new Error('Stream indisponible');
 
+        let buffer = '';
         while (true) {
           const { done, value } = await streamReader.read();
           if (done) break;
-          for (const line of decoder.decode(value, { stream: true }).split('\n').filter(Boolean)) {
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop() ?? '';
+          for (const line of lines.filter(Boolean)) {
             try {
               const data = JSON.parse(line);
+              if (data.stats)    setParseStats(data.stats);
               if (data.progress) setProgress(data.progress);
               if (data.log)      setLogs((p) => [...p, data.log]);
               if (data.status === 'completed') {
@@ -192,7 +166,7 @@ export function useNexusImport() {
         setIsImporting(false);
       }
     },
-    [fileEntries, profile?.id]
+    [selectedFile, profile?.id]
   );
 
   const stopImport = useCallback(() => {
@@ -205,8 +179,7 @@ export function useNexusImport() {
     setIsImporting(false);
     setParseStatus('idle');
     setParseError(null);
-    setParseWarnings([]);
-    setFileEntries(null);
+    setSelectedFile(null);
     setParseStats(null);
     setSummary(null);
     setLogs([]);
@@ -214,13 +187,12 @@ export function useNexusImport() {
   }, []);
 
   return {
-    // Parsing
+    // Fichier
     parseStatus,
     parseError,
-    parseWarnings,
     parseStats,
-    fileEntries,
-    parseDbFile,
+    selectedFile,
+    selectDbFile,
     // Import
     isImporting,
     progress,
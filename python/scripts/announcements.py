@@ -4,11 +4,14 @@ Dependances : config, discord_api
 Logger       : [publisher]
 """
 
+import asyncio
 import logging
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 from config import config
-from discord_api import _discord_post_json
+from discord_api import _discord_patch_json, _discord_post_json
 
 logger = logging.getLogger("publisher")
 
@@ -32,8 +35,151 @@ def _build_forum_link(thread_url: str, forum_id: int = None) -> Optional[str]:
     return f"https://discord.com/channels/{guild_id}/{actual_forum_id}"
 
 
+# ==================== REGROUPEMENT ====================
+
+_DISCORD_CONTENT_LIMIT = 2000
+_DISCORD_MAX_EMBEDS = 10
+
+
+@dataclass
+class _AnnounceEntry:
+    is_update:         bool
+    title:             str
+    thread_url:        str
+    game_version:      str
+    translate_version: str
+    state_label:       str
+    image_url:         Optional[str]
+
+
+@dataclass
+class _AnnounceGroup:
+    """Message d'annonce encore ouvert au regroupement (meme traducteur, meme salon)."""
+    message_id: str
+    opened_at:  float
+    translator_label: str
+    forum_link: Optional[str]
+    entries:    List[_AnnounceEntry] = field(default_factory=list)
+
+
+_open_groups: Dict[Tuple[str, str], _AnnounceGroup] = {}
+_group_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def _render_single(entry: _AnnounceEntry, translator_label: str, forum_link: Optional[str]) -> str:
+    prefixe = "🔄 **Mise a jour d'une traduction**" if entry.is_update else "🎮 **Nouvelle traduction**"
+    msg  = f"{prefixe}\n\n"
+    msg += f"**Nom du jeu :** [{entry.title}]({entry.thread_url})\n"
+    if translator_label and translator_label.strip():
+        msg += f"**Traducteur :** {translator_label.strip()}\n"
+    msg += f"**Version du jeu :** `{entry.game_version}`\n"
+    msg += f"**Version de la traduction :** `{entry.translate_version}`\n"
+    if entry.state_label and entry.state_label.strip():
+        msg += f"\n**Etat :** {entry.state_label.strip()}\n"
+    msg += "\n**Bon jeu a vous** 😊"
+    if forum_link:
+        msg += f"\n\n> 📚 Retrouvez toutes mes traductions → [Acceder au forum]({forum_link})"
+    return msg
+
+
+def _render_grouped(entries: List[_AnnounceEntry], translator_label: str, forum_link: Optional[str]) -> str:
+    who = f" par {translator_label.strip()}" if translator_label and translator_label.strip() else ""
+    msg = f"📣 **{len(entries)} traductions publiees ou mises a jour{who}**\n\n"
+    for e in entries:
+        icon = "🔄" if e.is_update else "🎮"
+        msg += f"{icon} [{e.title}]({e.thread_url}) — jeu `{e.game_version}` · trad `{e.translate_version}`"
+        if e.state_label and e.state_label.strip():
+            msg += f" · {e.state_label.strip()}"
+        msg += "\n"
+    msg += "\n**Bon jeu a vous** 😊"
+    if forum_link:
+        msg += f"\n\n> 📚 Retrouvez toutes mes traductions → [Acceder au forum]({forum_link})"
+    return msg
+
+
+def _render_announcement(entries: List[_AnnounceEntry], translator_label: str, forum_link: Optional[str]) -> dict:
+    if len(entries) == 1:
+        content = _render_single(entries[0], translator_label, forum_link)
+    else:
+        content = _render_grouped(entries, translator_label, forum_link)
+    embeds = [
+        {"color": 0x4ADE80, "image": {"url": e.image_url}}
+        for e in entries if e.image_url
+    ][:_DISCORD_MAX_EMBEDS]
+    payload = {"content": content}
+    if embeds:
+        payload["embeds"] = embeds
+    return payload
+
+
 # ==================== ANNONCES ====================
 
+_group_users: Dict[Tuple[str, str], int] = {}
+
+
+def _prune_expired_groups(window: int) -> None:
+    """Ferme les groupes dont la fenetre est echue (et libere leur verrou s'il est inutilise)."""
+    now = time.monotonic()
+    for key in [k for k, g in _open_groups.items() if now - g.opened_at >= window]:
+        _open_groups.pop(key, None)
+        if not _group_users.get(key):
+            _group_locks.pop(key, None)
+
+
+def _release_group(group_key: Tuple[str, str]) -> None:
+    """Fin d'usage du verrou ; retire si le groupe est ferme et que personne d'autre ne l'attend."""
+    users = _group_users.get(group_key, 0) - 1
+    if users > 0:
+        _group_users[group_key] = users
+        return
+    _group_users.pop(group_key, None)
+    if group_key not in _open_groups:
+        _group_locks.pop(group_key, None)
+
+
+async def _post_announcement(session, channel_id: str, entry: _AnnounceEntry,
+                             translator_label: str, forum_link: Optional[str]):
+    """Poste une annonce a une entree ; retourne la reponse Discord, None en cas d'echec."""
+    payload = _render_announcement([entry], translator_label, forum_link)
+    status, data, _ = await _discord_post_json(
+        session,
+        f"/channels/{channel_id}/messages",
+        payload,
+    )
+    if status >= 300:
+        logger.warning("[publisher] Echec envoi annonce (status=%d) : %s", status, data)
+        return None
+    return data if isinstance(data, dict) else {}
+
+
+async def _coalesce_into_group(session, group_key: Tuple[str, str], entry: _AnnounceEntry,
+                               translator_label: str, forum_link: Optional[str], window: int) -> bool:
+    """
+    Ajoute l'entree au message ouvert du groupe (edition) si la fenetre court encore.
+    Retourne False si un nouveau message doit etre poste (groupe alors ferme).
+    """
+    group = _open_groups.get(group_key)
+    if not group:
+        return False
+    if time.monotonic() - group.opened_at < window:
+        # Meme jeu re-annonce dans la fenetre : la nouvelle entree remplace l'ancienne
+        entries = [e for e in group.entries if e.thread_url != entry.thread_url] + [entry]
+        payload = _render_announcement(entries, translator_label, forum_link or group.forum_link)
+        if len(payload["content"]) <= _DISCORD_CONTENT_LIMIT:
+            status, _ = await _discord_patch_json(
+                session, f"/channels/{group_key[1]}/messages/{group.message_id}",
+                {"content": payload["content"], "embeds": payload.get("embeds", [])},
+            )
+            if status < 300:
+                group.entries = entries
+                group.forum_link = forum_link or group.forum_link
+                logger.info("[publisher] Annonce regroupee (%d jeu(x)) : %s", len(entries), entry.title)
+                return True
+            logger.warning("[publisher] Edition annonce regroupee echouee (status=%d), nouveau message", status)
+    _open_groups.pop(group_key, None)
+    return False
+
+
 async def _send_announcement(
     session,
     is_update:        bool,
@@ -49,46 +195,58 @@ async def _send_announcement(
     """
     Envoie une annonce dans PUBLISHER_ANNOUNCE_CHANNEL_ID.
     Couvre les deux cas : nouvelle traduction et mise a jour.
+    Regroupement (opt-in) : pendant ANNOUNCE_COALESCE_SECONDS apres une annonce, les suivantes
+    du meme traducteur editent ce message (liste des jeux) au lieu d'en poster un nouveau.
+    Les annonces sans traducteur ne sont jamais regroupees.
     Retourne True si l'envoi a reussi.
     """
     if not config.PUBLISHER_ANNOUNCE_CHANNEL_ID:
         logger.warning("[publisher] PUBLISHER_ANNOUNCE_CHANNEL_ID non configure, annonce non envoyee")
         return False
 
-    title_clean       = (title             or "").strip() or "Sans titre"
-    game_version      = (game_version      or "").strip() or "Non specifiee"
-    translate_version = (translate_version or "").strip() or "Non specifiee"
-    prefixe = "🔄 **Mise a jour d'une traduction**" if is_update else "🎮 **Nouvelle traduction**"
-
-    msg  = f"{prefixe}\n\n"
-    msg += f"**Nom du jeu :** [{title_clean}]({thread_url})\n"
-    if translator_label and translator_label.strip():
-        msg += f"**Traducteur :** {translator_label.strip()}\n"
-    msg += f"**Version du jeu :** `{game_version}`\n"
-    msg += f"**Version de la traduction :** `{translate_version}`\n"
-    if state_label and state_label.strip():
-        msg += f"\n**Etat :** {state_label.strip()}\n"
-    msg += "\n**Bon jeu a vous** 😊"
-
+    entry = _AnnounceEntry(
+        is_update=is_update,
+        title=(title or "").strip() or "Sans titre",
+        thread_url=thread_url,
+        game_version=(game_version or "").strip() or "Non specifiee",
+        translate_version=(translate_version or "").strip() or "Non specifiee",
+        state_label=state_label or "",
+        image_url=image_url.strip() if image_url and image_url.strip().startswith("http") else None,
+    )
+    channel_id = str(config.PUBLISHER_ANNOUNCE_CHANNEL_ID)
     forum_link = _build_forum_link(thread_url, forum_id=forum_id)
-    if forum_link:
-        msg += f"\n\n> 📚 Retrouvez toutes mes traductions → [Acceder au forum]({forum_link})"
+    label_key = (translator_label or "").strip().lower()
+    window = config.ANNOUNCE_COALESCE_SECONDS
 
-    payload = {"content": msg}
-    if image_url and image_url.strip().startswith("http"):
-        payload["embeds"] = [{"color": 0x4ADE80, "image": {"url": image_url.strip()}}]
-
-    status, data, _ = await _discord_post_json(
-        session,
-        f"/channels/{config.PUBLISHER_ANNOUNCE_CHANNEL_ID}/messages",
-        payload,
-    )
-    if status >= 300:
-        logger.warning("[publisher] Echec envoi annonce (status=%d) : %s", status, data)
-        return False
+    # Sans traducteur identifie, pas de regroupement : des auteurs differents seraient fusionnes
+    if window <= 0 or not label_key:
+        if await _post_announcement(session, channel_id, entry, translator_label, forum_link) is None:
+            return False
+    else:
+        group_key = (label_key, channel_id)
+        _prune_expired_groups(window)
+        lock = _group_locks.setdefault(group_key, asyncio.Lock())
+        _group_users[group_key] = _group_users.get(group_key, 0) + 1
+        try:
+            async with lock:
+                if await _coalesce_into_group(session, group_key, entry, translator_label, forum_link, window):
+                    return True
+                data = await _post_announcement(session, channel_id, entry, translator_label, forum_link)
+                if data is None:
+                    return False
+                if data.get("id"):
+                    _open_groups[group_key] = _AnnounceGroup(
+                        message_id=str(data["id"]),
+                        opened_at=time.monotonic(),
+                        translator_label=translator_label or "",
+                        forum_link=forum_link,
+                        entries=[entry],
+                    )
+        finally:
+            _release_group(group_key)
 
     logger.info("[publisher] Annonce envoyee (%s) : %s",
-                "mise a jour" if is_update else "nouvelle traduction", title_clean)
+                "mise a jour" if is_update else "nouvelle traduction", entry.title)
     return True
 
 
@@ -1,10 +1,21 @@
 import asyncio
+import json
 import logging
 from pathlib import Path
 
 from aiohttp import web
 
 from api_key_auth import _auth_request
+from config import config
+from discord_api import rate_limiter
+from discord_outbox import get_outbox_info
+from f95_rss_feed import get_rss_cache_info
+from forum_manager import get_forum_cache_info
+from image_cache import get_image_cache_info
+from log_setup import get_logging_info
+from log_tail import LOG_LEVELS, LogBroadcaster, LogFilter, get_log_user_ids, read_tail_lines
+from metrics import render_metrics
+from translator import get_translation_memory_info
 from supabase_client import (
     _add_forum_post_grant_sync,
     _delete_account_data_sync,
@@ -22,8 +33,20 @@ logger = logging.getLogger("api")
 LOG_FILE = Path(__file__).resolve().parents[2] / "logs" / "bot.log"
 
 
+LOG_TAIL_LINES = 500
+_SSE_HEARTBEAT_SECONDS = 15
+_SSE_MAX_BACKLOG = 1000
+log_broadcaster = LogBroadcaster(LOG_FILE)
+
+
+def _read_logs_sync() -> tuple[str, set[str]]:
+    """Dernières lignes (lecture depuis la fin) + user_id vus (index incrémental)."""
+    content = "".join(read_tail_lines(LOG_FILE, LOG_TAIL_LINES))
+    return content, get_log_user_ids(LOG_FILE)
+
+
 async def get_logs(request):
-    """Retourne le fichier de logs complet (protégé par clé API)."""
+    """Retourne les dernières lignes du fichier de logs (protégé par clé API)."""
     is_valid, _, _, _ = await _auth_request(request, "/api/logs")
     if not is_valid:
         return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
@@ -32,16 +55,8 @@ async def get_logs(request):
     unique_user_ids = set()
     if LOG_FILE.exists():
         try:
-            with open(LOG_FILE, "r", encoding="utf-8", errors="replace") as file_handle:
-                all_lines = file_handle.readlines()
-                content = "".join(all_lines[-500:])
-                for line in all_lines:
-                    if "[REQUEST]" in line:
-                        parts = line.split(" | ")
-                        if len(parts) >= 2:
-                            user_id = parts[1].strip()
-                            if user_id != "NULL" and len(user_id) >= 32 and "-" in user_id:
-                                unique_user_ids.add(user_id)
+            loop = asyncio.get_event_loop()
+            content, unique_user_ids = await loop.run_in_executor(None, _read_logs_sync)
         except Exception as error:
             logger.warning("[get_logs] Erreur lecture logs: %s", error)
             content = f"[Erreur lecture: {error}]"
@@ -55,6 +70,65 @@ async def get_logs(request):
     }))
 
 
+async def stream_logs(request):
+    """
+    Logs en direct (Server-Sent Events) : historique récent puis nouvelles lignes.
+    Query : source=file|journal, level=INFO|WARNING|…, user=<user_id>, backlog=<n> (défaut 500).
+    Une seule lecture partagée par source, quel que soit le nombre de clients.
+    """
+    is_valid, _, _, _ = await _auth_request(request, "/api/logs/stream")
+    if not is_valid:
+        return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+
+    source = (request.query.get("source") or "file").strip().lower()
+    if source not in ("file", "journal"):
+        return with_cors(request, web.json_response({"ok": False, "error": "source invalide (file|journal)"}, status=400))
+    level_name = (request.query.get("level") or "").strip().upper()
+    if level_name and level_name not in LOG_LEVELS:
+        return with_cors(request, web.json_response({"ok": False, "error": "level invalide"}, status=400))
+    log_filter = LogFilter(
+        min_level=LOG_LEVELS.get(level_name, 0),
+        user_id=(request.query.get("user") or "").strip(),
+    )
+    try:
+        backlog_size = max(0, min(_SSE_MAX_BACKLOG, int(request.query.get("backlog") or LOG_TAIL_LINES)))
+    except ValueError:
+        backlog_size = LOG_TAIL_LINES
+
+    response = web.StreamResponse()
+    response.headers["Content-Type"] = "text/event-stream"
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    with_cors(request, response)
+    await response.prepare(request)
+
+    async def send_event(event: str, data: dict) -> None:
+        payload = json.dumps(data, ensure_ascii=False)
+        await response.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+
+    backlog, queue = await log_broadcaster.subscribe(source)
+    try:
+        matching = [r for r in backlog if log_filter.accepts(r)][-backlog_size:] if backlog_size else []
+        for record in matching:
+            await send_event("log", {"line": record.line, "level": record.level, "source": record.source})
+        await send_event("ready", {"backlog": len(matching)})
+        while True:
+            try:
+                record = await asyncio.wait_for(queue.get(), timeout=_SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await response.write(b": ping\n\n")
+                continue
+            if log_filter.accepts(record):
+                await send_event("log", {"line": record.line, "level": record.level, "source": record.source})
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    except Exception as error:
+        logger.debug("[api] stream_logs fermé : %s", error)
+    finally:
+        log_broadcaster.unsubscribe(source, queue)
+    return response
+
+
 async def account_delete(request):
     """Supprime definitivement le compte d'un utilisateur."""
     is_valid, _, _, _ = await _auth_request(request, "/api/account/delete")
@@ -523,3 +597,27 @@ async def get_journal_logs(request):
     except Exception as error:
         logger.exception("[api] get_journal_logs : %s", error)
         return with_cors(request, web.json_response({"ok": False, "error": str(error)}, status=500))
+
+
+def _metrics_components() -> dict:
+    return {
+        "rss_feed":           get_rss_cache_info(),
+        "translation_memory": get_translation_memory_info(),
+        "image_cache":        get_image_cache_info(),
+        "forum_cache":        get_forum_cache_info(),
+        "discord_outbox":     get_outbox_info(),
+        "discord_rate_limit": rate_limiter.get_info(),
+        "log_stream":         log_broadcaster.get_info(),
+        "logging":            get_logging_info(),
+    }
+
+
+async def metrics_endpoint(request):
+    """Métriques au format texte Prometheus (clé API requise sauf METRICS_PUBLIC=true)."""
+    if not config.METRICS_PUBLIC:
+        is_valid, _, _, _ = await _auth_request(request, "/metrics")
+        if not is_valid:
+            return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+    body = render_metrics(_metrics_components())
+    return web.Response(text=body, content_type="text/plain", charset="utf-8",
+                        headers={"X-Content-Type-Options": "nosniff"})
@@ -1,15 +1,17 @@
 import asyncio
 import logging
+import os
 import tempfile
 
 import aiohttp
 from aiohttp import web
 
 from api_key_auth import _auth_request
+from f95_rss_feed import get_rss_date
 from f95_public_api_client import find_public_game_by_thread_id, public_game_to_scraped_data
 from nexus_export import parse_nexus_db
 from scraper import _PLACEHOLDER_DATE, extract_f95_thread_id, scrape_f95_game_data
-from supabase_client import _get_supabase
+from supabase_client import _fetch_rss_ledger_dates_sync, _get_supabase
 from translator import translate_text
 
 from .middleware import with_cors
@@ -21,35 +23,16 @@ async def _get_date_from_rss(
     session: aiohttp.ClientSession,
     thread_id: int,
 ) -> str | None:
-    import re as _re2
-    import xml.etree.ElementTree as ET2
-    from email.utils import parsedate_to_datetime as _ptd
-
-    rss_url = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
-    try:
-        async with session.get(
-            rss_url,
-            headers={"User-Agent": "Mozilla/5.0"},
-            timeout=aiohttp.ClientTimeout(total=10),
-        ) as resp:
-            if resp.status != 200:
-                return None
-            xml_text = await resp.text(encoding="utf-8", errors="replace")
-
-        root = ET2.fromstring(xml_text)
-        for item in root.iter("item"):
-            raw = ET2.tostring(item, encoding="unicode")
-            m = _re2.search(r"/threads/(?:[^/]*\.)?(\d+)", raw)
-            if not m or int(m.group(1)) != thread_id:
-                continue
-            pub_raw = (item.findtext("pubDate") or "").strip()
-            try:
-                return _ptd(pub_raw).strftime("%Y-%m-%d") if pub_raw else None
-            except Exception:
-                return None
-        return None
-    except Exception:
-        return None
+    """
+    Date RSS "YYYY-MM-DD" du thread : flux partagé (cache TTL), puis registre des
+    dates déjà relevées dans le flux. None si inconnue des deux.
+    """
+    date = await get_rss_date(thread_id, session)
+    if date:
+        return date
+    loop = asyncio.get_event_loop()
+    ledger = await loop.run_in_executor(None, _fetch_rss_ledger_dates_sync, [thread_id])
+    return ledger.get(int(thread_id))
 
 
 def _pick_primary_jeu(rows: list[dict]) -> dict:
@@ -247,32 +230,85 @@ async def collection_resolve(request):
         return with_cors(request, web.json_response({"ok": False, "error": str(error)}, status=500))
 
 
-async def nexus_parse_db(request):
-    is_valid, _, _, _ = await _auth_request(request, "/api/collection/nexus-parse-db")
-    if not is_valid:
-        return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+_NEXUS_MAX_BYTES = 200 * 1024 * 1024
+_NEXUS_CHUNK_SIZE = 256 * 1024
+_NEXUS_FORM_FIELD_MAX = 4096
+
 
-    db_bytes = None
+def _unlink_quiet(path: str | None) -> None:
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+async def _receive_nexus_upload(
+    request, form: dict | None = None,
+) -> tuple[str | None, web.Response | None]:
+    """
+    Écrit le champ multipart 'file' dans un fichier temporaire, par morceaux, sans jamais
+    charger la base entière en mémoire. La taille max est vérifiée pendant la réception
+    (et d'emblée via Content-Length). Si form est fourni, les autres champs (texte court)
+    y sont recopiés, avant comme après le fichier. Retourne (chemin, None) ou (None, réponse d'erreur).
+    """
+    if request.content_length and request.content_length > _NEXUS_MAX_BYTES + 64 * 1024:
+        return None, web.json_response({"ok": False, "error": "Fichier trop volumineux (max 200 Mo)"}, status=413)
+
+    loop = asyncio.get_event_loop()
+    tmp_path = None
     try:
         reader = await request.multipart()
         async for field in reader:
-            if field.name == "file":
-                db_bytes = await field.read()
+            if field.name != "file":
+                if form is not None and field.name:
+                    form[field.name] = (await field.read_chunk(_NEXUS_FORM_FIELD_MAX)).decode("utf-8", "replace")
+                continue
+            if tmp_path:
+                continue
+            tmp = await loop.run_in_executor(
+                None, lambda: tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+            )
+            tmp_path = tmp.name
+            received = 0
+            try:
+                while True:
+                    chunk = await field.read_chunk(_NEXUS_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+                    if received > _NEXUS_MAX_BYTES:
+                        await loop.run_in_executor(None, tmp.close)
+                        _unlink_quiet(tmp_path)
+                        return None, web.json_response(
+                            {"ok": False, "error": "Fichier trop volumineux (max 200 Mo)"}, status=413,
+                        )
+                    await loop.run_in_executor(None, tmp.write, chunk)
+            finally:
+                await loop.run_in_executor(None, tmp.close)
+            if not received:
+                _unlink_quiet(tmp_path)
+                tmp_path = None
+            if form is None:
                 break
     except Exception as error:
-        return with_cors(request, web.json_response({"ok": False, "error": f"Lecture du fichier échouée : {error}"}, status=400))
-    if not db_bytes:
-        return with_cors(request, web.json_response({"ok": False, "error": "Champ 'file' manquant dans la requête"}, status=400))
+        _unlink_quiet(tmp_path)
+        return None, web.json_response({"ok": False, "error": f"Lecture du fichier échouée : {error}"}, status=400)
+    if not tmp_path:
+        return None, web.json_response({"ok": False, "error": "Champ 'file' manquant dans la requête"}, status=400)
+    return tmp_path, None
 
-    max_size = 200 * 1024 * 1024
-    if len(db_bytes) > max_size:
-        return with_cors(request, web.json_response({"ok": False, "error": "Fichier trop volumineux (max 200 Mo)"}, status=413))
 
-    tmp_path = None
+async def nexus_parse_db(request):
+    is_valid, _, _, _ = await _auth_request(request, "/api/collection/nexus-parse-db")
+    if not is_valid:
+        return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+
+    tmp_path, error_response = await _receive_nexus_upload(request)
+    if error_response is not None:
+        return with_cors(request, error_response)
+
     try:
-        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-            tmp.write(db_bytes)
-            tmp_path = tmp.name
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, parse_nexus_db, tmp_path)
         logger.info("[api] nexus-parse-db : %d entrée(s) parsée(s) (%d F95, %d LC)", result["stats"]["total"], result["stats"]["with_f95"], result["stats"]["with_lc"])
@@ -283,12 +319,7 @@ async def nexus_parse_db(request):
         logger.exception("[api] nexus-parse-db erreur : %s", error)
         return with_cors(request, web.json_response({"ok": False, "error": str(error)}, status=500))
     finally:
-        if tmp_path:
-            try:
-                import os
-                os.unlink(tmp_path)
-            except Exception:
-                pass
+        _unlink_quiet(tmp_path)
 
 
 async def collection_f95_traducteurs(request):
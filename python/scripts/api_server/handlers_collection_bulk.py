@@ -9,14 +9,81 @@ from aiohttp import web
 
 from api_key_auth import _auth_request
 from f95_public_api_client import find_public_game_by_thread_id, public_game_to_scraped_data
+from nexus_export import parse_nexus_db
 from scraper import scrape_f95_game_data
 from supabase_client import _get_supabase
 
+from .handlers_collection import _receive_nexus_upload, _unlink_quiet
 from .middleware import with_cors
 
 logger = logging.getLogger("api")
 
 
+def _parse_import_entry(entry: dict) -> dict | str:
+    """
+    Normalise une entrée d'import (format parse_nexus_db) en champs user_collection.
+    Retourne un dict, ou le message d'erreur (str) si l'entrée est inexploitable.
+    """
+    f95_id = entry.get("f95_thread_id")
+    lc_id = entry.get("lewdcorner_thread_id")
+    f95_url = (entry.get("f95_url") or "").strip() or None
+    title = (entry.get("title") or "").strip() or None
+    game_version = (entry.get("game_version") or "").strip() or None
+    game_statut = (entry.get("game_statut") or "").strip() or None
+    game_engine = (entry.get("game_engine") or "").strip() or None
+    game_developer = (entry.get("game_developer") or "").strip() or None
+    couverture_url = (entry.get("couverture_url") or "").strip() or None
+    tags_list = entry.get("tags") or []
+    game_site = (entry.get("game_site") or "").strip() or None
+
+    has_scraped = any([game_version, game_statut, game_engine, couverture_url, tags_list])
+    scraped_data = None
+    if has_scraped:
+        scraped_data = {
+            "name": title,
+            "version": game_version,
+            "status": game_statut,
+            "type": game_engine,
+            "developer": game_developer,
+            "image": couverture_url,
+            "tags": tags_list,
+            "source": game_site,
+        }
+
+    exe_paths = []
+    for p in entry.get("executable_paths") or []:
+        if isinstance(p, str) and p.strip():
+            exe_paths.append({"path": p.strip()})
+        elif isinstance(p, dict) and p.get("path"):
+            exe_paths.append({"path": p["path"].strip()})
+
+    if not f95_id and not lc_id and not f95_url:
+        return "Entrée ignorée (aucun identifiant F95/Lewdcorner)"
+
+    effective_thread_id = int(f95_id) if f95_id else (int(lc_id) if lc_id else None)
+    if effective_thread_id is None:
+        return "Entrée ignorée (impossible de résoudre un thread_id)"
+
+    if not f95_url:
+        if f95_id:
+            f95_url = f"https://f95zone.to/threads/thread.{f95_id}/"
+        elif entry.get("lewdcorner_url"):
+            f95_url = entry["lewdcorner_url"]
+
+    return {
+        "thread_id": effective_thread_id,
+        "is_f95": bool(f95_id),
+        "f95_url": f95_url,
+        "title": title,
+        "notes": (entry.get("notes") or "").strip() or None,
+        "labels": entry.get("labels") or [],
+        "executable_paths": exe_paths,
+        "scraped_data": scraped_data,
+        "game_version": game_version,
+        "display_name": title or (f"ID {f95_id}" if f95_id else f"Lewdcorner #{lc_id}"),
+    }
+
+
 async def collection_import_batch(request):
     is_valid, _, _, _ = await _auth_request(request, "/api/collection/import-batch")
     if not is_valid:
@@ -100,62 +167,22 @@ async def collection_import_batch(request):
             if not await send({"progress": {"current": idx, "total": total}}):
                 break
 
-            f95_id = entry.get("f95_thread_id")
-            lc_id = entry.get("lewdcorner_thread_id")
-            f95_url = (entry.get("f95_url") or "").strip() or None
-            title = (entry.get("title") or "").strip() or None
-            notes = (entry.get("notes") or "").strip() or None
-            labels = entry.get("labels") or []
-            raw_paths = entry.get("executable_paths") or []
-            game_version = (entry.get("game_version") or "").strip() or None
-            game_statut = (entry.get("game_statut") or "").strip() or None
-            game_engine = (entry.get("game_engine") or "").strip() or None
-            game_developer = (entry.get("game_developer") or "").strip() or None
-            couverture_url = (entry.get("couverture_url") or "").strip() or None
-            tags_list = entry.get("tags") or []
-            game_site = (entry.get("game_site") or "").strip() or None
-
-            has_scraped = any([game_version, game_statut, game_engine, couverture_url, tags_list])
-            scraped_data = None
-            if has_scraped:
-                scraped_data = {
-                    "name": title,
-                    "version": game_version,
-                    "status": game_statut,
-                    "type": game_engine,
-                    "developer": game_developer,
-                    "image": couverture_url,
-                    "tags": tags_list,
-                    "source": game_site,
-                }
-
-            exe_paths = []
-            for p in raw_paths:
-                if isinstance(p, str) and p.strip():
-                    exe_paths.append({"path": p.strip()})
-                elif isinstance(p, dict) and p.get("path"):
-                    exe_paths.append({"path": p["path"].strip()})
-
-            if not f95_id and not lc_id and not f95_url:
-                if not await send({"log": f"⚠️  [{idx}/{total}] Entrée ignorée (aucun identifiant F95/Lewdcorner)"}):
+            parsed = _parse_import_entry(entry)
+            if isinstance(parsed, str):
+                if not await send({"log": f"⚠️  [{idx}/{total}] {parsed}"}):
                     break
                 error_count += 1
                 continue
 
-            effective_thread_id = int(f95_id) if f95_id else (int(lc_id) if lc_id else None)
-            if effective_thread_id is None:
-                if not await send({"log": f"⚠️  [{idx}/{total}] Entrée ignorée (impossible de résoudre un thread_id)"}):
-                    break
-                error_count += 1
-                continue
-
-            if not f95_url:
-                if f95_id:
-                    f95_url = f"https://f95zone.to/threads/thread.{f95_id}/"
-                elif entry.get("lewdcorner_url"):
-                    f95_url = entry["lewdcorner_url"]
-
-            display_name = title or (f"ID {f95_id}" if f95_id else f"Lewdcorner #{lc_id}")
+            effective_thread_id = parsed["thread_id"]
+            f95_url = parsed["f95_url"]
+            title = parsed["title"]
+            notes = parsed["notes"]
+            labels = parsed["labels"]
+            exe_paths = parsed["executable_paths"]
+            scraped_data = parsed["scraped_data"]
+            game_version = parsed["game_version"]
+            display_name = parsed["display_name"]
 
             if effective_thread_id in existing_ids:
                 existing_row = existing_map.get(effective_thread_id, {})
@@ -263,6 +290,248 @@ async def collection_import_batch(request):
     return response
 
 
+_NEXUS_IMPORT_BATCH = 200
+_CATALOGUE_CHUNK = 300
+_CATALOGUE_COLUMNS = "site_id, nom_du_jeu, version, statut, type, nom_url, image, tags, synopsis_fr, synopsis_en"
+
+
+def _form_flag(form: dict, key: str, default: bool) -> bool:
+    raw = (form.get(key) or "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
+def _fetch_collection_map_sync(sb, owner_id: str) -> dict[int, dict]:
+    """{f95_thread_id: ligne} de la collection d'un utilisateur (paginé)."""
+    existing: dict[int, dict] = {}
+    offset = 0
+    while True:
+        page = (
+            sb.table("user_collection")
+            .select("f95_thread_id, id")
+            .eq("owner_id", owner_id)
+            .range(offset, offset + 999)
+            .execute()
+            .data or []
+        )
+        for row in page:
+            if row.get("f95_thread_id") is not None:
+                existing[int(row["f95_thread_id"])] = row
+        if len(page) < 1000:
+            return existing
+        offset += 1000
+
+
+def _fetch_catalogue_sync(sb, site_ids: list[int]) -> dict[int, dict]:
+    """{site_id: ligne f95_jeux} pour les IDs F95 de l'import (requêtes .in_ par paquets)."""
+    catalogue: dict[int, dict] = {}
+    for i in range(0, len(site_ids), _CATALOGUE_CHUNK):
+        res = sb.table("f95_jeux").select(_CATALOGUE_COLUMNS).in_("site_id", site_ids[i:i + _CATALOGUE_CHUNK]).execute()
+        for row in res.data or []:
+            sid = row.get("site_id")
+            if sid is not None and int(sid) not in catalogue:
+                catalogue[int(sid)] = row
+    return catalogue
+
+
+def _merge_catalogue(parsed: dict, jeu: dict) -> None:
+    """Complète les données Nexus avec le catalogue f95_jeux (Nexus prioritaire)."""
+    parsed["title"] = parsed["title"] or (jeu.get("nom_du_jeu") or "").strip() or None
+    parsed["f95_url"] = parsed["f95_url"] or (jeu.get("nom_url") or "").strip() or None
+    nexus = parsed["scraped_data"] or {}
+    parsed["scraped_data"] = {
+        "name": nexus.get("name") or parsed["title"],
+        "version": nexus.get("version") or jeu.get("version"),
+        "status": nexus.get("status") or jeu.get("statut"),
+        "type": nexus.get("type") or jeu.get("type"),
+        "developer": nexus.get("developer"),
+        "image": nexus.get("image") or jeu.get("image"),
+        "tags": nexus.get("tags") or jeu.get("tags"),
+        "synopsis": nexus.get("synopsis") or jeu.get("synopsis_en"),
+        "synopsis_fr": jeu.get("synopsis_fr"),
+        "source": nexus.get("source") or "f95_jeux",
+    }
+
+
+def _write_collection_rows_sync(sb, rows: list[dict]) -> tuple[int, list[str]]:
+    """
+    Upsert (owner_id, f95_thread_id) en un appel par groupe de colonnes identiques
+    (une colonne absente n'est pas écrasée). Repli ligne par ligne si le lot échoue.
+    Retourne (écrites, erreurs).
+    """
+    groups: dict[tuple, list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    written, errors = 0, []
+    for group in groups.values():
+        try:
+            sb.table("user_collection").upsert(group, on_conflict="owner_id,f95_thread_id").execute()
+            written += len(group)
+        except Exception as batch_err:
+            logger.warning("[api] nexus-import : lot en échec (%s), repli ligne par ligne", batch_err)
+            for row in group:
+                try:
+                    sb.table("user_collection").upsert(row, on_conflict="owner_id,f95_thread_id").execute()
+                    written += 1
+                except Exception as row_err:
+                    errors.append(f"{row.get('title') or row.get('f95_thread_id')} — {row_err}")
+    return written, errors
+
+
+async def collection_nexus_import(request):
+    """
+    Import Nexus en une seule requête : upload multipart (file + owner_id + options),
+    parsing SQLite, rapprochement avec le catalogue f95_jeux puis écriture de la collection
+    par lots. Progression et résumé en NDJSON (même format qu'import-batch).
+    """
+    is_valid, _, _, _ = await _auth_request(request, "/api/collection/nexus-import")
+    if not is_valid:
+        return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+
+    sb = _get_supabase()
+    if not sb:
+        return with_cors(request, web.json_response({"ok": False, "error": "Supabase non configuré"}, status=500))
+
+    form: dict = {}
+    tmp_path, error_response = await _receive_nexus_upload(request, form)
+    if error_response is not None:
+        return with_cors(request, error_response)
+
+    owner_id = (form.get("owner_id") or "").strip()
+    if not owner_id:
+        _unlink_quiet(tmp_path)
+        return with_cors(request, web.json_response({"ok": False, "error": "owner_id requis"}, status=400))
+
+    skip_existing = _form_flag(form, "skip_existing", True)
+    overwrite_all = _form_flag(form, "overwrite_all", False)
+    overwrite_labels = overwrite_all or _form_flag(form, "overwrite_labels", False)
+    overwrite_paths = overwrite_all or _form_flag(form, "overwrite_paths", False)
+
+    response = web.StreamResponse()
+    response.headers["Content-Type"] = "application/x-ndjson"
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    origin = request.headers.get("Origin", "")
+    if origin:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+    await response.prepare(request)
+
+    client_disconnected = [False]
+
+    async def send(data: dict) -> bool:
+        try:
+            await response.write((json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8"))
+            await response.drain()
+            return True
+        except Exception as e:
+            err_lower = str(e).lower()
+            if any(k in err_lower for k in ("closing transport", "connection reset", "broken pipe")):
+                client_disconnected[0] = True
+            return False
+
+    loop = asyncio.get_event_loop()
+    try:
+        await send({"log": "📂 Lecture de la base Nexus…"})
+        try:
+            parsed_db = await loop.run_in_executor(None, parse_nexus_db, tmp_path)
+        except ValueError as e:
+            await send({"error": str(e), "status": "error"})
+            return response
+        finally:
+            _unlink_quiet(tmp_path)
+        entries = parsed_db["entries"]
+        for warning in parsed_db["warnings"]:
+            await send({"log": f"⚠️  {warning}"})
+        total = len(entries)
+        await send({"log": f"📥 {total} entrée(s) à traiter…", "stats": parsed_db["stats"], "progress": {"current": 0, "total": total}})
+
+        existing_map = await loop.run_in_executor(None, _fetch_collection_map_sync, sb, owner_id)
+        await send({"log": f"ℹ️ {len(existing_map)} jeu(x) déjà en collection"})
+
+        prepared: list[dict] = []
+        error_count = 0
+        for entry in entries:
+            parsed = _parse_import_entry(entry)
+            if isinstance(parsed, str):
+                error_count += 1
+            else:
+                prepared.append(parsed)
+
+        f95_ids = list({p["thread_id"] for p in prepared if p["is_f95"]})
+        catalogue = await loop.run_in_executor(None, _fetch_catalogue_sync, sb, f95_ids)
+        for p in prepared:
+            jeu = catalogue.get(p["thread_id"]) if p["is_f95"] else None
+            if jeu:
+                _merge_catalogue(p, jeu)
+        await send({"log": f"🔗 {len(catalogue)} jeu(x) rapproché(s) du catalogue f95_jeux"})
+
+        now = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
+        rows: list[dict] = []
+        skipped_count = 0
+        for p in prepared:
+            key = {"owner_id": owner_id, "f95_thread_id": p["thread_id"]}
+            if p["thread_id"] in existing_map:
+                if overwrite_all:
+                    row = {**key, "title": p["title"], "f95_url": p["f95_url"], "notes": p["notes"], "updated_at": now}
+                else:
+                    row = {**key, "updated_at": now}
+                if overwrite_labels and p["labels"]:
+                    row["labels"] = p["labels"]
+                if overwrite_paths and p["executable_paths"]:
+                    row["executable_paths"] = p["executable_paths"]
+                if overwrite_all and p["scraped_data"]:
+                    row["scraped_data"] = p["scraped_data"]
+                if len(row) <= 3 or (skip_existing and not (overwrite_labels or overwrite_paths)):
+                    skipped_count += 1
+                    continue
+            else:
+                row = {**key, "f95_url": p["f95_url"], "title": p["title"], "notes": p["notes"], "updated_at": now}
+                if p["labels"]:
+                    row["labels"] = p["labels"]
+                if p["executable_paths"]:
+                    row["executable_paths"] = p["executable_paths"]
+                if p["scraped_data"]:
+                    row["scraped_data"] = p["scraped_data"]
+                existing_map[p["thread_id"]] = {"id": None}
+            rows.append(row)
+
+        imported_count = 0
+        batches = (len(rows) + _NEXUS_IMPORT_BATCH - 1) // _NEXUS_IMPORT_BATCH
+        for b in range(batches):
+            if client_disconnected[0]:
+                break
+            chunk = rows[b * _NEXUS_IMPORT_BATCH:(b + 1) * _NEXUS_IMPORT_BATCH]
+            written, errors = await loop.run_in_executor(None, _write_collection_rows_sync, sb, chunk)
+            imported_count += written
+            error_count += len(errors)
+            for err in errors[:5]:
+                await send({"log": f"❌ {err}"})
+            done = skipped_count + min(len(rows), (b + 1) * _NEXUS_IMPORT_BATCH)
+            if not await send({
+                "log": f"💾 Lot {b + 1}/{batches} : {written} ligne(s) écrite(s)",
+                "progress": {"current": done, "total": total},
+            }):
+                break
+
+        if not client_disconnected[0]:
+            await send({
+                "log": f"🎉 Import terminé : {imported_count} importé(s), {skipped_count} ignoré(s), {error_count} erreur(s)",
+                "status": "completed",
+                "imported": imported_count,
+                "skipped": skipped_count,
+                "errors": error_count,
+                "matched_catalogue": len(catalogue),
+            })
+    except Exception as e:
+        logger.error("[api] nexus-import erreur globale : %s", e, exc_info=True)
+        await send({"error": str(e), "status": "error"})
+    finally:
+        await response.write_eof()
+    return response
+
+
 async def collection_f95_import(request):
     is_valid, _, _, _ = await _auth_request(request, "/api/collection/f95-import")
     if not is_valid:
@@ -10,7 +10,13 @@ from aiohttp import web
 from api_key_auth import _auth_request
 from f95_public_api_client import build_api_date_map, fetch_public_games_index
 from scraper import enrich_dates_with_fallback
-from supabase_client import _get_supabase
+from f95_rss_feed import merge_date_maps
+from supabase_client import (
+    _compute_scrape_priorities_sync,
+    _fetch_rss_ledger_dates_sync,
+    _get_supabase,
+    _update_date_maj_bulk_sync,
+)
 from translator import translate_text
 
 from .middleware import with_cors
@@ -198,15 +204,31 @@ async def scrape_thread_dates(request):
             except Exception as api_err:
                 await send({"log": f"⚠️ API publique indisponible ({api_err})"})
 
+            # Registre RSS : dates déjà relevées dans le flux, inconnues du client
+            loop = asyncio.get_event_loop()
+            site_ids = [int(j["site_id"]) for j in jeux if str(j.get("site_id") or "").isdigit()]
+            ledger_dates = await loop.run_in_executor(None, _fetch_rss_ledger_dates_sync, site_ids)
+            ledger_only = {
+                sid: d for sid, d in ledger_dates.items()
+                if sid not in rss_date_map and sid not in api_dates
+            }
+            if ledger_only:
+                await send({"log": f"📒 Registre RSS : {len(ledger_only)} date(s) sans scraping"})
+            # Scraping dans l'ordre de priorité (jeux en collection et dates les plus périmées d'abord)
+            priority = await loop.run_in_executor(None, _compute_scrape_priorities_sync, jeux)
+
             await enrich_dates_with_fallback(
                 session,
                 jeux=jeux,
-                rss_date_map=rss_date_map,
+                rss_date_map=merge_date_maps(ledger_dates, rss_date_map),
                 api_date_map=api_dates,
                 cookies=f95_cookies,
                 scrape_delay=scrape_delay,
                 progress_callback=on_progress,
+                priority=priority,
             )
+            if ledger_only:
+                updated_count += await loop.run_in_executor(None, _update_date_maj_bulk_sync, ledger_only)
         if not client_disconnected[0]:
             await send({"log": f"🎉 Terminé : {updated_count} date(s) mise(s) à jour dans f95_jeux", "status": "completed", "updated": updated_count})
     except Exception as e:
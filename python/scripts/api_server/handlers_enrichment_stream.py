@@ -2,25 +2,75 @@ import asyncio
 import datetime
 import json
 import logging
+import time
 from zoneinfo import ZoneInfo
 
 import aiohttp
 from aiohttp import web
 
 from api_key_auth import _auth_request
+from f95_rss_feed import get_rss_feed, merge_date_maps
 from f95_public_api_client import (
     build_api_date_map,
     extract_game_synopsis,
     fetch_public_games_index,
 )
 from scraper import _PLACEHOLDER_DATE, scrape_f95_synopsis, scrape_thread_updated_date
-from supabase_client import _get_supabase, _norm_nom_url
-from translator import translate_text
+from supabase_client import (
+    _fetch_rss_ledger_dates_sync,
+    _get_supabase,
+    _norm_nom_url,
+    _refresh_jeux_canonical_sync,
+    _update_jeux_synopsis_bulk_sync,
+)
+from translator import translate_synopsis_batch
 
 from .middleware import with_cors
 
 logger = logging.getLogger("api")
 
+# Pipeline scrape_enrich : taille des files entre étages, workers par étage, taille des lots d'écriture
+_PIPELINE_QUEUE_SIZE = 32
+_PIPELINE_RESOLVE_WORKERS = 4
+_PIPELINE_SCRAPE_WORKERS = 2      # force_scrape : requêtes F95Zone, rester poli
+_PIPELINE_WRITE_BATCH = 25
+_PIPELINE_TRANSLATE_BATCH = 20    # synopsis courts regroupés par requête Google (translate_synopsis_batch)
+_PIPELINE_STATS_EVERY = 50
+
+
+class _StageStats:
+    """Compteurs d'un étage du pipeline (éléments traités, temps actif cumulé)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        self.processed += count
+        self.busy_seconds += seconds
+
+    def as_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            "processed": self.processed,
+            "per_second": round(self.processed / elapsed, 2),
+            "busy_seconds": round(self.busy_seconds, 1),
+        }
+
+
+def _stage_stats_payload(stats: dict[str, _StageStats]) -> dict:
+    return {name: st.as_dict() for name, st in stats.items()}
+
+
+def _format_stage_stats(stats: dict[str, _StageStats]) -> str:
+    parts = [
+        f"{name} {d['processed']} ({d['per_second']}/s)"
+        for name, d in _stage_stats_payload(stats).items()
+    ]
+    return "⏱️ Débit : " + " · ".join(parts)
+
 
 async def scrape_enrich(request):
     is_valid, discord_user_id, discord_name, _ = await _auth_request(request, "/api/scrape/enrich")
@@ -166,7 +216,23 @@ async def scrape_enrich(request):
 
         enriched = 0
         failed: list[dict] = []
-        now_iso = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
+        done = 0
+        send_lock = asyncio.Lock()
+        stats = {name: _StageStats(name) for name in ("résolution", "traduction", "écriture")}
+
+        async def emit(data: dict) -> bool:
+            # Plusieurs workers écrivent sur le même flux : une ligne NDJSON à la fois
+            async with send_lock:
+                return await send_json(data)
+
+        async def finish(idx: int, log: str, failure: dict | None = None) -> None:
+            nonlocal done
+            done += 1
+            if failure:
+                failed.append(failure)
+            await emit({"progress": {"current": done, "total": total}, "log": log})
+            if done % _PIPELINE_STATS_EVERY == 0:
+                await emit({"log": _format_stage_stats(stats), "stages": _stage_stats_payload(stats)})
 
         async with aiohttp.ClientSession() as session:
             await send_json({"log": "🌐 Chargement du catalogue API publique F95 France…"})
@@ -177,88 +243,188 @@ async def scrape_enrich(request):
                 api_index = {}
                 await send_json({"log": f"⚠️ API publique indisponible ({api_err}) — fallback local/scraping limité"})
 
-            for idx, (norm_url, rows) in enumerate(to_enrich, 1):
-                if client_disconnected[0]:
-                    break
-                if not await send_json({"progress": {"current": idx, "total": total}}):
-                    break
+            # Pipeline : résolution (API / catalogue / scraping) → traduction → écriture groupée.
+            # Files bornées : un étage lent freine les précédents sans tout charger en mémoire.
+            resolve_q: asyncio.Queue = asyncio.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+            translate_q: asyncio.Queue = asyncio.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+            write_q: asyncio.Queue = asyncio.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
 
-                source_url = (rows[0].get("nom_url") or "").strip()
-                game_label = rows[0].get("nom_du_jeu") or source_url or norm_url
-                site_id_raw = rows[0].get("site_id")
-                try:
-                    site_id = int(site_id_raw) if site_id_raw is not None else None
-                except (TypeError, ValueError):
-                    site_id = None
-
-                try:
-                    api_game = api_index.get(site_id) if site_id is not None else None
-                    api_synopsis_en, api_synopsis_fr = extract_game_synopsis(api_game or {})
-
-                    existing_synopsis_en = next(
-                        (_to_clean_text(r.get("synopsis_en")) for r in rows if _to_clean_text(r.get("synopsis_en"))),
-                        "",
-                    )
-                    existing_synopsis_fr = next(
-                        (_to_clean_text(r.get("synopsis_fr")) for r in rows if _to_clean_text(r.get("synopsis_fr"))),
-                        "",
-                    )
-
-                    synopsis_en = api_synopsis_en or existing_synopsis_en
-                    synopsis_fr = api_synopsis_fr or (existing_synopsis_fr if not force else "")
-
-                    if not synopsis_en and force_scrape and source_url and "f95zone.to" in source_url.lower():
-                        scraped = await scrape_f95_synopsis(session, source_url, cookies=f95_cookies)
-                        synopsis_en = _to_clean_text(scraped[0] if isinstance(scraped, tuple) else scraped)
+            async def resolve_worker() -> None:
+                while (job := await resolve_q.get()) is not None:
+                    if client_disconnected[0]:
+                        continue
+                    idx, norm_url, rows = job
+                    source_url = (rows[0].get("nom_url") or "").strip()
+                    game_label = rows[0].get("nom_du_jeu") or source_url or norm_url
+                    item = {"idx": idx, "rows": rows, "norm_url": norm_url,
+                            "source_url": source_url, "label": game_label}
+                    started = time.monotonic()
+                    try:
+                        site_id_raw = rows[0].get("site_id")
+                        try:
+                            site_id = int(site_id_raw) if site_id_raw is not None else None
+                        except (TypeError, ValueError):
+                            site_id = None
+                        api_game = api_index.get(site_id) if site_id is not None else None
+                        api_synopsis_en, api_synopsis_fr = extract_game_synopsis(api_game or {})
+
+                        existing_synopsis_en = next(
+                            (_to_clean_text(r.get("synopsis_en")) for r in rows if _to_clean_text(r.get("synopsis_en"))),
+                            "",
+                        )
+                        existing_synopsis_fr = next(
+                            (_to_clean_text(r.get("synopsis_fr")) for r in rows if _to_clean_text(r.get("synopsis_fr"))),
+                            "",
+                        )
+
+                        synopsis_en = api_synopsis_en or existing_synopsis_en
+                        synopsis_fr = api_synopsis_fr or (existing_synopsis_fr if not force else "")
+
+                        if not synopsis_en and force_scrape and source_url and "f95zone.to" in source_url.lower():
+                            scraped = await scrape_f95_synopsis(session, source_url, cookies=f95_cookies)
+                            synopsis_en = _to_clean_text(scraped[0] if isinstance(scraped, tuple) else scraped)
+                    except Exception as e:
+                        logger.warning("[api] scrape_enrich group=%s : %s", norm_url, e)
+                        await finish(idx, f"❌ [{idx}/{total}] {game_label} — erreur: {e}",
+                                     {"nom_url": source_url or norm_url, "reason": str(e)})
+                        continue
+                    finally:
+                        stats["résolution"].record(time.monotonic() - started)
 
                     if not synopsis_en:
-                        failed.append({"nom_url": source_url, "reason": "synopsis_absent_api_et_catalogue"})
-                        await send_json({
-                            "log": (
-                                f"⏭️ [{idx}/{total}] {game_label} — synopsis EN absent "
-                                f"(sync catalogue ou API publique requise)"
-                            ),
-                        })
+                        await finish(
+                            idx,
+                            f"⏭️ [{idx}/{total}] {game_label} — synopsis EN absent "
+                            f"(sync catalogue ou API publique requise)",
+                            {"nom_url": source_url, "reason": "synopsis_absent_api_et_catalogue"},
+                        )
                         continue
-
-                    source_fr = "api" if api_synopsis_fr else "catalogue"
-                    if not synopsis_fr:
-                        if not force_scrape:
-                            synopsis_fr = await translate_text(session, synopsis_en, "en", "fr")
-                            source_fr = "traduction_auto"
-                            if not synopsis_fr:
-                                failed.append({"nom_url": source_url, "reason": "traduction_echouee"})
-                                await send_json({"log": f"❌ [{idx}/{total}] {game_label} — traduction échouée"})
-                                continue
-
-                    if not synopsis_fr:
-                        failed.append({"nom_url": source_url, "reason": "synopsis_fr_absent"})
-                        await send_json({"log": f"⏭️ [{idx}/{total}] {game_label} — synopsis FR indisponible"})
+                    item.update(
+                        synopsis_en=synopsis_en,
+                        synopsis_fr=synopsis_fr,
+                        source_fr="api" if api_synopsis_fr else "catalogue",
+                    )
+                    await translate_q.put(item)
+
+            async def translate_worker() -> None:
+                # Un seul worker : il vide la file par lots, translate_synopsis_batch borne la concurrence
+                closing = False
+                while not closing:
+                    item = await translate_q.get()
+                    if item is None:
+                        break
+                    batch = [item]
+                    while len(batch) < _PIPELINE_TRANSLATE_BATCH:
+                        try:
+                            nxt = translate_q.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
+                        if nxt is None:
+                            closing = True
+                            break
+                        batch.append(nxt)
+                    if client_disconnected[0]:
                         continue
-
-                    for row in rows:
-                        row_id = row.get("id")
-                        if row_id is None:
+                    pending = [it for it in batch if not it["synopsis_fr"] and not force_scrape]
+                    if pending:
+                        started = time.monotonic()
+                        try:
+                            translated = await translate_synopsis_batch(
+                                session,
+                                [{"game_id": it["idx"], "synopsis_en": it["synopsis_en"]} for it in pending],
+                            )
+                        except Exception as e:
+                            logger.warning("[api] scrape_enrich traduction lot : %s", e)
+                            translated = [{"synopsis_fr": None}] * len(pending)
+                        finally:
+                            stats["traduction"].record(time.monotonic() - started, count=len(pending))
+                        for it, res in zip(pending, translated):
+                            it["synopsis_fr"] = res.get("synopsis_fr")
+                            it["source_fr"] = "traduction_auto"
+                    for it in batch:
+                        idx, game_label = it["idx"], it["label"]
+                        if not it["synopsis_fr"] and it["source_fr"] == "traduction_auto":
+                            await finish(idx, f"❌ [{idx}/{total}] {game_label} — traduction échouée",
+                                         {"nom_url": it["source_url"], "reason": "traduction_echouee"})
+                            continue
+                        if not it["synopsis_fr"]:
+                            await finish(idx, f"⏭️ [{idx}/{total}] {game_label} — synopsis FR indisponible",
+                                         {"nom_url": it["source_url"], "reason": "synopsis_fr_absent"})
                             continue
-                        sb.table("f95_jeux").update({
-                            "synopsis_en": synopsis_en,
-                            "synopsis_fr": synopsis_fr,
-                            "updated_at": now_iso,
-                        }).eq("id", row_id).execute()
-
-                    enriched += 1
-                    fr_label = {
-                        "api": "FR depuis API publique",
-                        "catalogue": "FR conservé du catalogue",
-                        "traduction_auto": "FR traduit automatiquement (secours)",
-                    }.get(source_fr, "FR mis à jour")
-                    await send_json({
-                        "log": f"✅ [{idx}/{total}] {game_label} — {fr_label} ({len(rows)} ligne(s))",
-                    })
-                except Exception as e:
-                    logger.warning("[api] scrape_enrich group=%s : %s", norm_url, e)
-                    failed.append({"nom_url": source_url or norm_url, "reason": str(e)})
-                    await send_json({"log": f"❌ [{idx}/{total}] {game_label} — erreur: {e}"})
+                        await write_q.put(it)
+
+            async def write_worker() -> None:
+                nonlocal enriched
+                loop = asyncio.get_event_loop()
+                closing = False
+                while not closing:
+                    item = await write_q.get()
+                    if item is None:
+                        break
+                    batch = [item]
+                    # Regroupe ce qui attend déjà dans la file (écriture par lots hors boucle asyncio)
+                    while len(batch) < _PIPELINE_WRITE_BATCH:
+                        try:
+                            nxt = write_q.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
+                        if nxt is None:
+                            closing = True
+                            break
+                        batch.append(nxt)
+                    if client_disconnected[0]:
+                        continue
+                    started = time.monotonic()
+                    try:
+                        results = await loop.run_in_executor(None, _update_jeux_synopsis_bulk_sync, [
+                            {
+                                "ids": [r.get("id") for r in it["rows"]],
+                                "synopsis_en": it["synopsis_en"],
+                                "synopsis_fr": it["synopsis_fr"],
+                            }
+                            for it in batch
+                        ])
+                    except Exception as e:
+                        logger.warning("[api] scrape_enrich écriture lot : %s", e)
+                        results = [False] * len(batch)
+                    stats["écriture"].record(time.monotonic() - started, count=len(batch))
+                    for it, ok in zip(batch, results):
+                        idx, game_label = it["idx"], it["label"]
+                        if not ok:
+                            await finish(idx, f"❌ [{idx}/{total}] {game_label} — erreur: écriture Supabase",
+                                         {"nom_url": it["source_url"] or it["norm_url"], "reason": "ecriture_supabase"})
+                            continue
+                        enriched += 1
+                        fr_label = {
+                            "api": "FR depuis API publique",
+                            "catalogue": "FR conservé du catalogue",
+                            "traduction_auto": "FR traduit automatiquement (secours)",
+                        }.get(it["source_fr"], "FR mis à jour")
+                        await finish(idx, f"✅ [{idx}/{total}] {game_label} — {fr_label} ({len(it['rows'])} ligne(s))")
+
+            resolvers = [
+                asyncio.create_task(resolve_worker())
+                for _ in range(_PIPELINE_SCRAPE_WORKERS if force_scrape else _PIPELINE_RESOLVE_WORKERS)
+            ]
+            translators = [asyncio.create_task(translate_worker())]
+            writer = asyncio.create_task(write_worker())
+            try:
+                for idx, (norm_url, rows) in enumerate(to_enrich, 1):
+                    if client_disconnected[0]:
+                        break
+                    await resolve_q.put((idx, norm_url, rows))
+                for _ in resolvers:
+                    await resolve_q.put(None)
+                await asyncio.gather(*resolvers)
+                for _ in translators:
+                    await translate_q.put(None)
+                await asyncio.gather(*translators)
+                await write_q.put(None)
+                await writer
+            finally:
+                for task in (*resolvers, *translators, writer):
+                    if not task.done():
+                        task.cancel()
 
         if not client_disconnected[0]:
             await send_json({
@@ -267,6 +433,7 @@ async def scrape_enrich(request):
                 "enriched": enriched,
                 "failed_entries": failed,
             })
+            await send_json({"log": _format_stage_stats(stats), "stages": _stage_stats_payload(stats)})
     except Exception as e:
         logger.error("[api] Erreur enrichissement : %s", e, exc_info=True)
         await send_json({"error": str(e), "status": "error"})
@@ -280,10 +447,6 @@ async def scrape_enrich(request):
 
 
 async def scrape_missing_dates(request):
-    import xml.etree.ElementTree as ET
-    import re as _re
-    from email.utils import parsedate_to_datetime
-
     is_valid, _, _, _ = await _auth_request(request, "/api/scrape/missing-dates")
     if not is_valid:
         return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
@@ -395,6 +558,7 @@ async def scrape_missing_dates(request):
         login_blocked = 0
         rss_hits = 0
         api_hits = 0
+        touched_sids: set[int] = set()
         now_iso = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
 
         await send({
@@ -416,35 +580,18 @@ async def scrape_missing_dates(request):
                 await send({"log": f"⚠️ API publique indisponible ({api_err}), fallback RSS/scraping"})
 
             await send({"log": "📡 Chargement du flux RSS F95Zone…"})
-            rss_date_map: dict[int, str] = {}
-            try:
-                rss_url = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
-                async with session.get(rss_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=aiohttp.ClientTimeout(total=15)) as rss_resp:
-                    if rss_resp.status == 200:
-                        xml_text = await rss_resp.text(encoding="utf-8", errors="replace")
-                        root = ET.fromstring(xml_text)
-                        for item in root.iter("item"):
-                            link = ""
-                            raw_item = ET.tostring(item, encoding="unicode")
-                            m_link = _re.search(r"<link>([^<]+)</link>", raw_item)
-                            if m_link:
-                                link = m_link.group(1).strip()
-                            if not link:
-                                continue
-                            m_id = _re.search(r"/threads/(?:[^/]*\.)?(\d+)", link)
-                            if not m_id:
-                                continue
-                            tid = int(m_id.group(1))
-                            pub_raw = (item.findtext("pubDate") or "").strip()
-                            try:
-                                pub_date = parsedate_to_datetime(pub_raw).strftime("%Y-%m-%d") if pub_raw else ""
-                            except Exception:
-                                pub_date = ""
-                            if pub_date:
-                                rss_date_map[tid] = pub_date
-                await send({"log": f"📡 RSS chargé : {len(rss_date_map)} date(s) disponibles"})
-            except Exception as e:
-                await send({"log": f"⚠️ RSS indisponible ({e}), scraping direct pour tous les jeux"})
+            rss_feed = await get_rss_feed(session)
+            if rss_feed:
+                await send({"log": f"📡 RSS chargé : {len(rss_feed.date_map)} date(s) disponibles"})
+            else:
+                await send({"log": "⚠️ RSS indisponible, scraping direct pour les jeux hors API"})
+            # Registre RSS : dates déjà vues dans le flux, consultées avant tout scraping
+            primary_sids = [e["site_ids"][0] for e in all_entries if e["site_ids"]]
+            loop = asyncio.get_event_loop()
+            ledger_dates = await loop.run_in_executor(None, _fetch_rss_ledger_dates_sync, primary_sids)
+            if ledger_dates:
+                await send({"log": f"📒 Registre RSS : {len(ledger_dates)} date(s) connue(s)"})
+            rss_date_map = merge_date_maps(ledger_dates, rss_feed.date_map if rss_feed else {})
 
             for idx, entry in enumerate(all_entries, 1):
                 if client_disconnected[0]:
@@ -487,6 +634,7 @@ async def scrape_missing_dates(request):
                     try:
                         for sid in site_ids:
                             sb.table("f95_jeux").update({"f95_date_maj": stored_date, "updated_at": now_iso}).eq("site_id", sid).execute()
+                            touched_sids.add(sid)
                         if date:
                             updated_count += 1
                         else:
@@ -507,6 +655,10 @@ async def scrape_missing_dates(request):
                 if not api_date and not rss_date and idx < total and not client_disconnected[0]:
                     await asyncio.sleep(scrape_delay)
 
+        # updated_at départage les lignes ex æquo : ligne principale des groupes touchés
+        if touched_sids:
+            await asyncio.get_event_loop().run_in_executor(None, _refresh_jeux_canonical_sync, touched_sids)
+
         if not client_disconnected[0]:
             parts = [f"✅ {updated_count} date(s) (dont 🌐 {api_hits} API, 📡 {rss_hits} RSS)"]
             if placeholder_count:
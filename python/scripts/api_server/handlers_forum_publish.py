@@ -11,12 +11,19 @@ from aiohttp import web
 from announcements import _send_announcement
 from api_key_auth import LEGACY_KEY_WARNING, _auth_request
 from config import config
+from discord_outbox import (
+    get_outbox_job_status,
+    outbox_idempotency_key,
+    register_outbox_handler,
+    submit_discord_mutation,
+)
 from discord_api import (
+    _discord_delete_channel,
     _discord_list_messages,
     _discord_patch_json,
-    _discord_patch_message_with_attachment,
     _discord_post_json,
     _discord_suppress_embeds,
+    rate_limit_route,
 )
 from image_utils import extract_image_urls_from_text
 from forum_manager import (
@@ -24,8 +31,9 @@ from forum_manager import (
     _create_forum_post,
     _delete_old_metadata_messages,
     _ensure_thread_unarchived,
-    _fetch_image_from_url,
+    _fetch_image_with_hash,
     _get_thread_parent_id,
+    _patch_message_image,
     _reroute_post,
     _resolve_applied_tag_ids,
     _strip_image_url_from_content,
@@ -83,6 +91,7 @@ async def forum_post(request):
     translator_label = state_label = game_version = ""
     received_forum_id = translate_version = announce_image_url = ""
     history_payload_raw = None
+    idempotency_field = ""
     silent_update = False
 
     reader = await request.multipart()
@@ -112,6 +121,8 @@ async def forum_post(request):
             received_forum_id = (await part.text()).strip()
         elif n == "history_payload":
             history_payload_raw = (await part.text()).strip()
+        elif n == "idempotency_key":
+            idempotency_field = (await part.text()).strip()
 
     forum_id = int(received_forum_id) if received_forum_id else config.FORUM_MY_ID
     loop = asyncio.get_event_loop()
@@ -127,29 +138,60 @@ async def forum_post(request):
             request,
             web.json_response({"ok": False, "error": perm.get("error", "Acces refuse")}, status=403),
         )
+    payload = {
+        "forum_id": forum_id,
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "metadata_b64": metadata_b64,
+        "translator_label": translator_label,
+        "state_label": state_label,
+        "game_version": game_version,
+        "translate_version": translate_version,
+        "announce_image_url": announce_image_url,
+        "history_payload_raw": history_payload_raw,
+        "silent_update": silent_update,
+    }
+    key = outbox_idempotency_key(request, "forum_post", payload, idempotency_field)
+    outcome = await submit_discord_mutation("forum_post", payload, key)
+    resp_data = dict(outcome["body"])
+    if is_legacy and resp_data.get("ok"):
+        resp_data["legacy_key_warning"] = LEGACY_KEY_WARNING
+    return with_cors(request, web.json_response(resp_data, status=outcome["http_status"]))
+
+
+async def _run_forum_post(job: dict, checkpoint) -> dict:
+    """Execution outbox de /api/forum-post : creation du thread, annonce, historique Supabase."""
+    forum_id = int(job["forum_id"])
+    title, content, tags = job["title"], job["content"], job["tags"]
     async with aiohttp.ClientSession() as session:
-        ok, result = await _create_forum_post(session, forum_id, title, content, tags, [], metadata_b64)
-        if ok and config.PUBLISHER_ANNOUNCE_CHANNEL_ID and not silent_update:
+        ok, result = await _create_forum_post(session, forum_id, title, content, tags, [], job["metadata_b64"])
+        if ok and config.PUBLISHER_ANNOUNCE_CHANNEL_ID and not job["silent_update"]:
             await _send_announcement(
                 session,
                 is_update=False,
                 title=title,
                 thread_url=result.get("thread_url", ""),
-                translator_label=translator_label,
-                state_label=state_label,
-                game_version=game_version,
-                translate_version=translate_version,
-                image_url=announce_image_url or None,
+                translator_label=job["translator_label"],
+                state_label=job["state_label"],
+                game_version=job["game_version"],
+                translate_version=job["translate_version"],
+                image_url=job["announce_image_url"] or None,
                 forum_id=forum_id,
             )
     if not ok:
-        return with_cors(request, web.json_response({"ok": False, "details": result}, status=500))
+        # Echec avant creation du thread : un 429 / 5xx Discord peut etre rejoue sans doublon
+        status = result.get("status") or 0
+        return {
+            "http_status": 500,
+            "body": {"ok": False, "details": result},
+            "retryable": status == 429 or status >= 500,
+        }
 
-    _save_post_to_supabase(result, title, content, tags, forum_id, history_payload_raw)
-    resp_data = {"ok": True, **result}
-    if is_legacy:
-        resp_data["legacy_key_warning"] = LEGACY_KEY_WARNING
-    return with_cors(request, web.json_response(resp_data))
+    await asyncio.get_event_loop().run_in_executor(
+        None, _save_post_to_supabase, result, title, content, tags, forum_id, job["history_payload_raw"],
+    )
+    return {"http_status": 200, "body": {"ok": True, **result}}
 
 
 async def forum_post_update(request):
@@ -163,6 +205,7 @@ async def forum_post_update(request):
     translator_label = state_label = game_version = received_forum_id = ""
     translate_version = announce_image_url = thread_url = ""
     history_payload_raw = None
+    idempotency_field = ""
     silent_update = False
 
     reader = await request.multipart()
@@ -198,6 +241,8 @@ async def forum_post_update(request):
             thread_url = (await part.text()).strip()
         elif n == "history_payload":
             history_payload_raw = (await part.text()).strip()
+        elif n == "idempotency_key":
+            idempotency_field = (await part.text()).strip()
 
     if not thread_id or not message_id:
         return with_cors(request, web.json_response({"ok": False, "error": "threadId and messageId required"}, status=400))
@@ -216,12 +261,83 @@ async def forum_post_update(request):
             request,
             web.json_response({"ok": False, "error": perm.get("error", "Acces refuse")}, status=403),
         )
+    payload = {
+        "target_forum_id": target_forum_id,
+        "received_forum_id": received_forum_id,
+        "thread_id": thread_id,
+        "message_id": message_id,
+        "thread_url": thread_url,
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "metadata_b64": metadata_b64,
+        "translator_label": translator_label,
+        "state_label": state_label,
+        "game_version": game_version,
+        "translate_version": translate_version,
+        "announce_image_url": announce_image_url,
+        "history_payload_raw": history_payload_raw,
+        "silent_update": silent_update,
+    }
+    key = outbox_idempotency_key(request, "forum_post_update", payload, idempotency_field)
+    outcome = await submit_discord_mutation("forum_post_update", payload, key)
+    resp_data = dict(outcome["body"])
+    if is_legacy and resp_data.get("ok"):
+        resp_data["legacy_key_warning"] = LEGACY_KEY_WARNING
+    return with_cors(request, web.json_response(resp_data, status=outcome["http_status"]))
+
+
+async def _run_forum_post_update(job: dict, checkpoint) -> dict:
+    """
+    Execution outbox de /api/forum-post/update : re-routage si le salon a change,
+    sinon edition du message / metadonnees / titre + tags, puis annonce et historique Supabase.
+    Points de reprise (checkpoint) : nouveau thread du re-routage enregistre avant la suppression
+    de l'ancien, annonce marquee envoyee ; un rejeu reprend apres ces etapes sans les refaire.
+    """
+    target_forum_id = job["target_forum_id"]
+    received_forum_id = job["received_forum_id"]
+    thread_id, message_id, thread_url = job["thread_id"], job["message_id"], job["thread_url"]
+    title, content, tags = job["title"], job["content"], job["tags"]
+    metadata_b64 = job["metadata_b64"]
+    translator_label, state_label = job["translator_label"], job["state_label"]
+    game_version, translate_version = job["game_version"], job["translate_version"]
+    announce_image_url = job["announce_image_url"]
+    history_payload_raw = job["history_payload_raw"]
+    silent_update = job["silent_update"]
     reroute_info = None
 
     async with aiohttp.ClientSession() as session:
-        current_parent_id = await _get_thread_parent_id(session, thread_id)
-        needs_reroute = current_parent_id and received_forum_id and current_parent_id != received_forum_id
-        if needs_reroute:
+        if checkpoint.get("rerouted"):
+            # Rejeu : le nouveau thread existe deja ; suppression de l'ancien (404 si deja fait)
+            old_thread_id = thread_id
+            thread_id = checkpoint.get("thread_id")
+            message_id = checkpoint.get("message_id")
+            thread_url = checkpoint.get("thread_url")
+            reroute_info = {"thread_id": thread_id, "message_id": message_id, "thread_url": thread_url}
+            needs_reroute = True
+            await _discord_delete_channel(session, old_thread_id)
+            await asyncio.get_event_loop().run_in_executor(None, _delete_from_supabase_sync, old_thread_id, None)
+        elif checkpoint.get("reroute_started"):
+            # Interrompu pendant la creation du nouveau thread : il existe peut-etre deja
+            return {
+                "http_status": 500,
+                "retryable": False,
+                "body": {"ok": False, "error": "Re-routage interrompu pendant la creation du thread (verifier Discord)"},
+            }
+        else:
+            current_parent_id = await _get_thread_parent_id(session, thread_id)
+            needs_reroute = current_parent_id and received_forum_id and current_parent_id != received_forum_id
+        if needs_reroute and not reroute_info:
+            await checkpoint.save(reroute_started=True)
+
+            async def _on_created(infos: dict) -> None:
+                await checkpoint.save(
+                    rerouted=True,
+                    thread_id=infos["thread_id"],
+                    message_id=infos["message_id"],
+                    thread_url=infos["thread_url"],
+                )
+
             reroute_info = await _reroute_post(
                 session,
                 old_thread_id=thread_id,
@@ -231,6 +347,7 @@ async def forum_post_update(request):
                 content=content,
                 tags_raw=tags,
                 metadata_b64=metadata_b64,
+                on_created=_on_created,
             )
             if reroute_info:
                 old_thread_id = thread_id
@@ -239,33 +356,29 @@ async def forum_post_update(request):
                 thread_url = reroute_info["thread_url"]
                 await asyncio.get_event_loop().run_in_executor(None, _delete_from_supabase_sync, old_thread_id, None)
             else:
+                # Creation refusee : aucun thread cree, l'edition sur place peut etre rejouee
+                await checkpoint.save(reroute_started=False)
                 needs_reroute = False
 
         if not needs_reroute:
             thread_accessible = await _ensure_thread_unarchived(session, thread_id)
             if not thread_accessible:
-                return with_cors(request, web.json_response({"ok": False, "error": "Thread inaccessible ou impossible à désarchiver"}, status=500))
+                return {"http_status": 500, "body": {"ok": False, "error": "Thread inaccessible ou impossible à désarchiver"}}
 
             image_urls_full = extract_image_urls_from_text(content or "")
             final_content = content or " "
-            use_attachment = False
-            file_bytes, filename, content_type = None, "image.png", "image/png"
+            fetched = None
             if image_urls_full:
-                fetched = await _fetch_image_from_url(session, image_urls_full[0])
-                if fetched:
-                    file_bytes, filename, content_type = fetched
-                    final_content = _strip_image_url_from_content(content or " ", image_urls_full[0])
-                    use_attachment = True
-                else:
-                    final_content = _strip_image_url_from_content(content or " ", image_urls_full[0])
+                fetched = await _fetch_image_with_hash(session, image_urls_full[0])
+                final_content = _strip_image_url_from_content(content or " ", image_urls_full[0])
 
             message_path = f"/channels/{thread_id}/messages/{message_id}"
-            if use_attachment and file_bytes:
-                status, data = await _discord_patch_message_with_attachment(session, str(thread_id), str(message_id), final_content or " ", file_bytes, filename, content_type)
+            if fetched:
+                status, data = await _patch_message_image(session, str(thread_id), str(message_id), final_content or " ", fetched)
             else:
                 status, data = await _discord_patch_json(session, message_path, {"content": final_content or " ", "embeds": []})
             if status >= 300:
-                return with_cors(request, web.json_response({"ok": False, "details": data}, status=500))
+                return {"http_status": 500, "body": {"ok": False, "details": data}}
 
             if metadata_b64 and len(metadata_b64) <= 25000:
                 try:
@@ -296,10 +409,10 @@ async def forum_post_update(request):
             applied_tag_ids = await _resolve_applied_tag_ids(session, target_forum_id, tags)
             status, data = await _discord_patch_json(session, f"/channels/{thread_id}", {"name": title, "applied_tags": applied_tag_ids})
             if status >= 300:
-                return with_cors(request, web.json_response({"ok": False, "details": data}, status=500))
+                return {"http_status": 500, "body": {"ok": False, "details": data}}
 
-        if config.PUBLISHER_ANNOUNCE_CHANNEL_ID and thread_url and not silent_update:
-            await _send_announcement(
+        if config.PUBLISHER_ANNOUNCE_CHANNEL_ID and thread_url and not silent_update and not checkpoint.get("announced"):
+            announced = await _send_announcement(
                 session,
                 is_update=True,
                 title=title,
@@ -311,6 +424,8 @@ async def forum_post_update(request):
                 image_url=announce_image_url or None,
                 forum_id=target_forum_id,
             )
+            if announced:
+                await checkpoint.save(announced=True)
 
         loop = asyncio.get_event_loop()
         existing_row = await loop.run_in_executor(None, _fetch_post_by_thread_id_sync, thread_id)
@@ -356,6 +471,28 @@ async def forum_post_update(request):
         "discordUrl": thread_url,
         "forumId": target_forum_id or 0,
     }
-    if is_legacy:
-        resp_data["legacy_key_warning"] = LEGACY_KEY_WARNING
-    return with_cors(request, web.json_response(resp_data))
+    return {"http_status": 200, "body": resp_data}
+
+
+async def forum_post_status(request):
+    """Etat d'une publication mise en file (reponse 202 de /api/forum-post ou /update)."""
+    is_valid, _, _, _ = await _auth_request(request, "/api/forum-post/status")
+    if not is_valid:
+        return with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+    key = (request.query.get("key") or "").strip()
+    if not key.startswith(("forum_post:", "forum_post_update:")):
+        return with_cors(request, web.json_response({"ok": False, "error": "Cle invalide"}, status=400))
+    job = await get_outbox_job_status(key)
+    if job is None:
+        return with_cors(request, web.json_response({"ok": False, "error": "Job inconnu"}, status=404))
+    return with_cors(request, web.json_response({"ok": True, "idempotency_key": key, **job}))
+
+
+register_outbox_handler(
+    "forum_post", _run_forum_post, replay_safe=False,
+    route=lambda p: rate_limit_route("POST", f"/channels/{p['forum_id']}/threads"),
+)
+register_outbox_handler(
+    "forum_post_update", _run_forum_post_update, replay_safe=True,
+    route=lambda p: rate_limit_route("PATCH", f"/channels/{p['thread_id']}/messages/{p['message_id']}"),
+)
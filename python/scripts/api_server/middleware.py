@@ -1,8 +1,10 @@
 import logging
+import time
 
 from aiohttp import web
 
 from config import config
+from metrics import observe_http_request
 
 logger = logging.getLogger("api")
 
@@ -49,6 +51,12 @@ def with_cors(request, resp):
     return resp
 
 
+def _route_label(request) -> str:
+    """Gabarit de la route (ex. /api/forum-post/{thread_id}) : une série de métriques par route, pas par URL."""
+    resource = request.match_info.route.resource
+    return resource.canonical if resource is not None else "unmatched"
+
+
 @web.middleware
 async def logging_middleware(request, handler):
     client_ip = get_client_ip(request)
@@ -67,7 +75,16 @@ async def logging_middleware(request, handler):
     if method != "OPTIONS":
         logger.info("[REQUEST] %s | %s | %s | %s %s", client_ip, user_id, key_hint, method, path)
 
-    response = await handler(request)
+    started = time.perf_counter()
+    status = 0
+    try:
+        response = await handler(request)
+        status = response.status
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        observe_http_request(method, _route_label(request), status, time.perf_counter() - started)
     if response.status >= 400:
         logger.warning(
             "[HTTP_ERROR] %s | %s | %s | %s %s | STATUS=%d",
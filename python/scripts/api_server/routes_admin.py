@@ -7,7 +7,9 @@ from .handlers_admin import (
     admin_profile_transfer,
     get_journal_logs,
     get_logs,
+    metrics_endpoint,
     server_action,
+    stream_logs,
 )
 
 
@@ -22,4 +24,6 @@ def get_admin_routes():
         ("GET", "/api/admin/forum-channels", admin_forum_channels_list),
         ("GET", "/api/logs", get_logs),
         ("GET", "/api/logs/journal", get_journal_logs),
+        ("GET", "/api/logs/stream", stream_logs),
+        ("GET", "/metrics", metrics_endpoint),
     ]
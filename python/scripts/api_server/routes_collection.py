@@ -9,18 +9,21 @@ from .handlers_collection_bulk import (
     collection_enrich_entries,
     collection_f95_import,
     collection_import_batch,
+    collection_nexus_import,
 )
 
 
 def get_collection_routes():
     return [
         ("GET", "/api/jeux", legacy.get_jeux),
+        ("GET", r"/api/jeux/{id:\d+}", legacy.get_jeu_detail),
         ("POST", "/api/jeux/sync-force", legacy.jeux_sync_force),
         ("POST", "/api/jeux/sync-game",  legacy.jeux_sync_game),
         ("PATCH", "/api/f95-jeux/{id}/synopsis", legacy.update_f95_jeu_synopsis),
         ("POST", "/api/collection/resolve", collection_resolve),
         ("POST", "/api/collection/nexus-parse-db", nexus_parse_db),
         ("POST", "/api/collection/import-batch", collection_import_batch),
+        ("POST", "/api/collection/nexus-import", collection_nexus_import),
         ("GET", "/api/collection/f95-traducteurs", collection_f95_traducteurs),
         ("POST", "/api/collection/f95-preview", collection_f95_preview),
         ("POST", "/api/collection/f95-import", collection_f95_import),
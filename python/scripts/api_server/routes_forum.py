@@ -7,7 +7,7 @@ from .handlers_forum import (
     get_instructions,
     sync_forum_tags,
 )
-from .handlers_forum_publish import forum_post, forum_post_update
+from .handlers_forum_publish import forum_post, forum_post_status, forum_post_update
 
 
 def get_forum_routes():
@@ -15,6 +15,7 @@ def get_forum_routes():
         ("POST", "/api/configure", configure),
         ("POST", "/api/forum-post", forum_post),
         ("POST", "/api/forum-post/update", forum_post_update),
+        ("GET", "/api/forum-post/status", forum_post_status),
         ("POST", "/api/forum-post/delete", forum_post_delete),
         ("GET", "/api/history", get_history),
         ("GET", "/api/instructions", get_instructions),
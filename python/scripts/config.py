@@ -50,6 +50,32 @@ class Config:
         self.VERSION_CHECK_MINUTE            = int(os.getenv("VERSION_CHECK_MINUTE", "0"))
         self.CLEANUP_EMPTY_MESSAGES_HOUR     = int(os.getenv("CLEANUP_EMPTY_MESSAGES_HOUR", "4"))
         self.CLEANUP_EMPTY_MESSAGES_MINUTE   = int(os.getenv("CLEANUP_EMPTY_MESSAGES_MINUTE", "0"))
+        # Échantillonnage du flux RSS F95Zone vers le registre de dates (plus fréquent que rss_date_sync)
+        self.RSS_LEDGER_INTERVAL_MINUTES     = max(1, int(os.getenv("RSS_LEDGER_INTERVAL_MINUTES", "10")))
+        # Mémoire de traduction : entrées gardées en RAM (la copie persistante est dans Supabase)
+        self.TRANSLATION_MEMORY_MAX_ENTRIES  = max(0, int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "2000")))
+        # Requêtes Google Translate simultanées (lots / textes découpés)
+        self.TRANSLATION_CONCURRENCY         = max(1, int(os.getenv("TRANSLATION_CONCURRENCY", "4")))
+
+        # Cache disque des images de publication (0 Mo = désactivé)
+        self.IMAGE_CACHE_DIR                 = os.getenv("IMAGE_CACHE_DIR", str(_python_dir / "_ignored" / "image_cache"))
+        self.IMAGE_CACHE_MAX_MB              = max(0, int(os.getenv("IMAGE_CACHE_MAX_MB", "200")))
+        # Durée pendant laquelle une image en cache est réutilisée sans revalidation HTTP
+        self.IMAGE_CACHE_FRESH_SECONDS       = max(0, int(os.getenv("IMAGE_CACHE_FRESH_SECONDS", "600")))
+        # Annonces : fenêtre de regroupement par traducteur, opt-in (0 = une annonce par publication)
+        self.ANNOUNCE_COALESCE_SECONDS       = max(0, int(os.getenv("ANNOUNCE_COALESCE_SECONDS", "0")))
+        # Outbox des mutations Discord : attente max du résultat par la requête HTTP (sinon 202 + file)
+        self.OUTBOX_WAIT_SECONDS             = max(1, int(os.getenv("OUTBOX_WAIT_SECONDS", "90")))
+        # Limitation des logs INFO fréquents : "logger[:préfixe]=lignes/s", ex. "api:[REQUEST]=20,work_tracking=10"
+        self.LOG_RATE_LIMITS                 = os.getenv("LOG_RATE_LIMITS", "").strip()
+        # GET /metrics (format Prometheus) : accessible sans clé API si true (scraper sur réseau privé)
+        self.METRICS_PUBLIC                  = os.getenv("METRICS_PUBLIC", "false").lower() in ("1", "true", "yes")
+        # Réduction / recompression des images avant upload Discord (nécessite Pillow)
+        self.IMAGE_OPTIMIZE                  = os.getenv("IMAGE_OPTIMIZE", "false").lower() in ("1", "true", "yes")
+        _fmt = os.getenv("IMAGE_OPTIMIZE_FORMAT", "webp").strip().lower()
+        self.IMAGE_OPTIMIZE_FORMAT           = "jpeg" if _fmt in ("jpeg", "jpg") else "webp"
+        self.IMAGE_OPTIMIZE_MAX_DIM          = max(64, int(os.getenv("IMAGE_OPTIMIZE_MAX_DIM", "1600")))
+        self.IMAGE_OPTIMIZE_QUALITY          = min(100, max(1, int(os.getenv("IMAGE_OPTIMIZE_QUALITY", "85"))))
 
         # Suivi d'œuvres (Webtoon / Manga…) — refresh quotidien + alertes payant
         _admin_id = os.getenv("WORK_TRACKING_ADMIN_DISCORD_USER_ID", "").strip()
@@ -58,6 +84,7 @@ class Config:
         self.WORK_TRACKING_REFRESH_MINUTE = int(os.getenv("WORK_TRACKING_REFRESH_MINUTE", "0"))
         self.WORK_TRACKING_DIGEST_HOUR = int(os.getenv("WORK_TRACKING_DIGEST_HOUR", "9"))
         self.WORK_TRACKING_DIGEST_MINUTE = int(os.getenv("WORK_TRACKING_DIGEST_MINUTE", "0"))
+        self.WORK_TRACKING_EDIT_CONCURRENCY = max(1, int(os.getenv("WORK_TRACKING_EDIT_CONCURRENCY", "4")))
 
         self.configured = bool(
             self.PUBLISHER_DISCORD_TOKEN
@@ -1,31 +1,75 @@
 ﻿"""
 Wrappers REST bas niveau vers l'API Discord — aucune logique metier.
-Dependances : config
+Dependances : config, metrics
 Logger       : [discord]
 """
 
 import json
+import re
 import time
 import logging
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import aiohttp
 
 from config import config
+from metrics import discord_route, track_upstream
 
 logger = logging.getLogger("discord")
 
 
 # ==================== RATE LIMIT TRACKER ====================
 
+_MAJOR_PARAM_RE = re.compile(r"^/(?:channels|guilds|webhooks)/\d+")
+_MINOR_ID_RE    = re.compile(r"/\d{6,}")
+
+
+def rate_limit_route(method: str, path: str) -> str:
+    """
+    Route au sens rate limit Discord : le parametre majeur (salon / serveur / webhook)
+    est conserve, les autres IDs sont remplaces par {id}.
+    """
+    path = path.split("?", 1)[0]
+    m = _MAJOR_PARAM_RE.match(path)
+    head = m.group(0) if m else ""
+    return f"{method} {head}{_MINOR_ID_RE.sub('/{id}', path[len(head):])}"
+
+
 class RateLimitTracker:
     def __init__(self):
         self.remaining: Optional[int] = None
         self.limit:     Optional[int] = None
         self.reset_at:  Optional[float] = None
-
-    def update_from_headers(self, headers: dict):
+        # Buckets Discord (X-RateLimit-Bucket) : route -> bucket, bucket -> (restantes, reset_at)
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+        self._global_until = 0.0
+
+    def _update_bucket(self, headers, route: str) -> None:
+        bucket = headers.get("X-RateLimit-Bucket")
+        if route and bucket:
+            self._route_buckets[route] = bucket
+            if "X-RateLimit-Remaining" in headers and "X-RateLimit-Reset" in headers:
+                self._buckets[bucket] = (
+                    int(headers["X-RateLimit-Remaining"]), float(headers["X-RateLimit-Reset"]),
+                )
+        if headers.get("X-RateLimit-Global") and headers.get("Retry-After"):
+            self._global_until = time.time() + float(headers["Retry-After"])
+
+    def delay_for(self, route: str, reserve: int = 0) -> float:
+        """Secondes a attendre avant d'appeler cette route (bucket epuise ou limite globale)."""
+        now = time.time()
+        wait = max(0.0, self._global_until - now)
+        bucket = self._route_buckets.get(route)
+        if bucket in self._buckets:
+            remaining, reset_at = self._buckets[bucket]
+            if remaining <= reserve and reset_at > now:
+                wait = max(wait, reset_at - now)
+        return wait
+
+    def update_from_headers(self, headers: dict, route: str = ""):
         try:
+            self._update_bucket(headers, route)
             if "X-RateLimit-Remaining" in headers:
                 self.remaining = int(headers["X-RateLimit-Remaining"])
             if "X-RateLimit-Limit" in headers:
@@ -68,20 +112,22 @@ async def _discord_request(
 ) -> tuple[int, any, dict]:
     url = f"{config.DISCORD_API_BASE}{path}"
     try:
-        async with session.request(
-            method, url, headers=headers, json=json_data, data=data
-        ) as resp:
-            rate_limiter.update_from_headers(resp.headers)
-            try:
-                resp_data = await resp.json()
-            except Exception:
-                resp_data = await resp.text()
-
-            if resp.status >= 400:
-                logger.warning("[discord] %s %s -> HTTP %d : %s",
-                               method, path, resp.status, resp_data)
-
-            return resp.status, resp_data, dict(resp.headers)
+        with track_upstream("discord", discord_route(method, path)) as call:
+            async with session.request(
+                method, url, headers=headers, json=json_data, data=data
+            ) as resp:
+                call.status = resp.status
+                rate_limiter.update_from_headers(resp.headers, rate_limit_route(method, path))
+                try:
+                    resp_data = await resp.json()
+                except Exception:
+                    resp_data = await resp.text()
+
+                if resp.status >= 400:
+                    logger.warning("[discord] %s %s -> HTTP %d : %s",
+                                   method, path, resp.status, resp_data)
+
+                return resp.status, resp_data, dict(resp.headers)
     except Exception as e:
         logger.error("[discord] Erreur requete %s %s : %s", method, path, e)
         return 500, {"error": str(e)}, {}
@@ -156,20 +202,25 @@ async def _discord_list_messages(
 
 
 async def _discord_suppress_embeds(
-    session, channel_id: str, message_id: str
+    session, channel_id: str, message_id: str, current_flags: Optional[int] = None
 ) -> bool:
-    """Active le flag SUPPRESS_EMBEDS sur un message (masque les embeds)."""
+    """
+    Active le flag SUPPRESS_EMBEDS sur un message (masque les embeds).
+    current_flags : flags deja connus (ex. reponse de creation) -> pas de GET prealable.
+    """
     try:
-        status, msg = await _discord_get(
-            session, f"/channels/{channel_id}/messages/{message_id}"
-        )
-        if status >= 300:
-            logger.warning(
-                "[discord] Impossible de lire le message avant SUPPRESS_EMBEDS (status=%d)", status
+        if current_flags is None:
+            status, msg = await _discord_get(
+                session, f"/channels/{channel_id}/messages/{message_id}"
             )
-            return False
+            if status >= 300:
+                logger.warning(
+                    "[discord] Impossible de lire le message avant SUPPRESS_EMBEDS (status=%d)", status
+                )
+                return False
+            current_flags = msg.get("flags", 0)
 
-        new_flags = (msg.get("flags", 0) | 4)
+        new_flags = (current_flags | 4)
         status, data = await _discord_patch_json(
             session,
             f"/channels/{channel_id}/messages/{message_id}",
@@ -0,0 +1,353 @@
+"""
+Outbox durable des mutations Discord (publication, mise a jour / re-routage de posts).
+Chaque mutation est enregistree dans discord_outbox (Supabase) sous une cle d'idempotence
+avant execution ; un worker unique les execute dans l'ordre en respectant le bucket rate limit
+Discord de la route visee, les echecs transitoires (5xx, 429) sont rejoues avec backoff
+exponentiel et les jobs non termines sont repris au demarrage du serveur.
+Dependances : config, supabase_client, discord_api
+Logger       : [outbox]
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from config import config
+from discord_api import rate_limiter
+from supabase_client import (
+    _outbox_claim_sync,
+    _outbox_fetch_sync,
+    _outbox_fetch_unfinished_sync,
+    _outbox_retry_failed_sync,
+    _outbox_update_sync,
+)
+
+logger = logging.getLogger("outbox")
+
+_DERIVED_KEY_WINDOW_SECONDS = 600   # cle derivee du contenu : double envoi ignore pendant 10 min
+_RATE_LIMIT_RESERVE = 1             # requetes gardees en reserve dans le bucket avant d'attendre le reset
+_MAX_ATTEMPTS = 5                   # au-dela : failed definitif
+_RETRY_BASE_SECONDS = 5             # backoff : 5 s, 10 s, 20 s, 40 s…
+_RETRY_MAX_SECONDS = 300
+
+
+class OutboxCheckpoint:
+    """
+    Etapes deja effectuees d'un job (colonne checkpoint de discord_outbox).
+    Relu a la reprise ; save() est appele avant l'etape suivante pour qu'un rejeu reparte de la.
+    """
+
+    def __init__(self, key: str, data: Optional[dict] = None):
+        self.key = key
+        self.data: Dict[str, Any] = dict(data or {})
+
+    def get(self, name: str, default=None):
+        return self.data.get(name, default)
+
+    async def save(self, **fields) -> None:
+        self.data.update(fields)
+        await asyncio.get_event_loop().run_in_executor(
+            None, _outbox_update_sync, self.key, {"checkpoint": self.data},
+        )
+
+
+@dataclass
+class _OutboxHandler:
+    run:         Callable[[dict, OutboxCheckpoint], Awaitable[dict]]
+    replay_safe: bool   # rejouable apres une interruption en cours d'execution
+    route:       Optional[Callable[[dict], str]] = None   # route Discord principale (bucket rate limit)
+
+
+_HANDLERS: Dict[str, _OutboxHandler] = {}
+
+
+def register_outbox_handler(
+    op: str,
+    run: Callable[[dict, OutboxCheckpoint], Awaitable[dict]],
+    *,
+    replay_safe: bool,
+    route: Optional[Callable[[dict], str]] = None,
+) -> None:
+    """
+    Declare l'executeur d'une operation. run(payload, checkpoint) -> {"http_status": int, "body": dict}
+    (+ "retryable": bool facultatif pour forcer / interdire un nouvel essai sur un 5xx).
+    checkpoint : etapes deja faites lors d'un essai precedent (meme apres redemarrage) ; un job
+    replay_safe dont une etape n'est pas idempotente doit l'y enregistrer et la sauter au rejeu.
+    replay_safe=False : un job interrompu pendant son execution est marque failed au lieu d'etre rejoue,
+    et ses 5xx / exceptions ne sont rejoues que si run() indique retryable=True
+    (ex. creation de thread : la rejouer apres un succes partiel risquerait un doublon).
+    route(payload) : route Discord (discord_api.rate_limit_route) dont le bucket est respecte avant execution.
+    """
+    _HANDLERS[op] = _OutboxHandler(run=run, replay_safe=replay_safe, route=route)
+
+
+def outbox_idempotency_key(request, op: str, payload: dict, explicit: str = "") -> str:
+    """
+    Cle d'idempotence : en-tete Idempotency-Key ou champ idempotency_key du client,
+    sinon empreinte du contenu (op + payload) valable _DERIVED_KEY_WINDOW_SECONDS.
+    """
+    explicit = (explicit or request.headers.get("Idempotency-Key", "")).strip()
+    if explicit:
+        return f"{op}:client:{explicit[:200]}"
+    digest = hashlib.sha256(
+        json.dumps([op, payload], sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{op}:auto:{digest}:{int(time.time() // _DERIVED_KEY_WINDOW_SECONDS)}"
+
+
+class _DiscordOutbox:
+    """File des mutations : un worker, futures pour les requetes HTTP qui attendent leur resultat."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._checkpoints: Dict[str, OutboxCheckpoint] = {}
+        self.executed = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.replayed = 0
+        self.retried = 0
+        self._retry_tasks: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="task_discord_outbox")
+
+    async def submit(self, op: str, payload: dict, key: str) -> dict:
+        if op not in _HANDLERS:
+            raise ValueError(f"Operation outbox inconnue : {op}")
+        self._ensure_worker()
+
+        in_flight = self._futures.get(key)
+        if in_flight is not None:
+            self.deduplicated += 1
+            logger.info("[outbox] %s deja en cours (%s), attente du meme resultat", op, key[:40])
+            return await self._wait(in_flight, key)
+
+        # Future enregistree avant tout await : un doublon concurrent attend ce meme job
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        existing = await loop.run_in_executor(None, _outbox_claim_sync, key, op, payload)
+        if existing is None:
+            logger.warning("[outbox] Supabase indisponible : %s execute sans persistance", op)
+        elif existing.get("status") == "unknown":
+            # Cle deja enregistree mais ligne illisible : ne pas executer une seconde fois
+            logger.warning("[outbox] %s deja enregistre, etat illisible (%s) : pas d'execution", op, key[:40])
+            self._futures.pop(key, None)
+            return {"http_status": 202, "body": {"ok": True, "queued": True, "idempotency_key": key}}
+        elif existing.get("status") == "done" and isinstance(existing.get("result"), dict):
+            self.deduplicated += 1
+            logger.info("[outbox] %s deja execute (%s), resultat rejoue", op, key[:40])
+            self._futures.pop(key, None)
+            future.set_result(existing["result"])
+            return existing["result"]
+        elif existing.get("status") == "failed":
+            # Nouvel essai demande par le client ; transition conditionnelle (un seul relanceur)
+            if not await loop.run_in_executor(None, _outbox_retry_failed_sync, key):
+                self._futures.pop(key, None)
+                return {"http_status": 202, "body": {"ok": True, "queued": True, "idempotency_key": key}}
+            self._checkpoints[key] = OutboxCheckpoint(key, existing.get("checkpoint"))
+        elif existing:
+            # pending / running inconnu de ce processus (non repris au demarrage) : meme regle que la reprise
+            if not await self._resume_row(existing):
+                self._futures.pop(key, None)
+                return {"http_status": 202, "body": {"ok": True, "queued": True, "idempotency_key": key}}
+            return await self._wait(future, key)
+
+        await self._queue.put((key, op, payload, 0))
+        return await self._wait(future, key)
+
+    async def _wait(self, future: asyncio.Future, key: str) -> dict:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=config.OUTBOX_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            return {
+                "http_status": 202,
+                "body": {"ok": True, "queued": True, "idempotency_key": key},
+            }
+
+    async def _respect_rate_limit(self, op: str, payload: dict) -> None:
+        handler = _HANDLERS[op]
+        if handler.route is None:
+            return
+        try:
+            route = handler.route(payload)
+        except Exception:
+            return
+        delay = rate_limiter.delay_for(route, reserve=_RATE_LIMIT_RESERVE)
+        if delay > 0:
+            logger.info("[outbox] Bucket Discord epuise (%s), pause %.1fs", route, delay)
+            await asyncio.sleep(delay)
+
+    def _requeue_later(self, delay: float, key: str, op: str, payload: dict, attempts: int) -> None:
+        async def _later():
+            await asyncio.sleep(delay)
+            await self._queue.put((key, op, payload, attempts))
+
+        task = asyncio.create_task(_later(), name=f"task_outbox_retry_{key[:24]}")
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            key, op, payload, attempts = await self._queue.get()
+            handler = _HANDLERS[op]
+            await self._respect_rate_limit(op, payload)
+            attempts += 1
+            await loop.run_in_executor(
+                None, _outbox_update_sync, key, {"status": "running", "attempts": attempts},
+            )
+            checkpoint = self._checkpoints.setdefault(key, OutboxCheckpoint(key))
+            try:
+                outcome = await handler.run(payload, checkpoint)
+            except Exception as e:
+                logger.error("[outbox] %s (%s) a leve une exception : %s", op, key[:40], e, exc_info=True)
+                outcome = {"http_status": 500, "body": {"ok": False, "error": str(e)}}
+            http_status = outcome.get("http_status", 500)
+            result = {"http_status": http_status, "body": outcome.get("body")}
+            last_error = json.dumps(result["body"], default=str)[:2000]
+
+            transient = http_status == 429 or (
+                http_status >= 500 and outcome.get("retryable", handler.replay_safe)
+            )
+            if transient and attempts < _MAX_ATTEMPTS:
+                delay = min(_RETRY_BASE_SECONDS * 2 ** (attempts - 1), _RETRY_MAX_SECONDS)
+                self.retried += 1
+                logger.warning(
+                    "[outbox] %s (%s) HTTP %d, essai %d/%d, nouvel essai dans %ds",
+                    op, key[:40], http_status, attempts, _MAX_ATTEMPTS, delay,
+                )
+                await loop.run_in_executor(None, _outbox_update_sync, key, {
+                    "status": "pending", "last_error": last_error,
+                })
+                self._requeue_later(delay, key, op, payload, attempts)
+                continue
+
+            succeeded = http_status < 500 and http_status != 429
+            self._checkpoints.pop(key, None)
+            if succeeded:
+                self.executed += 1
+            else:
+                self.failed += 1
+            await loop.run_in_executor(None, _outbox_update_sync, key, {
+                "status":     "done" if succeeded else "failed",
+                "result":     result,
+                "last_error": None if succeeded else last_error,
+            })
+            future = self._futures.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def _resume_row(self, row: dict) -> bool:
+        """
+        Remet en file un job pending / running laisse par un cycle precedent.
+        False si le job ne doit pas etre rejoue (marque failed) ou est deja suivi par ce processus.
+        """
+        loop = asyncio.get_event_loop()
+        key, op = row.get("idempotency_key"), row.get("op")
+        handler = _HANDLERS.get(op)
+        if not key or handler is None:
+            return False
+        attempts = int(row.get("attempts") or 0)
+        if row.get("status") == "running" and not handler.replay_safe:
+            logger.warning("[outbox] %s interrompu en cours d'execution, non rejoue (%s)", op, key[:40])
+            error = "interrompu par un redemarrage (verifier Discord)"
+        elif attempts >= _MAX_ATTEMPTS:
+            error = f"abandonne apres {attempts} essai(s)"
+        else:
+            error = ""
+        if error:
+            await loop.run_in_executor(None, _outbox_update_sync, key, {"status": "failed", "last_error": error})
+            future = self._futures.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result({"http_status": 500, "body": {"ok": False, "error": error}})
+            return False
+        if key not in self._futures:
+            self._futures[key] = loop.create_future()
+        self._checkpoints[key] = OutboxCheckpoint(key, row.get("checkpoint"))
+        await self._queue.put((key, op, row.get("payload") or {}, attempts))
+        return True
+
+    async def replay_unfinished(self) -> int:
+        """Reprend les jobs laisses pending / running par un arret precedent. Retourne le nombre relance."""
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, _outbox_fetch_unfinished_sync)
+        if not rows:
+            return 0
+        self._ensure_worker()
+        requeued = 0
+        for row in rows:
+            if row.get("idempotency_key") in self._futures:
+                continue
+            if await self._resume_row(row):
+                requeued += 1
+        self.replayed += requeued
+        logger.info("[outbox] %d job(s) repris au demarrage", requeued)
+        return requeued
+
+    async def job_status(self, key: str) -> Optional[dict]:
+        """Etat d'un job pour le client (apres un 202) : status, attempts, result si termine."""
+        row = await asyncio.get_event_loop().run_in_executor(None, _outbox_fetch_sync, key)
+        if row is None:
+            if key in self._futures:
+                return {"status": "pending", "attempts": 0, "result": None}
+            return None
+        return {
+            "status":     row.get("status"),
+            "attempts":   int(row.get("attempts") or 0),
+            "result":     row.get("result") if row.get("status") in ("done", "failed") else None,
+            "last_error": row.get("last_error"),
+        }
+
+    def get_info(self) -> dict:
+        return {
+            "queued":        self._queue.qsize() if self._queue else 0,
+            "in_flight":     len(self._futures),
+            "executed":      self.executed,
+            "failed":        self.failed,
+            "deduplicated":  self.deduplicated,
+            "replayed":      self.replayed,
+            "retried":       self.retried,
+            "retry_waiting": len(self._retry_tasks),
+        }
+
+
+_outbox = _DiscordOutbox()
+
+
+async def submit_discord_mutation(op: str, payload: dict, key: str) -> dict:
+    """
+    Enregistre puis execute (via le worker) une mutation Discord.
+    Retourne {"http_status", "body"} ; 202 + queued=True si le resultat n'arrive pas dans OUTBOX_WAIT_SECONDS.
+    """
+    return await _outbox.submit(op, payload, key)
+
+
+async def get_outbox_job_status(key: str) -> Optional[dict]:
+    """Etat d'un job d'outbox par cle d'idempotence (None si inconnu)."""
+    return await _outbox.job_status(key)
+
+
+async def start_discord_outbox() -> None:
+    """
+    Demarre le worker et reprend les jobs non termines.
+    A appeler apres _init_supabase (sinon aucun job ne peut etre relu).
+    """
+    try:
+        await _outbox.replay_unfinished()
+    except Exception as e:
+        logger.warning("[outbox] Reprise au demarrage impossible : %s", e)
+
+
+def get_outbox_info() -> dict:
+    """Statistiques de l'outbox (file, executes, echecs, doublons evites, reprises)."""
+    return _outbox.get_info()
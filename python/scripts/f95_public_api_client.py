@@ -13,6 +13,8 @@ from typing import Any
 
 import aiohttp
 
+from metrics import track_upstream
+
 logger = logging.getLogger("f95-public-api")
 
 _DEFAULT_API_BASE = "https://api.f95france.site"
@@ -549,23 +551,25 @@ async def fetch_public_games(session: aiohttp.ClientSession, *, timeout_seconds:
         headers["Authorization"] = f"Bearer {F95_PUBLIC_API_KEY}"
         headers["X-Api-Key"] = F95_PUBLIC_API_KEY
 
-    async with session.get(
-        F95_PUBLIC_API_GAMES_URL,
-        params={"include": "translations"},
-        headers=headers,
-        timeout=aiohttp.ClientTimeout(total=timeout_seconds),
-    ) as resp:
-        if resp.status != 200:
-            body = await resp.text()
-            hint = _api_error_hint(resp.status, F95_PUBLIC_API_GAMES_URL, resp.headers.get("Content-Type", ""))
-            raise RuntimeError(f"API publique HTTP {resp.status}{hint}: {body[:200]}")
+    with track_upstream("f95", "public_api_games") as call:
+        async with session.get(
+            F95_PUBLIC_API_GAMES_URL,
+            params={"include": "translations"},
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout_seconds),
+        ) as resp:
+            call.status = resp.status
+            if resp.status != 200:
+                body = await resp.text()
+                hint = _api_error_hint(resp.status, F95_PUBLIC_API_GAMES_URL, resp.headers.get("Content-Type", ""))
+                raise RuntimeError(f"API publique HTTP {resp.status}{hint}: {body[:200]}")
 
-        payload = await resp.json()
-        if not isinstance(payload, list):
-            raise RuntimeError("Réponse /v1/games invalide (liste attendue)")
+            payload = await resp.json()
+            if not isinstance(payload, list):
+                raise RuntimeError("Réponse /v1/games invalide (liste attendue)")
 
-        logger.info("[f95-public-api] %d jeu(x) récupéré(s)", len(payload))
-        return payload
+            logger.info("[f95-public-api] %d jeu(x) récupéré(s)", len(payload))
+            return payload
 
 
 async def fetch_public_updates(
@@ -582,21 +586,23 @@ async def fetch_public_updates(
         headers["Authorization"] = f"Bearer {F95_PUBLIC_API_KEY}"
         headers["X-Api-Key"]     = F95_PUBLIC_API_KEY
 
-    async with session.get(
-        F95_PUBLIC_API_UPDATES_URL,
-        params={"limit": max(1, min(int(limit), 200))},
-        headers=headers,
-        timeout=aiohttp.ClientTimeout(total=timeout_seconds),
-    ) as resp:
-        if resp.status != 200:
-            body = await resp.text()
-            hint = _api_error_hint(resp.status, F95_PUBLIC_API_UPDATES_URL, resp.headers.get("Content-Type", ""))
-            raise RuntimeError(f"API publique /updates HTTP {resp.status}{hint}: {body[:200]}")
-        payload = await resp.json()
-        if not isinstance(payload, list):
-            raise RuntimeError("Réponse /v1/updates invalide (liste attendue)")
-        logger.info("[f95-public-api] %d mise(s) à jour récupérée(s)", len(payload))
-        return payload
+    with track_upstream("f95", "public_api_updates") as call:
+        async with session.get(
+            F95_PUBLIC_API_UPDATES_URL,
+            params={"limit": max(1, min(int(limit), 200))},
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout_seconds),
+        ) as resp:
+            call.status = resp.status
+            if resp.status != 200:
+                body = await resp.text()
+                hint = _api_error_hint(resp.status, F95_PUBLIC_API_UPDATES_URL, resp.headers.get("Content-Type", ""))
+                raise RuntimeError(f"API publique /updates HTTP {resp.status}{hint}: {body[:200]}")
+            payload = await resp.json()
+            if not isinstance(payload, list):
+                raise RuntimeError("Réponse /v1/updates invalide (liste attendue)")
+            logger.info("[f95-public-api] %d mise(s) à jour récupérée(s)", len(payload))
+            return payload
 
 
 async def fetch_public_catalog_bundle(
@@ -635,28 +641,30 @@ async def fetch_public_translators(
         headers["Authorization"] = f"Bearer {F95_PUBLIC_API_KEY}"
         headers["X-Api-Key"]     = F95_PUBLIC_API_KEY
 
-    async with session.get(
-        F95_PUBLIC_API_TRANSLATORS_URL,
-        headers=headers,
-        timeout=aiohttp.ClientTimeout(total=timeout_seconds),
-    ) as resp:
-        if resp.status != 200:
-            body = await resp.text()
-            hint = _api_error_hint(resp.status, F95_PUBLIC_API_TRANSLATORS_URL, resp.headers.get("Content-Type", ""))
-            raise RuntimeError(f"API publique /translators HTTP {resp.status}{hint}: {body[:200]}")
-        payload = await resp.json()
-        if not isinstance(payload, list):
-            raise RuntimeError("Réponse /v1/translators invalide (liste attendue)")
-
-        mapping: dict[str, dict[str, str | None]] = {}
-        for row in payload:
-            if not isinstance(row, dict):
-                continue
-            rid  = str(row.get("id") or "").strip()
-            name = _to_legacy_translator_name(row.get("name"))
-            if not rid or not name:
-                continue
-            mapping[rid] = {"name": name, "pages": _extract_translator_url(row.get("pages"))}
-
-        logger.info("[f95-public-api] %d traducteur(s) public(s) récupéré(s)", len(mapping))
-        return mapping
+    with track_upstream("f95", "public_api_translators") as call:
+        async with session.get(
+            F95_PUBLIC_API_TRANSLATORS_URL,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout_seconds),
+        ) as resp:
+            call.status = resp.status
+            if resp.status != 200:
+                body = await resp.text()
+                hint = _api_error_hint(resp.status, F95_PUBLIC_API_TRANSLATORS_URL, resp.headers.get("Content-Type", ""))
+                raise RuntimeError(f"API publique /translators HTTP {resp.status}{hint}: {body[:200]}")
+            payload = await resp.json()
+            if not isinstance(payload, list):
+                raise RuntimeError("Réponse /v1/translators invalide (liste attendue)")
+
+            mapping: dict[str, dict[str, str | None]] = {}
+            for row in payload:
+                if not isinstance(row, dict):
+                    continue
+                rid  = str(row.get("id") or "").strip()
+                name = _to_legacy_translator_name(row.get("name"))
+                if not rid or not name:
+                    continue
+                mapping[rid] = {"name": name, "pages": _extract_translator_url(row.get("pages"))}
+
+            logger.info("[f95-public-api] %d traducteur(s) public(s) récupéré(s)", len(mapping))
+            return mapping
@@ -0,0 +1,206 @@
+"""
+Flux RSS F95Zone partagé (latest_data.php?cmd=rss) — une seule source pour tout le bot.
+Cache mémoire TTL + refresh single-flight + revalidation conditionnelle (ETag / Last-Modified).
+Consommateurs : scheduled_tasks, api_server (collection, enrichissement), proxy /api/rss/f95-updates.
+Dependances : metrics (aiohttp)
+Logger       : [rss]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import aiohttp
+
+from metrics import track_upstream
+
+logger = logging.getLogger("rss")
+
+RSS_URL_GAMES = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
+_RSS_TTL_SECONDS = float(os.getenv("F95_RSS_TTL_SECONDS", "120"))
+_RSS_TIMEOUT_SECONDS = 15
+_RSS_FAILURE_BACKOFF_SECONDS = 30.0
+_THREAD_ID_RE = re.compile(r"/threads/(?:[^/]*\.)?(\d+)")
+_LINK_RE = re.compile(r"<link>([^<]+)</link>")
+
+
+@dataclass
+class RssFeed:
+    """Instantané parsé du flux (partagé, ne pas modifier)."""
+    entries:    list[dict] = field(default_factory=list)   # [{threadId, url, title, pubDate}]
+    date_map:   dict[int, str] = field(default_factory=dict)  # {thread_id: "YYYY-MM-DD"}
+    fetched_at: float = 0.0                                 # time.monotonic() du dernier 200/304
+    etag:       str = ""                                    # validateurs upstream
+    last_modified: str = ""
+    digest:     str = ""                                    # empreinte du contenu (ETag du proxy)
+
+
+def parse_rss_feed(xml_text: str) -> RssFeed:
+    """
+    Parse un flux RSS 2.0 F95Zone en entrées + map {thread_id: "YYYY-MM-DD"}.
+    Lève ET.ParseError si le XML est invalide.
+    """
+    root = ET.fromstring(xml_text)
+    feed = RssFeed(digest=hashlib.sha1(xml_text.encode("utf-8")).hexdigest()[:16])
+    for item in root.iter("item"):
+        link = (item.findtext("link") or "").strip()
+        if not link:
+            # <link> est un nœud texte en RSS 2.0 : repli sur le XML brut de l'item
+            m_link = _LINK_RE.search(ET.tostring(item, encoding="unicode"))
+            link = m_link.group(1).strip() if m_link else ""
+        m_id = _THREAD_ID_RE.search(link)
+        if not m_id:
+            continue
+        tid = int(m_id.group(1))
+        pub_raw = (item.findtext("pubDate") or "").strip()
+        try:
+            pub_dt = parsedate_to_datetime(pub_raw) if pub_raw else None
+        except Exception:
+            pub_dt = None
+        feed.entries.append({
+            "threadId": tid,
+            "url":      link,
+            "title":    (item.findtext("title") or "").strip(),
+            "pubDate":  pub_dt.isoformat() if pub_dt else "",
+        })
+        # Le flux est trié du plus récent au plus ancien : garder la première date vue
+        if pub_dt and tid not in feed.date_map:
+            feed.date_map[tid] = pub_dt.strftime("%Y-%m-%d")
+    return feed
+
+
+class _RssFeedCache:
+    """
+    Cache du flux RSS. Un seul refresh en vol à la fois (asyncio.Lock) :
+    les appelants concurrents attendent le même téléchargement au lieu d'en lancer un chacun.
+    En cas d'échec upstream, la dernière version connue est servie (même expirée).
+    """
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._feed: Optional[RssFeed] = None
+        self._lock = asyncio.Lock()
+        self._retry_after = 0.0   # après un échec upstream, pas de nouvel essai avant cette échéance
+        self.upstream_calls = 0
+        self.not_modified = 0
+
+    def _is_fresh(self) -> bool:
+        return self._feed is not None and (time.monotonic() - self._feed.fetched_at) < self._ttl
+
+    async def get(self, session: Optional[aiohttp.ClientSession], force_refresh: bool) -> Optional[RssFeed]:
+        if not force_refresh and self._is_fresh():
+            return self._feed
+        async with self._lock:
+            # Un autre appelant a peut-être rafraîchi pendant l'attente du verrou
+            if not force_refresh and (self._is_fresh() or time.monotonic() < self._retry_after):
+                return self._feed
+            if session is None:
+                async with aiohttp.ClientSession() as own_session:
+                    await self._refresh(own_session)
+            else:
+                await self._refresh(session)
+        return self._feed
+
+    async def _refresh(self, session: aiohttp.ClientSession) -> None:
+        self._retry_after = time.monotonic() + min(self._ttl, _RSS_FAILURE_BACKOFF_SECONDS)
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if self._feed is not None:
+            if self._feed.etag:
+                headers["If-None-Match"] = self._feed.etag
+            if self._feed.last_modified:
+                headers["If-Modified-Since"] = self._feed.last_modified
+        self.upstream_calls += 1
+        try:
+            with track_upstream("f95", "rss") as call:
+                async with session.get(
+                    RSS_URL_GAMES,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=_RSS_TIMEOUT_SECONDS),
+                ) as resp:
+                    call.status = resp.status
+                    if resp.status == 304 and self._feed is not None:
+                        self._feed.fetched_at = time.monotonic()
+                        self._retry_after = 0.0
+                        self.not_modified += 1
+                        logger.debug("[rss] Flux inchangé (304)")
+                        return
+                    if resp.status != 200:
+                        logger.warning("[rss] Flux RSS HTTP %d (cache conservé)", resp.status)
+                        return
+                    xml_text = await resp.text(encoding="utf-8", errors="replace")
+                    etag = resp.headers.get("ETag", "")
+                    last_modified = resp.headers.get("Last-Modified", "")
+            feed = parse_rss_feed(xml_text)
+        except ET.ParseError as e:
+            logger.warning("[rss] XML parse error : %s", e)
+            return
+        except Exception as e:
+            logger.warning("[rss] Flux RSS indisponible : %s", e)
+            return
+        feed.etag = etag
+        feed.last_modified = last_modified
+        feed.fetched_at = time.monotonic()
+        self._feed = feed
+        self._retry_after = 0.0
+        logger.info("[rss] Flux RSS rafraîchi : %d entrée(s), %d date(s)", len(feed.entries), len(feed.date_map))
+
+    def get_info(self) -> dict:
+        return {
+            "entries":        len(self._feed.entries) if self._feed else 0,
+            "age_seconds":    round(time.monotonic() - self._feed.fetched_at, 1) if self._feed else None,
+            "ttl_seconds":    self._ttl,
+            "upstream_calls": self.upstream_calls,
+            "not_modified":   self.not_modified,
+        }
+
+
+_rss_cache = _RssFeedCache(ttl=_RSS_TTL_SECONDS)
+
+
+async def get_rss_feed(
+    session: Optional[aiohttp.ClientSession] = None,
+    *,
+    force_refresh: bool = False,
+) -> Optional[RssFeed]:
+    """
+    Retourne le flux RSS parsé (cache partagé). None si jamais récupéré avec succès.
+    session : session aiohttp réutilisée pour le refresh (optionnelle).
+    """
+    return await _rss_cache.get(session, force_refresh)
+
+
+async def get_rss_date_map(session: Optional[aiohttp.ClientSession] = None) -> dict[int, str]:
+    """Retourne {thread_id: "YYYY-MM-DD"} depuis le flux partagé ({} si indisponible)."""
+    feed = await get_rss_feed(session)
+    return dict(feed.date_map) if feed else {}
+
+
+async def get_rss_date(thread_id: int, session: Optional[aiohttp.ClientSession] = None) -> Optional[str]:
+    """Date de MAJ "YYYY-MM-DD" d'un thread si présent dans le flux, sinon None."""
+    feed = await get_rss_feed(session)
+    return feed.date_map.get(int(thread_id)) if feed else None
+
+
+def merge_date_maps(*maps: dict[int, str]) -> dict[int, str]:
+    """Fusionne des maps {thread_id: date} en gardant la date la plus récente ("YYYY-MM-DD")."""
+    merged: dict[int, str] = {}
+    for date_map in maps:
+        for tid, raw in (date_map or {}).items():
+            date_str = (raw or "")[:10]
+            if date_str and date_str > merged.get(tid, ""):
+                merged[tid] = date_str
+    return merged
+
+
+def get_rss_cache_info() -> dict:
+    """Statistiques du cache RSS (taille, âge, appels upstream)."""
+    return _rss_cache.get_info()
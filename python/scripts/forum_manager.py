@@ -1,6 +1,6 @@
 """
 Logique metier creation / mise a jour / suppression de posts Discord.
-Dependances : config, content_parser, supabase_client, discord_api
+Dependances : config, content_parser, supabase_client, discord_api, image_cache
 Logger       : [publisher]
 """
 
@@ -19,6 +19,7 @@ import aiohttp
 import discord
 
 from config import config
+from image_cache import image_cache, optimize_image_sync
 from image_utils import extract_image_urls_from_text
 from content_parser import (
     _RE_GAME_VERSION_MD, _RE_GAME_VERSION_PLAIN,
@@ -181,35 +182,173 @@ async def sync_forum_fixed_tags(session, forum_id: str) -> Tuple[int, str, list]
         err = patch_data.get("message", str(patch_data)) if isinstance(patch_data, dict) else str(patch_data)
         return patch_status, err or "Erreur Discord", []
     raw = (patch_data or {}).get("available_tags") if isinstance(patch_data, dict) else []
+    if isinstance(patch_data, dict):
+        _forum_cache.set(forum_id, patch_data.get("type"), raw or [])
     tags = [{"id": str(t.get("id", "")), "name": (t.get("name") or "").strip()} for t in raw]
     return 200, "", tags
 
 
+# ==================== CACHE METADONNEES FORUMS ====================
+
+_FORUM_CACHE_TTL_SECONDS = 3600   # filet de securite : le gateway tient le cache a jour
+
+
+class _ForumMetaCache:
+    """
+    Cache memoire des metadonnees des salons forum (type, available_tags au format REST).
+    Rempli au demarrage du bot depuis le gateway, mis a jour sur on_guild_channel_update,
+    complete par un GET /channels/{id} en cas d'absence ou d'entree trop ancienne.
+    """
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._store: Dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, forum_id: str) -> Optional[dict]:
+        entry = self._store.get(str(forum_id))
+        if not entry or time.monotonic() - entry["cached_at"] > self._ttl:
+            return None
+        return entry
+
+    def set(self, forum_id: str, channel_type: Optional[int], available_tags: list) -> dict:
+        entry = {
+            "type":           channel_type,
+            "available_tags": [_normalize_tag_dict(t) for t in (available_tags or [])],
+            "cached_at":      time.monotonic(),
+        }
+        self._store[str(forum_id)] = entry
+        return entry
+
+    def evict(self, forum_id: str) -> None:
+        self._store.pop(str(forum_id), None)
+
+    def get_info(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "forums":    len(self._store),
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def _normalize_tag_dict(t: dict) -> dict:
+    return {
+        "id":         str(t.get("id", "")),
+        "name":       (t.get("name") or "").strip(),
+        "emoji_id":   t.get("emoji_id"),
+        "emoji_name": t.get("emoji_name"),
+        "moderated":  bool(t.get("moderated", False)),
+    }
+
+
+def _forum_tag_to_dict(tag) -> dict:
+    """discord.ForumTag -> dict au format REST."""
+    emoji = getattr(tag, "emoji", None)
+    emoji_id = getattr(emoji, "id", None) if emoji else None
+    return {
+        "id":         str(tag.id),
+        "name":       tag.name,
+        "emoji_id":   str(emoji_id) if emoji_id else None,
+        "emoji_name": getattr(emoji, "name", None) if emoji and not emoji_id else None,
+        "moderated":  bool(getattr(tag, "moderated", False)),
+    }
+
+
+_forum_cache = _ForumMetaCache(ttl=_FORUM_CACHE_TTL_SECONDS)
+
+
+def cache_forum_channel(channel) -> bool:
+    """Met en cache un salon forum du gateway (discord.ForumChannel). Retourne True si mis en cache."""
+    if not isinstance(channel, discord.ForumChannel):
+        return False
+    _forum_cache.set(
+        str(channel.id),
+        channel.type.value,
+        [_forum_tag_to_dict(t) for t in (channel.available_tags or [])],
+    )
+    return True
+
+
+def evict_forum_channel(channel_id) -> None:
+    """Retire un salon du cache (suppression / changement de type)."""
+    _forum_cache.evict(str(channel_id))
+
+
+def warm_forum_cache(guilds) -> int:
+    """Remplit le cache avec tous les salons forum visibles (appele depuis on_ready)."""
+    count = 0
+    for guild in guilds or []:
+        for channel in getattr(guild, "forums", None) or []:
+            if cache_forum_channel(channel):
+                count += 1
+    logger.info("[publisher] Cache forums : %d salon(s) forum en cache", count)
+    return count
+
+
+def get_forum_cache_info() -> dict:
+    """Statistiques du cache des metadonnees forum."""
+    return _forum_cache.get_info()
+
+
+async def _get_forum_meta(session, forum_id, *, force_refresh: bool = False) -> Tuple[int, Optional[dict]]:
+    """
+    Metadonnees d'un salon forum : cache d'abord, GET /channels/{id} sinon.
+    Retourne (status_http, {"type", "available_tags"}) ; status 200 sur hit cache.
+    """
+    forum_id = str(forum_id).strip()
+    if not force_refresh:
+        cached = _forum_cache.get(forum_id)
+        if cached:
+            _forum_cache.hits += 1
+            return 200, cached
+    _forum_cache.misses += 1
+    status, ch = await _discord_get(session, f"/channels/{forum_id}")
+    if status >= 300 or not isinstance(ch, dict):
+        return status, None
+    return status, _forum_cache.set(forum_id, ch.get("type"), ch.get("available_tags") or [])
+
+
 async def get_forum_available_tags(session, forum_id: str) -> Tuple[int, list]:
     """
-    Récupère la liste des tags disponibles d'un salon forum Discord.
+    Récupère la liste des tags disponibles d'un salon forum Discord (cache, REST en secours).
     Retourne (status_http, liste de dict avec id, name, emoji_id?, emoji_name?).
     """
     forum_id = str(forum_id).strip()
     if not forum_id:
         return 400, []
-    status, ch = await _discord_get(session, f"/channels/{forum_id}")
-    if status >= 300:
+    status, meta = await _get_forum_meta(session, forum_id)
+    if status >= 300 or not meta:
         return status, []
-    raw = ch.get("available_tags") or []
     tags = []
-    for t in raw:
+    for t in meta["available_tags"]:
         tags.append({
-            "id": str(t.get("id", "")),
-            "name": (t.get("name") or "").strip(),
+            "id": t["id"],
+            "name": t["name"],
             "emoji_id": t.get("emoji_id"),
             "emoji_name": t.get("emoji_name"),
         })
     return 200, tags
 
 
+def _match_tag_ids(wanted: list, available: list) -> Tuple[list, list]:
+    """(IDs resolus, noms introuvables)."""
+    by_name = {t.get("name", "").lower(): int(t["id"]) for t in available if t.get("id")}
+    applied, missing = [], []
+    for w in wanted:
+        if w.isdigit():
+            applied.append(int(w))
+        elif w.lower() in by_name:
+            applied.append(by_name[w.lower()])
+        else:
+            missing.append(w)
+    return applied, missing
+
+
 async def _resolve_applied_tag_ids(session, forum_id, tags_raw) -> list:
-    """Resout les noms/IDs de tags en IDs Discord."""
+    """Resout les noms/IDs de tags en IDs Discord (cache forum, REST si un nom est inconnu)."""
     wanted = [
         t.strip()
         for t in (tags_raw or "").replace(";", ",").replace("|", ",").split(",")
@@ -217,19 +356,15 @@ async def _resolve_applied_tag_ids(session, forum_id, tags_raw) -> list:
     ]
     if not wanted:
         return []
-    status, ch = await _discord_get(session, f"/channels/{forum_id}")
-    if status >= 300:
+    status, meta = await _get_forum_meta(session, forum_id)
+    if status >= 300 or not meta:
         return []
-    available = ch.get("available_tags", [])
-    applied = []
-    for w in wanted:
-        if w.isdigit():
-            applied.append(int(w))
-        else:
-            for t in available:
-                if t.get("name", "").lower() == w.lower():
-                    applied.append(int(t["id"]))
-                    break
+    applied, missing = _match_tag_ids(wanted, meta["available_tags"])
+    if missing:
+        # Tag cree depuis le dernier evenement gateway recu : relire le salon une fois
+        status, meta = await _get_forum_meta(session, forum_id, force_refresh=True)
+        if status < 300 and meta:
+            applied, _ = _match_tag_ids(wanted, meta["available_tags"])
     return list(dict.fromkeys(applied))
 
 
@@ -239,10 +374,32 @@ async def _fetch_image_from_url(
     session, url: str
 ) -> Optional[Tuple[bytes, str, str]]:
     """
-    Telecharge une image depuis une URL.
+    Telecharge une image depuis une URL (via le cache disque).
     Retourne (bytes, filename, content_type) ou None.
     """
+    fetched = await _fetch_image_with_hash(session, url)
+    return fetched[:3] if fetched else None
+
+
+async def _fetch_image_with_hash(
+    session, url: str
+) -> Optional[Tuple[bytes, str, str, str]]:
+    """
+    Telecharge une image depuis une URL, en passant par le cache disque (image_cache) :
+    - entree recente (< IMAGE_CACHE_FRESH_SECONDS) : aucune requete ;
+    - sinon GET conditionnel (If-None-Match / If-Modified-Since), 304 = contenu du cache.
+    Retourne (bytes, filename, content_type, sha256) ou None.
+    """
+    loop = asyncio.get_event_loop()
     try:
+        cached = await loop.run_in_executor(None, image_cache.lookup, url)
+        if cached and time.time() - cached.get("validated_at", 0) < config.IMAGE_CACHE_FRESH_SECONDS:
+            hit = await loop.run_in_executor(None, image_cache.read, url)
+            if hit:
+                await loop.run_in_executor(None, image_cache.mark_validated, url, True)
+                logger.info("[publisher] Image servie par le cache : %s", url[:60])
+                return hit
+
         headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -273,9 +430,22 @@ async def _fetch_image_from_url(
             urls_to_try.append(mini)
 
         for try_url in urls_to_try:
+            req_headers = dict(headers)
+            if cached and try_url == url:
+                if cached.get("etag"):
+                    req_headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    req_headers["If-Modified-Since"] = cached["last_modified"]
             async with session.get(
-                try_url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)
+                try_url, headers=req_headers, timeout=aiohttp.ClientTimeout(total=30)
             ) as resp:
+                if resp.status == 304 and cached:
+                    hit = await loop.run_in_executor(None, image_cache.read, url)
+                    if hit:
+                        await loop.run_in_executor(None, image_cache.mark_validated, url, False)
+                        logger.info("[publisher] Image inchangee (304), cache utilise : %s", url[:60])
+                        return hit
+                    continue
                 if resp.status >= 400:
                     logger.warning(
                         "[publisher] Echec telechargement image (status %d) : %s",
@@ -305,13 +475,45 @@ async def _fetch_image_from_url(
                 ctype = resp.headers.get("Content-Type") or "image/png"
                 if ";" in ctype:
                     ctype = ctype.split(";")[0].strip()
-                return (data, filename, ctype)
+                etag = resp.headers.get("ETag", "") if try_url == url else ""
+                last_modified = resp.headers.get("Last-Modified", "") if try_url == url else ""
+            sha = await loop.run_in_executor(
+                None, image_cache.store, url, data, filename, ctype, etag, last_modified,
+            )
+            return (data, filename, ctype, sha)
         return None
     except Exception as e:
         logger.warning("[publisher] Exception telechargement image : %s", e)
         return None
 
 
+async def _patch_message_image(
+    session, thread_id: str, message_id: str, content: str, fetched: Tuple[bytes, str, str, str]
+) -> Tuple[int, any]:
+    """
+    Met a jour le contenu d'un message avec son image en piece jointe.
+    Si la meme image (sha256) est deja attachee, PATCH JSON seul : pas de re-upload multipart.
+    """
+    loop = asyncio.get_event_loop()
+    file_bytes, filename, content_type, sha = await loop.run_in_executor(None, optimize_image_sync, fetched)
+    attached = await loop.run_in_executor(None, image_cache.attached_sha, str(thread_id), str(message_id))
+    if attached == sha:
+        image_cache.uploads_skipped += 1
+        logger.info("[publisher] Image identique deja attachee, upload ignore (message %s)", message_id)
+        # Sans champ "attachments", Discord conserve les pieces jointes existantes
+        status, data = await _discord_patch_json(
+            session, f"/channels/{thread_id}/messages/{message_id}",
+            {"content": content or " ", "embeds": []},
+        )
+        return status, data
+    status, data = await _discord_patch_message_with_attachment(
+        session, str(thread_id), str(message_id), content or " ", file_bytes, filename, content_type,
+    )
+    if status < 300:
+        await loop.run_in_executor(None, image_cache.remember_attachment, str(thread_id), str(message_id), sha)
+    return status, data
+
+
 def _strip_image_url_from_content(content: str, image_url: str) -> str:
     """Retire l'URL d'image du contenu texte."""
     final = content or " "
@@ -493,28 +695,36 @@ async def _extract_post_data(thread: discord.Thread) -> Tuple[Optional[str], Opt
 
 # ==================== CREATION POST ====================
 
+async def _prepare_post_image(session, content) -> Tuple[str, Optional[Tuple[bytes, str, str, str]], List[str]]:
+    """
+    Telecharge (cache) et optimise la premiere image du contenu.
+    Retourne (contenu sans l'URL d'image, (bytes, filename, content_type, sha256) ou None, URLs d'images).
+    """
+    image_urls_full = extract_image_urls_from_text(content or "")
+    if not image_urls_full:
+        return content or " ", None, image_urls_full
+    image_url = image_urls_full[0]
+    final_content = _strip_image_url_from_content(content or " ", image_url)
+    fetched = await _fetch_image_with_hash(session, image_url)
+    if not fetched:
+        logger.info("[publisher] Telechargement image echoue, fallback embed : %s", image_url[:60])
+        return final_content, None, image_urls_full
+    prepared = await asyncio.get_event_loop().run_in_executor(None, optimize_image_sync, fetched)
+    logger.info("[publisher] Image en piece jointe : %s", image_url[:60])
+    return final_content, prepared, image_urls_full
+
+
 async def _create_forum_post(
     session, forum_id, title, content, tags_raw, images, metadata_b64=None
 ):
-    applied_tag_ids = await _resolve_applied_tag_ids(session, forum_id, tags_raw)
-
-    image_urls_full = extract_image_urls_from_text(content or "")
+    # Resolution des tags et telechargement de l'image sont independants : en parallele
+    applied_tag_ids, (final_content, prepared, image_urls_full) = await asyncio.gather(
+        _resolve_applied_tag_ids(session, forum_id, tags_raw),
+        _prepare_post_image(session, content),
+    )
 
-    final_content = content or " "
-    use_attachment = False
-    file_bytes, filename, content_type = None, "image.png", "image/png"
-
-    if image_urls_full:
-        image_url = image_urls_full[0]
-        fetched = await _fetch_image_from_url(session, image_url)
-        if fetched:
-            file_bytes, filename, content_type = fetched
-            final_content = _strip_image_url_from_content(content or " ", image_url)
-            use_attachment = True
-            logger.info("[publisher] Image en piece jointe : %s", image_url[:60])
-        else:
-            final_content = _strip_image_url_from_content(content or " ", image_url)
-            logger.info("[publisher] Telechargement image echoue, fallback embed : %s", image_url[:60])
+    use_attachment = prepared is not None
+    file_bytes, filename, content_type, image_sha = prepared or (None, "image.png", "image/png", None)
 
     if use_attachment and file_bytes:
         status, data, _ = await _discord_post_thread_with_attachment(
@@ -539,28 +749,29 @@ async def _create_forum_post(
         return False, {"status": status, "discord": data}
 
     thread_id  = data.get("id")
-    message_id = (data.get("message") or {}).get("id") or data.get("last_message_id")
-    if not message_id and thread_id:
-        try:
-            messages = await _discord_list_messages(session, str(thread_id), limit=5)
-            if messages:
-                message_id = (messages[-1] or {}).get("id")
-        except Exception as e:
-            logger.warning("[publisher] Impossible de recuperer le message de depart (thread %s) : %s", thread_id, e)
+    # Dans un forum, le message de depart porte l'ID du thread : pas de listing de messages
+    message_id = (data.get("message") or {}).get("id") or thread_id
 
     thread_id  = str(thread_id)  if thread_id  is not None else None
     message_id = str(message_id) if message_id is not None else None
 
+    if use_attachment and image_sha and thread_id and message_id:
+        await asyncio.get_event_loop().run_in_executor(
+            None, image_cache.remember_attachment, thread_id, message_id, image_sha,
+        )
+
     if metadata_b64 and thread_id:
         try:
             if len(metadata_b64) > 25000:
                 logger.warning("[publisher] metadata_b64 trop long, message metadata ignore")
             else:
-                await _delete_old_metadata_messages(session, str(thread_id))
+                # Thread tout juste cree : aucun ancien message metadata a nettoyer
                 meta_payload = {"content": " ", "embeds": [_build_metadata_embed(metadata_b64)]}
                 s2, d2, _ = await _discord_post_json(session, f"/channels/{thread_id}/messages", meta_payload)
                 if s2 < 300 and isinstance(d2, dict) and d2.get("id"):
-                    await _discord_suppress_embeds(session, str(thread_id), str(d2["id"]))
+                    await _discord_suppress_embeds(
+                        session, str(thread_id), str(d2["id"]), current_flags=d2.get("flags", 0),
+                    )
                 else:
                     logger.warning("[publisher] Echec creation message metadata (status=%d) : %s", s2, d2)
         except Exception as e:
@@ -713,11 +924,13 @@ async def _reroute_post(
     content: str,
     tags_raw: str,
     metadata_b64: Optional[str],
+    on_created=None,
 ) -> Optional[dict]:
     """
     Re-route un post vers le bon salon forum :
     1. Cree un nouveau thread dans target_forum_id
     2. Supprime l'ancien thread
+    on_created(infos) : attendu entre les deux etapes (ex. point de reprise de l'outbox).
     Retourne les nouvelles infos ou None en cas d'echec.
     """
     logger.info("[publisher] Re-routage : thread %s -> forum %s", old_thread_id, target_forum_id)
@@ -733,6 +946,15 @@ async def _reroute_post(
     new_message_id = result.get("message_id")
     new_thread_url = result.get("thread_url", "")
     logger.info("[publisher] Re-routage : nouveau thread -> %s", new_thread_id)
+    infos = {
+        "thread_id":     new_thread_id,
+        "message_id":    new_message_id,
+        "thread_url":    new_thread_url,
+        "rerouted":      True,
+        "old_thread_id": old_thread_id,
+    }
+    if on_created is not None:
+        await on_created(infos)
 
     from discord_api import _discord_delete_channel
     deleted, del_status = await _discord_delete_channel(session, old_thread_id)
@@ -743,13 +965,7 @@ async def _reroute_post(
             logger.warning("[publisher] Re-routage : echec suppression ancien thread %s (status=%d)",
                            old_thread_id, del_status)
 
-    return {
-        "thread_id":     new_thread_id,
-        "message_id":    new_message_id,
-        "thread_url":    new_thread_url,
-        "rerouted":      True,
-        "old_thread_id": old_thread_id,
-    }
+    return infos
 
 
 # ==================== NETTOYAGE MESSAGES VIDES ====================
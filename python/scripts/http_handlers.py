@@ -30,6 +30,7 @@ from scraper import (
 )
 from image_utils import convert_image_url, batch_convert_images
 from nexus_export import parse_nexus_db
+from f95_rss_feed import get_rss_date, get_rss_feed
 from api_key_auth import _auth_request, LEGACY_KEY_WARNING
 from f95_public_api_client import (
     fetch_public_catalog_bundle,
@@ -39,10 +40,12 @@ from supabase_client import (
     _get_supabase, _fetch_post_by_thread_id_sync,
     _delete_from_supabase_sync, _normalize_history_row,
     _fetch_all_jeux_sync, _dedupe_jeux_by_site, _sync_jeux_to_supabase,
-    _jeux_cache_looks_stale,
+    _jeux_cache_looks_stale, _fetch_jeu_detail_sync, _strip_jeux_long_fields,
+    JEUX_LIST_COLUMNS,
     _norm_nom_url,
     _delete_account_data_sync, _transfer_post_ownership_sync,
     _transfer_profile_data_sync, _relink_scraped_entries_to_catalogue,
+    _refresh_jeux_canonical_sync,
 )
 from discord_api import rate_limiter
 from forum_manager import (
@@ -207,40 +210,13 @@ async def _get_date_from_rss(
     thread_id: int,
 ) -> str | None:
     """
-    Cherche la date de MAJ d'un thread dans le flux RSS F95Zone.
+    Cherche la date de MAJ d'un thread dans le flux RSS F95Zone (cache partagé f95_rss_feed).
     Retourne "YYYY-MM-DD" si trouvé, None sinon.
-    Couvre uniquement les ~90 dernières MAJ — rapide (1 requête HTTP partageable).
+    Couvre uniquement les ~90 dernières MAJ.
     """
-    import re as _re2
-    import xml.etree.ElementTree as ET2
-    from email.utils import parsedate_to_datetime as _ptd
+    return await get_rss_date(thread_id, session)
 
-    RSS_URL = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
-    try:
-        async with session.get(
-            RSS_URL,
-            headers={"User-Agent": "Mozilla/5.0"},
-            timeout=aiohttp.ClientTimeout(total=10),
-        ) as resp:
-            if resp.status != 200:
-                return None
-            xml_text = await resp.text(encoding="utf-8", errors="replace")
-
-        root = ET2.fromstring(xml_text)
-        for item in root.iter("item"):
-            raw = ET2.tostring(item, encoding="unicode")
-            m = _re2.search(r'/threads/(?:[^/]*\.)?(\d+)', raw)
-            if not m or int(m.group(1)) != thread_id:
-                continue
-            pub_raw = (item.findtext("pubDate") or "").strip()
-            try:
-                return _ptd(pub_raw).strftime("%Y-%m-%d") if pub_raw else None
-            except Exception:
-                return None
-        return None
 
-    except Exception:
-        return None
 async def collection_resolve(request):
     from api_server.handlers_collection import collection_resolve as delegated
     return await delegated(request)
@@ -414,6 +390,8 @@ async def update_f95_jeu_synopsis(request):
         res = sb.table("f95_jeux").update(payload).eq("id", jeu_id).execute()
         if not res.data:
             return _with_cors(request, web.json_response({"ok": False, "error": "Ligne non trouvée"}, status=404))
+        # updated_at départage les lignes ex æquo : ligne principale du groupe à jour
+        await asyncio.get_event_loop().run_in_executor(None, _refresh_jeux_canonical_sync, None, [jeu_id])
         return _with_cors(request, web.json_response({"ok": True}))
     except Exception as e:
         logger.exception("[api] PATCH f95_jeux synopsis : %s", e)
@@ -550,20 +528,27 @@ async def jeux_sync_game(request):
 
 
 async def get_jeux(request):
-    """Sert les jeux depuis le cache Supabase (f95_jeux). Fallback sur l'API publique."""
+    """
+    Sert les jeux depuis le cache Supabase (f95_jeux). Fallback sur l'API publique.
+    GET /api/jeux            → projection légère (sans synopsis ni champs longs)
+    GET /api/jeux?fields=full → toutes les colonnes (ancien comportement)
+    Le détail d'un jeu (synopsis inclus) est servi par GET /api/jeux/{id}.
+    """
     is_valid, _, _, _ = await _auth_request(request, "/api/jeux")
     if not is_valid:
         return _with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
 
+    full = (request.query.get("fields") or "").strip().lower() == "full"
     sb = _get_supabase()
     if sb:
         try:
             loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(None, _fetch_all_jeux_sync)
+            columns = "*" if full else JEUX_LIST_COLUMNS
+            # Lignes principales pré-calculées à la sync : aucune déduplication ici
+            data = await loop.run_in_executor(None, _fetch_all_jeux_sync, columns, True)
             if data and not _jeux_cache_looks_stale(data):
-                data = _dedupe_jeux_by_site(data)
                 data = batch_convert_images(data)
-                logger.info("[api] %d jeux depuis Supabase (cache, dédupliqués)", len(data))
+                logger.info("[api] %d jeux depuis Supabase (cache, lignes principales)", len(data))
                 return _with_cors(request, web.json_response({
                     "ok": True, "jeux": data, "count": len(data), "source": "cache",
                 }))
@@ -595,6 +580,8 @@ async def get_jeux(request):
         if isinstance(data, list):
             data = _dedupe_jeux_by_site(data)
             data = batch_convert_images(data)
+            if not full:
+                data = _strip_jeux_long_fields(data)
         logger.info("[api] %d jeux depuis API publique (fallback, dédupliqués)", len(data) if isinstance(data, list) else "?")
         return _with_cors(request, web.json_response({
             "ok": True, "jeux": data,
@@ -606,6 +593,31 @@ async def get_jeux(request):
         return _with_cors(request, web.json_response({"ok": False, "error": str(e)}, status=500))
 
 
+async def get_jeu_detail(request):
+    """
+    Détail complet d'une ligne f95_jeux (synopsis FR/EN et champs longs).
+    GET /api/jeux/{id}
+    Réponse : { ok, jeu } — chargé à la demande depuis la liste légère /api/jeux.
+    """
+    is_valid, _, _, _ = await _auth_request(request, "/api/jeux/{id}")
+    if not is_valid:
+        return _with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
+    try:
+        jeu_id = int(request.match_info.get("id") or "")
+    except ValueError:
+        return _with_cors(request, web.json_response({"ok": False, "error": "id invalide"}, status=400))
+
+    if not _get_supabase():
+        return _with_cors(request, web.json_response({"ok": False, "error": "Supabase non configuré"}, status=500))
+
+    loop = asyncio.get_event_loop()
+    row = await loop.run_in_executor(None, _fetch_jeu_detail_sync, jeu_id)
+    if not row:
+        return _with_cors(request, web.json_response({"ok": False, "error": "Jeu introuvable"}, status=404))
+    row["image"] = convert_image_url(row.get("image") or "")
+    return _with_cors(request, web.json_response({"ok": True, "jeu": row}))
+
+
 async def account_delete(request):
     from api_server.handlers_admin import account_delete as delegated
     return await delegated(request)
@@ -779,66 +791,35 @@ async def get_f95_rss_updates(request):
     Proxy le flux RSS F95Zone pour éviter les restrictions CORS en mode web.
     GET /api/rss/f95-updates
     Réponse : { ok, entries: [{ threadId, url, title, pubDate }], count }
+    Servi depuis le cache partagé f95_rss_feed : l'upstream est appelé au plus
+    une fois par TTL quel que soit le nombre de clients. ETag renvoyé (304 possible).
     """
     is_valid, _, _, _ = await _auth_request(request, "/api/rss/f95-updates")
     if not is_valid:
         return _with_cors(request, web.json_response({"ok": False, "error": "Invalid API key"}, status=401))
 
-    import re
-    import xml.etree.ElementTree as ET
-    from email.utils import parsedate_to_datetime
-
-    RSS_URL = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
-
-    def _extract_id(url: str):
-        m = re.search(r'/threads/(?:[^/]*\.)?(\d+)', url or '')
-        return int(m.group(1)) if m else None
-
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                RSS_URL,
-                headers={"User-Agent": "Mozilla/5.0"},
-                timeout=aiohttp.ClientTimeout(total=15),
-            ) as resp:
-                if resp.status != 200:
-                    return _with_cors(request, web.json_response(
-                        {"ok": False, "error": f"RSS upstream HTTP {resp.status}"},
-                        status=502,
-                    ))
-                xml_text = await resp.text(encoding="utf-8", errors="replace")
-
-        # Parse RSS 2.0 — xml.etree gère bien le namespace vide
-        root = ET.fromstring(xml_text)
-        entries = []
-        for item in root.iter("item"):
-            link     = (item.findtext("link") or "").strip()
-            title    = (item.findtext("title") or "").strip()
-            pub_raw  = (item.findtext("pubDate") or "").strip()
-            tid = _extract_id(link)
-            if not tid:
-                continue
-            try:
-                pub_iso = parsedate_to_datetime(pub_raw).isoformat() if pub_raw else ""
-            except Exception:
-                pub_iso = ""
-            entries.append({
-                "threadId": tid,
-                "url":      link,
-                "title":    title,
-                "pubDate":  pub_iso,
-            })
+        feed = await get_rss_feed()
+        if feed is None:
+            return _with_cors(request, web.json_response(
+                {"ok": False, "error": "RSS upstream indisponible"},
+                status=502,
+            ))
 
-        logger.info("[api] RSS F95 : %d entrées récupérées", len(entries))
-        return _with_cors(request, web.json_response({
+        etag = f'"{feed.digest}"'
+        if request.headers.get("If-None-Match") == etag:
+            return _with_cors(request, web.Response(status=304, headers={"ETag": etag}))
+
+        logger.debug("[api] RSS F95 : %d entrées servies depuis le cache", len(feed.entries))
+        resp = web.json_response({
             "ok":      True,
-            "entries": entries,
-            "count":   len(entries),
-        }))
+            "entries": feed.entries,
+            "count":   len(feed.entries),
+        })
+        resp.headers["ETag"] = etag
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return _with_cors(request, resp)
 
-    except ET.ParseError as e:
-        logger.warning("[api] RSS parse error : %s", e)
-        return _with_cors(request, web.json_response({"ok": False, "error": f"Parse XML : {e}"}, status=500))
     except Exception as e:
         logger.exception("[api] get_f95_rss_updates : %s", e)
         return _with_cors(request, web.json_response({"ok": False, "error": str(e)}, status=500))
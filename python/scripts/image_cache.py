@@ -0,0 +1,286 @@
+"""
+Cache disque des images de publication (téléchargées puis envoyées en pièce jointe Discord).
+Blobs adressés par contenu (sha256), index URL -> blob avec validateurs HTTP (ETag / Last-Modified)
+pour la revalidation conditionnelle, taille totale bornée (éviction LRU).
+Mémorise aussi le blob actuellement attaché à chaque message Discord pour éviter un ré-upload identique.
+Optionnel : réduction / recompression (WebP ou JPEG) avant upload si Pillow est installé (IMAGE_OPTIMIZE).
+Dependances : config, Pillow (optionnel)
+Logger       : [publisher]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import config
+
+try:
+    from PIL import Image
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+logger = logging.getLogger("publisher")
+
+_INDEX_FILENAME = "index.json"
+_MAX_MESSAGE_ENTRIES = 5000
+
+
+class ImageCache:
+    """
+    Index JSON + blobs sur disque. Accès protégé par un Lock (appelé depuis l'executor).
+    index["urls"][url]        = {sha256, filename, content_type, etag, last_modified, validated_at}
+    index["blobs"][sha256]    = {size, last_used}
+    index["messages"][key]    = sha256 de la pièce jointe actuellement sur le message (key = "thread/message")
+    index["derived"][key]     = {sha256, filename, content_type} version optimisée (key = sha256 source + réglages)
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[dict] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.uploads_skipped = 0
+
+    # ── Index ────────────────────────────────────────────────────────────────
+
+    def _load(self) -> dict:
+        if self._index is None:
+            try:
+                self._index = json.loads((self._dir / _INDEX_FILENAME).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._index = {}
+            except Exception as e:
+                logger.warning("[publisher] Index du cache image illisible, réinitialisation : %s", e)
+                self._index = {}
+            for key in ("urls", "blobs", "messages", "derived"):
+                self._index.setdefault(key, {})
+        return self._index
+
+    def _save(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._dir / (_INDEX_FILENAME + ".tmp")
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._dir / _INDEX_FILENAME)
+
+    # ── Lecture / écriture ───────────────────────────────────────────────────
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Entrée d'index pour une URL (copie) si son blob est présent, sinon None."""
+        if self._max_bytes <= 0:
+            return None
+        with self._lock:
+            index = self._load()
+            entry = index["urls"].get(url)
+            if not entry or not (self._dir / entry["sha256"]).is_file():
+                return None
+            return dict(entry)
+
+    def read(self, url: str) -> Optional[tuple[bytes, str, str, str]]:
+        """(bytes, filename, content_type, sha256) depuis le disque, None si absent."""
+        entry = self.lookup(url)
+        if not entry:
+            return None
+        try:
+            data = (self._dir / entry["sha256"]).read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            blob = self._load()["blobs"].get(entry["sha256"])
+            if blob is not None:
+                blob["last_used"] = time.time()
+        return data, entry["filename"], entry["content_type"], entry["sha256"]
+
+    def mark_validated(self, url: str, hit: bool) -> None:
+        """Note une revalidation 304 (hit=False) ou un usage sans requête (hit=True)."""
+        with self._lock:
+            entry = self._load()["urls"].get(url)
+            if entry is not None:
+                entry["validated_at"] = time.time()
+            if hit:
+                self.hits += 1
+            else:
+                self.revalidated += 1
+            self._save()
+
+    def store(self, url: str, data: bytes, filename: str, content_type: str,
+              etag: str = "", last_modified: str = "") -> str:
+        """Écrit le blob (si nouveau), met à jour l'index et évince si besoin. Retourne le sha256."""
+        sha = hashlib.sha256(data).hexdigest()
+        self.misses += 1
+        if self._max_bytes <= 0 or len(data) > self._max_bytes:
+            return sha
+        with self._lock:
+            index = self._load()
+            self._dir.mkdir(parents=True, exist_ok=True)
+            blob_path = self._dir / sha
+            if not blob_path.is_file():
+                tmp = self._dir / (sha + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, blob_path)
+            index["blobs"][sha] = {"size": len(data), "last_used": time.time()}
+            index["urls"][url] = {
+                "sha256":        sha,
+                "filename":      filename,
+                "content_type":  content_type,
+                "etag":          etag,
+                "last_modified": last_modified,
+                "validated_at":  time.time(),
+            }
+            self._evict(index)
+            self._save()
+        return sha
+
+    def _evict(self, index: dict) -> None:
+        total = sum(b.get("size", 0) for b in index["blobs"].values())
+        if total <= self._max_bytes:
+            return
+        for sha, blob in sorted(index["blobs"].items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if total <= self._max_bytes:
+                break
+            try:
+                (self._dir / sha).unlink()
+            except FileNotFoundError:
+                pass
+            total -= blob.get("size", 0)
+            del index["blobs"][sha]
+        # URLs / versions optimisées dont le blob a disparu : plus utilisables
+        index["urls"] = {u: e for u, e in index["urls"].items() if e.get("sha256") in index["blobs"]}
+        index["derived"] = {k: e for k, e in index["derived"].items() if e.get("sha256") in index["blobs"]}
+
+    # ── Versions optimisées ──────────────────────────────────────────────────
+
+    def read_derived(self, key: str) -> Optional[tuple[bytes, str, str, str]]:
+        with self._lock:
+            entry = self._load()["derived"].get(key)
+        if not entry:
+            return None
+        try:
+            data = (self._dir / entry["sha256"]).read_bytes()
+        except OSError:
+            return None
+        return data, entry["filename"], entry["content_type"], entry["sha256"]
+
+    def store_derived(self, key: str, data: bytes, filename: str, content_type: str) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        if self._max_bytes <= 0 or len(data) > self._max_bytes:
+            return sha
+        with self._lock:
+            index = self._load()
+            self._dir.mkdir(parents=True, exist_ok=True)
+            blob_path = self._dir / sha
+            if not blob_path.is_file():
+                tmp = self._dir / (sha + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, blob_path)
+            index["blobs"][sha] = {"size": len(data), "last_used": time.time()}
+            index["derived"][key] = {"sha256": sha, "filename": filename, "content_type": content_type}
+            self._evict(index)
+            self._save()
+        return sha
+
+    # ── Pièces jointes déjà envoyées ─────────────────────────────────────────
+
+    def attached_sha(self, thread_id: str, message_id: str) -> Optional[str]:
+        with self._lock:
+            return self._load()["messages"].get(f"{thread_id}/{message_id}")
+
+    def remember_attachment(self, thread_id: str, message_id: str, sha: str) -> None:
+        with self._lock:
+            messages = self._load()["messages"]
+            key = f"{thread_id}/{message_id}"
+            messages.pop(key, None)
+            messages[key] = sha
+            while len(messages) > _MAX_MESSAGE_ENTRIES:
+                messages.pop(next(iter(messages)))
+            self._save()
+
+    def get_info(self) -> dict:
+        with self._lock:
+            index = self._load()
+            return {
+                "urls":            len(index["urls"]),
+                "blobs":           len(index["blobs"]),
+                "bytes":           sum(b.get("size", 0) for b in index["blobs"].values()),
+                "max_bytes":       self._max_bytes,
+                "hits":            self.hits,
+                "revalidated":     self.revalidated,
+                "misses":          self.misses,
+                "uploads_skipped": self.uploads_skipped,
+            }
+
+
+def _recompress(data: bytes, fmt: str, max_dim: int, quality: int) -> Optional[tuple[bytes, str]]:
+    """Réduit (côté le plus long <= max_dim) et réencode en WebP / JPEG. None si non applicable."""
+    import io
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, "is_animated", False):
+            return None
+        img.load()
+        if max(img.size) > max_dim:
+            img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+        if fmt == "jpeg":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            ext = "jpg"
+        else:
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+            ext = "webp"
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), quality=quality, optimize=True)
+        return out.getvalue(), ext
+
+
+def optimize_image_sync(
+    fetched: tuple[bytes, str, str, str],
+) -> tuple[bytes, str, str, str]:
+    """
+    Version optimisée d'une image (bytes, filename, content_type, sha256) avant upload Discord,
+    mise en cache par sha256 source + réglages. Renvoie l'original si l'option est désactivée,
+    si Pillow est absent, pour les GIF animés, en cas d'erreur ou si le résultat n'est pas plus petit.
+    Bloquant (décodage / encodage) : à appeler via run_in_executor.
+    """
+    data, filename, content_type, sha = fetched
+    if not config.IMAGE_OPTIMIZE or not _PIL_AVAILABLE:
+        return fetched
+    fmt = config.IMAGE_OPTIMIZE_FORMAT
+    key = f"{sha}:{fmt}:{config.IMAGE_OPTIMIZE_MAX_DIM}:{config.IMAGE_OPTIMIZE_QUALITY}"
+    cached = image_cache.read_derived(key)
+    if cached:
+        return cached
+    try:
+        result = _recompress(data, fmt, config.IMAGE_OPTIMIZE_MAX_DIM, config.IMAGE_OPTIMIZE_QUALITY)
+    except Exception as e:
+        logger.warning("[publisher] Optimisation image impossible (%s) : %s", filename, e)
+        return fetched
+    if not result or len(result[0]) >= len(data):
+        return fetched
+    new_data, ext = result
+    new_name = f"{filename.rsplit('.', 1)[0] or 'image'}.{ext}"
+    new_type = "image/jpeg" if fmt == "jpeg" else "image/webp"
+    new_sha = image_cache.store_derived(key, new_data, new_name, new_type)
+    logger.info("[publisher] Image optimisee : %s %d Ko -> %s %d Ko",
+                filename, len(data) // 1024, new_name, len(new_data) // 1024)
+    return new_data, new_name, new_type, new_sha
+
+
+image_cache = ImageCache(
+    directory=Path(config.IMAGE_CACHE_DIR),
+    max_bytes=config.IMAGE_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def get_image_cache_info() -> dict:
+    """Statistiques du cache image (entrées, octets, hits / revalidations / téléchargements)."""
+    return image_cache.get_info()
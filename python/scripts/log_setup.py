@@ -0,0 +1,145 @@
+"""
+Pipeline de logs non bloquant : les modules écrivent dans une file (QueueHandler),
+un thread dédié (QueueListener) se charge de stdout, de l'écriture disque et de la rotation.
+Limitation de débit optionnelle des lignes INFO/DEBUG très fréquentes (LOG_RATE_LIMITS).
+Dependances : config
+Logger       : [orchestrator]
+"""
+
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+
+logger = logging.getLogger("orchestrator")
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] [%(name)s] %(message)s"
+_LOG_MAX_BYTES = 5 * 1024 * 1024
+_LOG_BACKUP_COUNT = 3
+
+_listener: Optional[QueueListener] = None
+
+
+def parse_rate_limits(raw: str) -> List[Tuple[str, str, int]]:
+    """
+    "api:[REQUEST]=20,work_tracking=10" -> [(logger, préfixe du message, lignes/seconde)].
+    Le logger couvre aussi ses enfants (api -> api.xxx) ; préfixe vide = toutes les lignes.
+    Les entrées invalides sont ignorées.
+    """
+    rules: List[Tuple[str, str, int]] = []
+    for part in (raw or "").split(","):
+        target, sep, limit = part.strip().rpartition("=")
+        if not sep or not target.strip() or not limit.strip().isdigit():
+            continue
+        name, _, prefix = target.strip().partition(":")
+        rules.append((name.strip(), prefix, int(limit)))
+    # Règles les plus précises d'abord (préfixe, puis logger le plus long)
+    rules.sort(key=lambda r: (not r[1], -len(r[0])))
+    return rules
+
+
+class _RateLimitFilter(logging.Filter):
+    """
+    Fenêtre d'une seconde par règle : au-delà de la limite, les lignes INFO/DEBUG sont
+    écartées ; la première ligne acceptée ensuite indique combien ont été omises.
+    WARNING et au-dessus ne sont jamais filtrés.
+    """
+
+    def __init__(self, rules: List[Tuple[str, str, int]]):
+        super().__init__()
+        self._rules = rules
+        self._lock = threading.Lock()
+        self._windows: Dict[int, List[float]] = {}   # index règle -> [début fenêtre, acceptées, omises]
+        self.dropped = 0
+
+    def _match(self, record: logging.LogRecord) -> Optional[int]:
+        msg = record.msg if isinstance(record.msg, str) else ""
+        for i, (name, prefix, _) in enumerate(self._rules):
+            if name and record.name != name and not record.name.startswith(name + "."):
+                continue
+            if prefix and not msg.startswith(prefix):
+                continue
+            return i
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        idx = self._match(record)
+        if idx is None:
+            return True
+        limit = self._rules[idx][2]
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(idx, [now, 0, 0])
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            if window[1] >= limit:
+                window[2] += 1
+                self.dropped += 1
+                return False
+            window[1] += 1
+            omitted, window[2] = window[2], 0
+        if omitted:
+            record.msg = f"{record.getMessage()} [+{omitted} ligne(s) similaire(s) omise(s)]"
+            record.args = None
+        return True
+
+
+def setup_logging(log_file: Path) -> QueueListener:
+    """
+    Configure le logger racine : un QueueHandler (seul handler côté appelant, non bloquant)
+    alimente un QueueListener qui écrit sur stdout et dans log_file (rotation 5 Mo, 3 backups).
+    Le listener est arrêté (file vidée) à la sortie du processus.
+    """
+    global _listener
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=_LOG_MAX_BYTES, backupCount=_LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    rules = parse_rate_limits(config.LOG_RATE_LIMITS)
+    if rules:
+        queue_handler.addFilter(_RateLimitFilter(rules))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    if rules:
+        logger.info(
+            "[orchestrator] Limitation des logs : %s",
+            ", ".join(f"{n or '*'}{':' + p if p else ''}={l}/s" for n, p, l in rules),
+        )
+    return _listener
+
+
+def get_logging_info() -> dict:
+    """Etat du pipeline de logs (lignes en attente d'écriture, lignes omises par la limitation)."""
+    root = logging.getLogger()
+    dropped = 0
+    pending = 0
+    for handler in root.handlers:
+        if isinstance(handler, QueueHandler):
+            pending = handler.queue.qsize()
+            dropped += sum(getattr(f, "dropped", 0) for f in handler.filters)
+    return {"listener_running": _listener is not None, "pending": pending, "rate_limited": dropped}
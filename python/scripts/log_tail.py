@@ -0,0 +1,308 @@
+"""
+Lecture du fichier de logs du bot (logs/bot.log) sans le charger en entier.
+Dernières lignes lues depuis la fin du fichier (seek par blocs), index incrémental
+des user_id vus dans les lignes [REQUEST] (seuls les octets ajoutés depuis le dernier
+appel sont relus ; remise à zéro à la rotation du fichier).
+Diffusion en direct (SSE) : une seule lecture par source (fichier suivi, journalctl -f)
+redistribuée à tous les abonnés, avec historique récent en mémoire.
+Dependances : aucune
+Logger       : [api]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("api")
+
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def read_tail_lines(path: Path, max_lines: int) -> list[str]:
+    """Dernières max_lines lignes du fichier (fins de ligne conservées), lues depuis la fin."""
+    if max_lines <= 0:
+        return []
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        return _tail_from(fh, fh.tell(), max_lines)
+
+
+def _tail_from(fh, end: int, max_lines: int) -> list[str]:
+    position = end
+    data = b""
+    # max_lines + 1 sauts de ligne : la première ligne du bloc peut être tronquée
+    while position > 0 and data.count(b"\n") <= max_lines:
+        step = min(_TAIL_BLOCK_SIZE, position)
+        position -= step
+        fh.seek(position)
+        data = fh.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return lines[-max_lines:]
+
+
+def extract_request_user_id(line: str) -> str | None:
+    """user_id d'une ligne « [REQUEST] ip | user_id | clé | méthode chemin », None si absent."""
+    if "[REQUEST]" not in line:
+        return None
+    parts = line.split(" | ")
+    if len(parts) < 2:
+        return None
+    user_id = parts[1].strip()
+    if user_id != "NULL" and len(user_id) >= 32 and "-" in user_id:
+        return user_id
+    return None
+
+
+class _LogUserIndex:
+    """Ensemble des user_id du fichier courant, mis à jour en ne lisant que la partie ajoutée."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file_id: tuple[int, int] | None = None
+        self._offset = 0
+        self._partial = b""
+        self._user_ids: set[str] = set()
+
+    def scan(self, path: Path) -> set[str]:
+        with self._lock:
+            stat = path.stat()
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != self._file_id or stat.st_size < self._offset:
+                # Nouveau fichier (rotation) ou tronqué : on repart de zéro
+                self._file_id = file_id
+                self._offset = 0
+                self._partial = b""
+                self._user_ids = set()
+            if stat.st_size > self._offset:
+                with open(path, "rb") as fh:
+                    fh.seek(self._offset)
+                    chunk = fh.read(stat.st_size - self._offset)
+                self._offset += len(chunk)
+                data = self._partial + chunk
+                complete, _, self._partial = data.rpartition(b"\n")
+                for raw in complete.split(b"\n"):
+                    user_id = extract_request_user_id(raw.decode("utf-8", errors="replace"))
+                    if user_id:
+                        self._user_ids.add(user_id)
+            return set(self._user_ids)
+
+
+_user_index = _LogUserIndex()
+
+
+def get_log_user_ids(path: Path) -> set[str]:
+    """user_id distincts des lignes [REQUEST] du fichier de logs (index incrémental partagé)."""
+    return _user_index.scan(path)
+
+
+# ==================== DIFFUSION EN DIRECT ====================
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+_LEVEL_RE = re.compile(r"\[(DEBUG|INFO|WARNING|ERROR|CRITICAL)\]")
+_HISTORY_LINES = 1000
+_FILE_POLL_SECONDS = 1.0
+_SUBSCRIBER_QUEUE = 2000
+JOURNAL_UNIT = "discord-bot-traductions"
+
+
+@dataclass
+class LogRecord:
+    source: str   # "file" | "journal"
+    line:   str
+    level:  int   # niveau de la ligne (ou de la précédente pour les tracebacks)
+
+
+@dataclass
+class LogFilter:
+    min_level: int = 0
+    user_id:   str = ""
+
+    def accepts(self, record: LogRecord) -> bool:
+        if record.level < self.min_level:
+            return False
+        return not self.user_id or self.user_id in record.line
+
+
+class _LogSource:
+    """Une source suivie (fichier ou journalctl) : historique + abonnés ; lecture démarrée au 1er abonné."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.history: collections.deque[LogRecord] = collections.deque(maxlen=_HISTORY_LINES)
+        self.subscribers: set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self._last_level = LOG_LEVELS["INFO"]
+        self.dropped = 0
+
+    def publish(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if not line:
+            return
+        m = _LEVEL_RE.search(line)
+        if m:
+            self._last_level = LOG_LEVELS[m.group(1)]
+        record = LogRecord(source=self.name, line=line, level=self._last_level)
+        self.history.append(record)
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(record)
+            except asyncio.QueueFull:
+                # Abonné trop lent : on perd des lignes pour lui plutôt que de bloquer la source
+                self.dropped += 1
+
+
+class LogBroadcaster:
+    """
+    Lecteurs partagés : le fichier et journalctl ne sont lus qu'une fois quel que soit
+    le nombre de clients connectés. Arrêt automatique au départ du dernier abonné.
+    """
+
+    def __init__(self, log_file: Path):
+        self._log_file = log_file
+        self._sources = {"file": _LogSource("file"), "journal": _LogSource("journal")}
+
+    async def subscribe(self, source: str) -> tuple[list[LogRecord], asyncio.Queue]:
+        """
+        Historique courant + file des nouvelles lignes (sans trou ni doublon entre les deux).
+        Le premier abonné déclenche la lecture initiale de l'historique puis le suivi.
+        """
+        src = self._sources[source]
+        async with src.lock:
+            if src.task is None or src.task.done():
+                src.history.clear()
+                starter = self._start_file if source == "file" else self._start_journal
+                src.task = await starter(src)
+            backlog = list(src.history)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE)
+            src.subscribers.add(queue)
+        return backlog, queue
+
+    def unsubscribe(self, source: str, queue: asyncio.Queue) -> None:
+        src = self._sources[source]
+        src.subscribers.discard(queue)
+        if src.lock.locked():
+            # Démarrage en cours (subscribe amorce l'historique) : l'abonné qui l'a lancé
+            # sera inscrit à la sortie du verrou, pas d'arrêt ni de purge de l'historique ici
+            return
+        if not src.subscribers and src.task is not None:
+            src.task.cancel()
+            src.task = None
+            src.history.clear()
+
+    # ── Fichier ──────────────────────────────────────────────────────────────
+
+    async def _start_file(self, src: _LogSource) -> asyncio.Task:
+        loop = asyncio.get_event_loop()
+        state = {"file_id": None, "offset": 0, "partial": b""}
+
+        def _prime() -> list[str]:
+            if not self._log_file.exists():
+                return []
+            with open(self._log_file, "rb") as fh:
+                stat = os.fstat(fh.fileno())
+                state["file_id"] = (stat.st_dev, stat.st_ino)
+                state["offset"] = stat.st_size
+                return _tail_from(fh, stat.st_size, _HISTORY_LINES)
+
+        for line in await loop.run_in_executor(None, _prime):
+            src.publish(line)
+        return asyncio.create_task(self._follow_file(src, state), name="task_log_tail_file")
+
+    async def _follow_file(self, src: _LogSource, state: dict) -> None:
+        loop = asyncio.get_event_loop()
+
+        def _read_new() -> list[str]:
+            try:
+                stat = self._log_file.stat()
+            except FileNotFoundError:
+                return []
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != state["file_id"] or stat.st_size < state["offset"]:
+                # Rotation ou troncature : relecture du nouveau fichier depuis le début
+                state["file_id"], state["offset"], state["partial"] = file_id, 0, b""
+            if stat.st_size <= state["offset"]:
+                return []
+            with open(self._log_file, "rb") as fh:
+                fh.seek(state["offset"])
+                chunk = fh.read(stat.st_size - state["offset"])
+            state["offset"] += len(chunk)
+            complete, _, state["partial"] = (state["partial"] + chunk).rpartition(b"\n")
+            return complete.decode("utf-8", errors="replace").split("\n") if complete else []
+
+        try:
+            while True:
+                await asyncio.sleep(_FILE_POLL_SECONDS)
+                for line in await loop.run_in_executor(None, _read_new):
+                    src.publish(line)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("[api] Suivi du fichier de logs interrompu : %s", e)
+
+    # ── journalctl ───────────────────────────────────────────────────────────
+
+    async def _start_journal(self, src: _LogSource) -> Optional[asyncio.Task]:
+        """Historique via journalctl -n (avec curseur), puis suivi -f à partir de ce curseur."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "journalctl", "-u", JOURNAL_UNIT, "-n", str(_HISTORY_LINES),
+                "--no-pager", "-o", "short", "--show-cursor",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10.0)
+        except FileNotFoundError:
+            src.publish("[ERROR] journalctl non disponible sur ce système")
+            return None
+        except asyncio.TimeoutError:
+            proc.kill()
+            src.publish("[ERROR] Timeout : journalctl a mis trop de temps à répondre")
+            return None
+        cursor = ""
+        for line in stdout.decode("utf-8", errors="replace").splitlines():
+            if line.startswith("-- cursor: "):
+                cursor = line[len("-- cursor: "):].strip()
+            else:
+                src.publish(line)
+        return asyncio.create_task(self._follow_journal(src, cursor), name="task_log_tail_journal")
+
+    async def _follow_journal(self, src: _LogSource, cursor: str) -> None:
+        args = ["journalctl", "-u", JOURNAL_UNIT, "-f", "--no-pager", "-o", "short"]
+        args += [f"--after-cursor={cursor}"] if cursor else ["-n", "0"]
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            )
+            while True:
+                raw = await proc.stdout.readline()
+                if not raw:
+                    break
+                src.publish(raw.decode("utf-8", errors="replace"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("[api] Suivi journalctl interrompu : %s", e)
+        finally:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+
+    def get_info(self) -> dict:
+        return {
+            name: {
+                "subscribers": len(src.subscribers),
+                "history":     len(src.history),
+                "running":     src.task is not None and not src.task.done(),
+                "dropped":     src.dropped,
+            }
+            for name, src in self._sources.items()
+        }
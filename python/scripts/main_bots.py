@@ -1,7 +1,7 @@
 """
 Point d'entree principal — orchestre le demarrage de tous les bots et du serveur web.
 Logique de retry/backoff dans bot_lifecycle.py
-Dependances : bot_lifecycle, publisher_bot, bot_frelon, http_handlers, supabase_client
+Dependances : bot_lifecycle, publisher_bot, bot_frelon, http_handlers, supabase_client, log_setup
 Logger       : [orchestrator]
 """
 
@@ -11,7 +11,6 @@ import asyncio
 import logging
 import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 
 # Charger .env : _ignored/ prioritaire, puis racine python/
@@ -31,19 +30,9 @@ LOG_DIR  = _PYTHON_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / "bot.log"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
-
-file_handler = RotatingFileHandler(
-    LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
-)
-file_handler.setFormatter(
-    logging.Formatter("%(asctime)s [%(levelname)s] [%(name)s] %(message)s")
-)
-logging.getLogger().addHandler(file_handler)
+# Ecriture disque / stdout / rotation sur un thread dedie (QueueListener)
+from log_setup import setup_logging
+setup_logging(LOG_FILE)
 
 # Reduire le bruit aiohttp
 logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
@@ -56,6 +45,7 @@ from bot_lifecycle import start_bot_with_backoff, wait_ready
 from bot_frelon import bot as bot_frelon
 from publisher_bot import bot as publisher_bot
 from api_server import make_app
+from discord_outbox import start_discord_outbox
 from supabase_client import _init_supabase, _get_supabase
 from config import config
 
@@ -120,6 +110,9 @@ async def start():
     await asyncio.get_event_loop().run_in_executor(None, _init_supabase)
     logger.info("[orchestrator] Client Supabase initialise")
 
+    # Outbox Discord : reprise des jobs non termines (necessite Supabase)
+    await start_discord_outbox()
+
     # ── 3. Resume routing ─────────────────────────────────────────────────────
     routing = await _fetch_routing_summary()
     logger.info("=" * 60)
@@ -0,0 +1,296 @@
+"""
+Métriques au format texte Prometheus (sans dépendance externe) : latences des routes HTTP,
+appels sortants (Supabase, Discord REST, F95, Google Translate), durées / résultats des
+tâches planifiées. Exposées par GET /metrics avec les statistiques des caches.
+Dependances : aucune
+Logger       : [api]
+"""
+
+import contextvars
+import functools
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("api")
+
+_HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# Les appels Supabase passent par des threads d'executor : verrou commun à toutes les séries
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name, self.help, self.label_names = name, help_text, label_names
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple, value: float = 1.0) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+        return lines
+
+
+class _Gauge:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name, self.help, self.label_names = name, help_text, label_names
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, labels: Tuple, value: float) -> None:
+        with _lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with _lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+        return lines
+
+
+class _Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name, self.help, self.label_names, self.buckets = name, help_text, label_names, buckets
+        self._series: Dict[Tuple, List[float]] = {}   # labels -> [compteurs par bucket..., somme, total]
+
+    def observe(self, labels: Tuple, seconds: float) -> None:
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {_number(count)}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, inf)} {_number(series[-1])}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {repr(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {_number(series[-1])}")
+        return lines
+
+
+_http_duration = _Histogram(
+    "publisher_http_request_duration_seconds", "Durée de traitement des requêtes HTTP par route.",
+    ("method", "route", "status"), _HTTP_BUCKETS,
+)
+_upstream_requests = _Counter(
+    "publisher_upstream_requests_total", "Appels sortants par service, opération et résultat.",
+    ("service", "operation", "outcome"),
+)
+_upstream_duration = _Histogram(
+    "publisher_upstream_request_duration_seconds", "Latence des appels sortants par service.",
+    ("service", "operation"), _HTTP_BUCKETS,
+)
+_job_runs = _Counter(
+    "publisher_job_runs_total", "Exécutions des tâches planifiées par résultat.", ("job", "outcome"),
+)
+_job_duration = _Histogram(
+    "publisher_job_duration_seconds", "Durée des exécutions des tâches planifiées.", ("job",), _JOB_BUCKETS,
+)
+_job_last_success = _Gauge(
+    "publisher_job_last_success_timestamp_seconds", "Horodatage Unix de la dernière exécution réussie.",
+    ("job",),
+)
+
+
+def status_outcome(status: Optional[int]) -> str:
+    """Classe de statut HTTP ("2xx", "4xx"…) ; "error" sans réponse (exception réseau, timeout)."""
+    return f"{status // 100}xx" if status else "error"
+
+
+# ==================== HTTP ENTRANT ====================
+
+def observe_http_request(method: str, route: str, status: int, seconds: float) -> None:
+    _http_duration.observe((method, route, status_outcome(status)), seconds)
+
+
+# ==================== APPELS SORTANTS ====================
+
+def observe_upstream(service: str, operation: str, outcome: str, seconds: float) -> None:
+    _upstream_requests.inc((service, operation, outcome))
+    _upstream_duration.observe((service, operation), seconds)
+
+
+class _UpstreamCall:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status: Optional[int] = None
+
+
+@contextmanager
+def track_upstream(service: str, operation: str) -> Iterator[_UpstreamCall]:
+    """
+    Chronomètre un appel sortant ; l'appelant renseigne call.status avec le statut HTTP reçu.
+    Sans statut (exception réseau, timeout, annulation avant réponse) : "error". Les exceptions sont propagées.
+    """
+    call = _UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        observe_upstream(service, operation, status_outcome(call.status), time.perf_counter() - started)
+
+
+_SNOWFLAKE_RE = re.compile(r"/\d{6,}")
+
+
+def discord_route(method: str, path: str) -> str:
+    """Ex. "PATCH /channels/123/messages/456" -> "PATCH /channels/{id}/messages/{id}" (cardinalité bornée)."""
+    return f"{method} {_SNOWFLAKE_RE.sub('/{id}', path.split('?', 1)[0])}"
+
+
+_STARTED_KEY = "publisher_metrics_started"
+
+
+def install_httpx_metrics(client, service: str) -> None:
+    """
+    Ajoute des event hooks à un httpx.Client (client PostgREST de Supabase) :
+    une mesure par réponse, opération = "METHODE table" (ou rpc/fonction).
+    Les erreurs réseau sans réponse ne passent pas par ces hooks.
+    """
+    def _on_request(request) -> None:
+        request.extensions[_STARTED_KEY] = time.perf_counter()
+
+    def _on_response(response) -> None:
+        request = response.request
+        started = request.extensions.get(_STARTED_KEY)
+        if started is None:
+            return
+        resource = request.url.path.split("/rest/v1/", 1)[-1].strip("/") or "/"
+        observe_upstream(
+            service, f"{request.method} {resource}",
+            status_outcome(response.status_code), time.perf_counter() - started,
+        )
+
+    hooks = client.event_hooks
+    hooks.setdefault("request", []).append(_on_request)
+    hooks.setdefault("response", []).append(_on_response)
+    client.event_hooks = hooks
+
+
+# ==================== TACHES PLANIFIEES ====================
+
+class _JobRun:
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+_current_job: contextvars.ContextVar[Optional[_JobRun]] = contextvars.ContextVar("publisher_job", default=None)
+
+
+def mark_job_failed() -> None:
+    """À appeler dans les except des tâches qui absorbent leurs erreurs : l'exécution comptera "error"."""
+    run = _current_job.get()
+    if run is not None:
+        run.failed = True
+
+
+def instrument_job(name: str):
+    """
+    Décorateur (sous @tasks.loop) : durée de chaque exécution + résultat ok / error.
+    Une exception non interceptée est comptée puis propagée telle quelle.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            run = _JobRun()
+            token = _current_job.set(run)
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                run.failed = True
+                raise
+            finally:
+                _current_job.reset(token)
+                outcome = "error" if run.failed else "ok"
+                _job_runs.inc((name, outcome))
+                _job_duration.observe((name,), time.perf_counter() - started)
+                if not run.failed:
+                    _job_last_success.set((name,), time.time())
+            return result
+        return wrapper
+    return decorator
+
+
+# ==================== EXPOSITION ====================
+
+def _flatten_info(prefix: str, info: dict) -> Iterator[Tuple[str, float]]:
+    for key, value in info.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten_info(f"{name}_", value)
+        elif isinstance(value, bool):
+            yield name, float(value)
+        elif isinstance(value, (int, float)):
+            yield name, float(value)
+
+
+def _hit_ratio(info: dict) -> Optional[float]:
+    """hits / (hits + misses) ; les compteurs "*_hits" (mémoire locale / distante) sont additionnés."""
+    if "misses" not in info:
+        return None
+    hits = sum(v for k, v in info.items() if (k == "hits" or k.endswith("_hits")) and isinstance(v, (int, float)))
+    total = hits + (info.get("misses") or 0)
+    return hits / total if total else None
+
+
+def render_metrics(components: Dict[str, dict]) -> str:
+    """Texte d'exposition Prometheus ; components = {nom: dict get_*_info()} pour les jauges."""
+    stats = _Gauge(
+        "publisher_component_stat", "Statistiques des composants (tailles de cache, files, compteurs).",
+        ("component", "stat"),
+    )
+    ratios = _Gauge("publisher_cache_hit_ratio", "Ratio de hits des caches mémoire / disque.", ("component",))
+    for component, info in components.items():
+        for stat, value in _flatten_info("", info or {}):
+            stats.set((component, stat), value)
+        ratio = _hit_ratio(info or {})
+        if ratio is not None:
+            ratios.set((component,), ratio)
+
+    lines: List[str] = []
+    for metric in (
+        _http_duration, _upstream_requests, _upstream_duration,
+        _job_runs, _job_duration, _job_last_success, stats, ratios,
+    ):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
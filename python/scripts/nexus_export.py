@@ -9,6 +9,7 @@ Usage CLI (optionnel, pour générer un fichier JSON depuis le terminal) :
 
 import sys
 import json
+import re
 import sqlite3
 from pathlib import Path
 
@@ -95,6 +96,29 @@ def _dedup_priority(game_site: str | None) -> str:
     return "C"
 
 
+_THREAD_ID_RE = re.compile(r"/threads/(?:[^/?#]*\.)?(\d+)(?:[/?#]|$)")
+
+
+def _norm_thread_url(url: str | None) -> str | None:
+    """URL de thread comparable : sans schéma, www, query, fragment ni / final ; minuscules."""
+    if not url or not isinstance(url, str):
+        return None
+    u = url.strip().lower().split("#", 1)[0].split("?", 1)[0]
+    for prefix in ("https://", "http://"):
+        if u.startswith(prefix):
+            u = u[len(prefix):]
+    if u.startswith("www."):
+        u = u[4:]
+    u = u.rstrip("/")
+    return u or None
+
+
+def _thread_id_from_url(url: str | None) -> int | None:
+    """ID de thread XenForo d'une URL (…/threads/nom.12345/ ou …/threads/12345/)."""
+    m = _THREAD_ID_RE.search(url or "")
+    return int(m.group(1)) if m else None
+
+
 # ==================== PARSING PRINCIPAL ====================
 
 def parse_nexus_db(db_path: str) -> dict:
@@ -224,10 +248,27 @@ def parse_nexus_db(db_path: str) -> dict:
         else:
             skipped_rawg += 1
 
+    # Index construits une fois (lookup O(1) au lieu d'un any() par entrée) : une entrée Lewdcorner
+    # seule est écartée si une entrée F95 pointe déjà vers le même thread Lewdcorner, par ID
+    # (colonne ou ID lu dans lien_lewdcorner) ou par URL normalisée.
+    # Pas d'index par titre : les titres Nexus sont libres et non uniques (remakes, homonymes
+    # d'autres développeurs) ; les fusionner supprimerait des jeux distincts de la collection.
+    lc_ids_covered: set[int] = set()
+    lc_urls_covered: set[str] = set()
+    for e in seen_f95.values():
+        if e["lewdcorner_thread_id"]:
+            lc_ids_covered.add(e["lewdcorner_thread_id"])
+        url_id = _thread_id_from_url(e["lewdcorner_url"])
+        if url_id:
+            lc_ids_covered.add(url_id)
+        norm_url = _norm_thread_url(e["lewdcorner_url"])
+        if norm_url:
+            lc_urls_covered.add(norm_url)
     result: list[dict] = list(seen_f95.values())
-    for lc_id, entry in seen_lc.items():
-        if not any(e["lewdcorner_thread_id"] == lc_id for e in seen_f95.values()):
-            result.append(entry)
+    result.extend(
+        entry for lc_id, entry in seen_lc.items()
+        if lc_id not in lc_ids_covered and _norm_thread_url(entry["lewdcorner_url"]) not in lc_urls_covered
+    )
 
     result.sort(key=lambda e: (e.get("title") or "").lower())
 
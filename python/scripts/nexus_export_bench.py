@@ -0,0 +1,118 @@
+"""
+Benchmark de parse_nexus_db sur une base Nexus synthétique.
+
+Usage (depuis python/scripts/) :
+    python nexus_export_bench.py
+    python nexus_export_bench.py --rows 20000 --repeat 5
+
+Génère une base SQLite temporaire au schéma Nexus (adulte_game_games + adulte_game_user_data),
+avec un mélange d'entrées F95, Lewdcorner seules, F95 + Lewdcorner (ID ou seulement lien Lewdcorner),
+doublons Lewdcorner de ces dernières et RAWG, puis chronomètre le parsing et vérifie le dédoublonnage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from nexus_export import parse_nexus_db
+
+
+def build_synthetic_db(path: Path, rows: int, seed: int = 42) -> int:
+    """
+    Crée une base Nexus synthétique de `rows` jeux : ≈ 40 % F95, 30 % LC seul, 15 % F95+LC (ID),
+    5 % F95 avec seulement le lien Lewdcorner, 5 % doublons LC seuls d'un jeu F95+LC, 5 % RAWG.
+    Retourne le nombre de doublons Lewdcorner générés (à écarter par le parsing).
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE adulte_game_games (
+            id INTEGER PRIMARY KEY, f95_thread_id INTEGER, Lewdcorner_thread_id INTEGER,
+            titre TEXT, game_version TEXT, game_statut TEXT, game_engine TEXT, game_developer TEXT,
+            couverture_url TEXT, tags TEXT, game_site TEXT, lien_f95 TEXT, lien_lewdcorner TEXT
+        );
+        CREATE TABLE adulte_game_user_data (
+            game_id INTEGER, chemin_executable TEXT, labels TEXT, notes_privees TEXT
+        );
+    """)
+    games, user_data = [], []
+    covered_lc: list[int] = []      # threads Lewdcorner déjà rattachés à une entrée F95
+    duplicate_lc: set[int] = set()
+    for i in range(1, rows + 1):
+        kind = rng.random()
+        f95_id = lc_id = lc_url = None
+        site = "RAWG"
+        if kind < 0.40:
+            f95_id, site = 100_000 + i, "F95z"
+        elif kind < 0.70:
+            lc_id, site = 500_000 + i, "LewdCorner"
+        elif kind < 0.85:
+            f95_id, lc_id, site = 100_000 + i, 500_000 + i, "F95z"
+            covered_lc.append(lc_id)
+        elif kind < 0.90:
+            # Couverture par URL seulement : pas d'ID Lewdcorner en colonne
+            f95_id, site = 100_000 + i, "F95z"
+            lc_url = f"https://lewdcorner.com/threads/jeu-{i}.{500_000 + i}/"
+            covered_lc.append(500_000 + i)
+        elif kind < 0.95 and covered_lc:
+            # Même jeu importé une seconde fois depuis Lewdcorner
+            lc_id, site = rng.choice(covered_lc), "LewdCorner"
+            duplicate_lc.add(lc_id)
+        if lc_id and not lc_url:
+            lc_url = f"https://lewdcorner.com/threads/{lc_id}/"
+        games.append((
+            i, f95_id, lc_id, f"Jeu {i}", f"v0.{i % 30}", "En cours", "Ren'Py", f"Dev {i % 500}",
+            f"https://example.invalid/{i}.jpg", "3dcg,male protagonist,sandbox", site,
+            f"https://f95zone.to/threads/{f95_id}/" if f95_id else None,
+            lc_url,
+        ))
+        if i % 3 == 0:
+            user_data.append((
+                i, json.dumps([{"path": f"D:/Jeux/{i}/game.exe"}]),
+                json.dumps([{"label": "À jouer", "color": "#22c55e"}]), None,
+            ))
+    conn.executemany("INSERT INTO adulte_game_games VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", games)
+    conn.executemany("INSERT INTO adulte_game_user_data VALUES (?,?,?,?)", user_data)
+    conn.commit()
+    conn.close()
+    return len(duplicate_lc)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chronomètre parse_nexus_db sur une base synthétique.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Nombre de jeux générés (défaut : 20000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de passages chronométrés (défaut : 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "nexus_bench.db"
+        duplicates = build_synthetic_db(db_path, args.rows)
+        timings = []
+        result = None
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            result = parse_nexus_db(str(db_path))
+            timings.append(time.perf_counter() - start)
+
+    stats = result["stats"]
+    print(f"[INFO] {args.rows} ligne(s) → {stats['total']} entrée(s) ({stats['with_f95']} F95, {stats['with_lc']} LC seul)")
+    # Une entrée LC seule légitime porte l'ID 500000 + n° de ligne ; sinon c'est un doublon non écarté
+    leaked = sum(
+        1 for e in result["entries"]
+        if not e["f95_thread_id"] and e["lewdcorner_thread_id"] != 500_000 + int(e["title"].split()[-1])
+    )
+    print(f"[INFO] {duplicates} doublon(s) Lewdcorner générés, {leaked} resté(s) après dédoublonnage")
+    print(f"[INFO] parse_nexus_db : médiane {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms sur {len(timings)} passage(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
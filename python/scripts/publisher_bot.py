@@ -45,6 +45,10 @@ async def on_ready():
     except Exception as e:
         logger.error("[publisher] Sync commandes slash echouee : %s", e)
 
+    # Cache des salons forum (tags) : evite un GET /channels/{id} par publication
+    from forum_manager import warm_forum_cache
+    warm_forum_cache(bot.guilds)
+
     # Demarrage des taches planifiees
     from scheduled_tasks import start_all_tasks
     start_all_tasks()
@@ -57,6 +61,25 @@ async def on_ready():
     )
 
 
+@bot.event
+async def on_guild_channel_update(before, after):
+    from forum_manager import cache_forum_channel, evict_forum_channel
+    if not cache_forum_channel(after):
+        evict_forum_channel(after.id)
+
+
+@bot.event
+async def on_guild_channel_create(channel):
+    from forum_manager import cache_forum_channel
+    cache_forum_channel(channel)
+
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    from forum_manager import evict_forum_channel
+    evict_forum_channel(channel.id)
+
+
 # ==================== ENREGISTREMENT COMMANDES ====================
 
 # Import et enregistrement des commandes slash sur cette instance bot.
@@ -1,6 +1,6 @@
 ﻿"""
 Taches planifiees Discord ext.tasks (version check, cleanup, sync jeux, dates F95).
-Dependances : config, version_checker, forum_manager, supabase_client, scraper, publisher_bot
+Dependances : config, version_checker, forum_manager, supabase_client, scraper, publisher_bot, metrics
 Logger       : [scheduler]
 """
 
@@ -14,6 +14,7 @@ import aiohttp
 from discord.ext import tasks
 
 from config import config
+from metrics import instrument_job, mark_job_failed
 from f95_public_api_client import (
     build_api_date_map,
     fetch_public_catalog_bundle,
@@ -23,8 +24,12 @@ from f95_public_api_client import (
 from supabase_client import (
     _get_supabase, _sync_jeux_to_supabase,
     _update_date_maj_bulk_sync, _relink_scraped_entries_to_catalogue,
+    _record_rss_dates_sync, _fetch_rss_ledger_dates_sync,
+    _enqueue_scrape_candidates_sync, _next_scrape_batch_sync, _complete_scrape_batch_sync,
+    _refresh_jeux_canonical_sync,
 )
 from scraper import enrich_dates_with_fallback
+from f95_rss_feed import get_rss_date_map, get_rss_feed, merge_date_maps
 
 logger = logging.getLogger("scheduler")
 
@@ -32,70 +37,43 @@ logger = logging.getLogger("scheduler")
 _KEY_INTERVAL   = "f95_date_refresh_interval_hours"
 _KEY_LAST       = "f95_date_last_refresh"
 _DEFAULT_HOURS  = 0   # 0 = manuel uniquement (configurable depuis l'UI d'enrichissement)
-RSS_URL_GAMES   = "https://f95zone.to/sam/latest_alpha/latest_data.php?cmd=rss&cat=games&rows=90"
 _PLACEHOLDER_DATE = "2020-01-01"
 # ── Fonction complète : _fetch_rss_date_map ───────────────────────────────────
 
 async def _fetch_rss_date_map(session: aiohttp.ClientSession) -> dict[int, str]:
     """
-    Récupère le flux RSS F95Zone et retourne {site_id: "YYYY-MM-DD"}.
+    Retourne {site_id: "YYYY-MM-DD"} depuis le flux RSS partagé (f95_rss_feed).
     Couvre les ~90 jeux les plus récemment mis à jour.
     Retourne {} en cas d'erreur (non bloquant).
     """
-    import re as _re
-    import xml.etree.ElementTree as ET
-    from email.utils import parsedate_to_datetime
+    result = await get_rss_date_map(session)
+    logger.info("[scheduler] _fetch_rss_date_map : %d dates récupérées", len(result))
+    return result
 
-    try:
-        async with session.get(
-            RSS_URL_GAMES,
-            headers={"User-Agent": "Mozilla/5.0"},
-            timeout=aiohttp.ClientTimeout(total=15),
-        ) as resp:
-            if resp.status != 200:
-                logger.warning("[scheduler] _fetch_rss_date_map : RSS HTTP %d", resp.status)
-                return {}
-            xml_text = await resp.text(encoding="utf-8", errors="replace")
-
-        root   = ET.fromstring(xml_text)
-        result : dict[int, str] = {}
-
-        for item in root.iter("item"):
-            raw_item = ET.tostring(item, encoding="unicode")
-
-            # Extraction du lien (nœud texte en RSS 2.0, pas un attribut XML)
-            m_link = _re.search(r'<link>([^<]+)</link>', raw_item)
-            if not m_link:
-                continue
-            link = m_link.group(1).strip()
+# ── Tâche complète : rss_ledger_sample ───────────────────────────────────────
 
-            m_id = _re.search(r'/threads/(?:[^/]*\.)?(\d+)', link)
-            if not m_id:
-                continue
-            tid = int(m_id.group(1))
-
-            pub_raw = (item.findtext("pubDate") or "").strip()
-            try:
-                pub_date = parsedate_to_datetime(pub_raw).strftime("%Y-%m-%d") if pub_raw else ""
-            except Exception:
-                pub_date = ""
-
-            if pub_date:
-                result[tid] = pub_date
-
-        logger.info("[scheduler] _fetch_rss_date_map : %d dates récupérées", len(result))
-        return result
-
-    except ET.ParseError as e:
-        logger.warning("[scheduler] _fetch_rss_date_map : XML parse error : %s", e)
-        return {}
-    except Exception as e:
-        logger.warning("[scheduler] _fetch_rss_date_map : exception : %s", e)
-        return {}
+@tasks.loop(minutes=config.RSS_LEDGER_INTERVAL_MINUTES)
+@instrument_job("rss_ledger_sample")
+async def rss_ledger_sample():
+    """
+    Échantillonne le flux RSS (toutes les RSS_LEDGER_INTERVAL_MINUTES, 10 min par défaut)
+    et enregistre chaque (thread_id, date) dans f95_rss_date_ledger.
+    Le flux ne garde que ~90 lignes : sans ce relevé, une MAJ sortie de la fenêtre
+    avant le passage horaire de rss_date_sync coûterait un scraping de page plus tard.
+    """
+    if not _get_supabase():
+        return
+    feed = await get_rss_feed()
+    if not feed or not feed.date_map:
+        return
+    titles = {e["threadId"]: e["title"] for e in feed.entries if e.get("title")}
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _record_rss_dates_sync, feed.date_map, titles)
 
 # ── Tâche complète : rss_date_sync ───────────────────────────────────────────
 
 @tasks.loop(minutes=60)
+@instrument_job("rss_date_sync")
 async def rss_date_sync():
     """
     Toutes les heures :
@@ -148,6 +126,7 @@ async def rss_date_sync():
             for r in (res.data or [])
         }
 
+        updated_tids: list[int] = []
         for tid in site_ids:
             rss_date = rss_map.get(tid)
             api_date = api_dates.get(tid)
@@ -168,13 +147,20 @@ async def rss_date_sync():
                     "updated_at"  : now,
                 }).eq("site_id", tid).execute()
                 updated_f95 += 1
+                updated_tids.append(tid)
             except Exception as e:
                 logger.debug(
                     "[scheduler] rss_date_sync f95_jeux site_id=%d : %s", tid, e
                 )
+        # updated_at départage les lignes ex æquo : ligne principale des groupes touchés
+        if updated_tids:
+            await asyncio.get_event_loop().run_in_executor(
+                None, _refresh_jeux_canonical_sync, updated_tids,
+            )
 
     except Exception as e:
         logger.warning("[scheduler] rss_date_sync f95_jeux (global) : %s", e)
+        mark_job_failed()
 
     # ── 2. Mise à jour user_collection ───────────────────────────────────────
     # Uniquement pour les entrées hors f95_jeux (les autres héritent via enrichissement)
@@ -229,6 +215,7 @@ async def rss_date_sync():
 
     except Exception as e:
         logger.warning("[scheduler] rss_date_sync user_collection (global) : %s", e)
+        mark_job_failed()
 
     logger.info(
         "[scheduler] rss_date_sync terminé : %d f95_jeux + %d user_collection mis à jour "
@@ -319,6 +306,7 @@ async def run_cleanup_empty_messages_once():
         tzinfo=ZoneInfo("Europe/Paris"),
     )
 )
+@instrument_job("daily_version_check")
 async def daily_version_check():
     """Controle quotidien automatique des versions F95 a l'heure configuree."""
     logger.info(
@@ -330,6 +318,7 @@ async def daily_version_check():
         await run_version_check_once()
     except Exception as e:
         logger.error("[scheduler] Erreur controle quotidien versions : %s", e)
+        mark_job_failed()
 
 
 @tasks.loop(
@@ -339,6 +328,7 @@ async def daily_version_check():
         tzinfo=ZoneInfo("Europe/Paris"),
     )
 )
+@instrument_job("daily_cleanup_empty_messages")
 async def daily_cleanup_empty_messages():
     """Nettoyage quotidien des messages vides dans les threads."""
     logger.info(
@@ -349,6 +339,7 @@ async def daily_cleanup_empty_messages():
         await run_cleanup_empty_messages_once()
     except Exception as e:
         logger.error("[scheduler] Erreur nettoyage quotidien : %s", e)
+        mark_job_failed()
 
 
 @tasks.loop(time=[
@@ -365,6 +356,7 @@ async def daily_cleanup_empty_messages():
     datetime.time(hour=20, minute=30, tzinfo=ZoneInfo("Europe/Paris")),
     datetime.time(hour=22, minute=30, tzinfo=ZoneInfo("Europe/Paris")),
 ])
+@instrument_job("sync_jeux_task")
 async def sync_jeux_task():
     """Synchronise les jeux depuis l'API publique vers Supabase (toutes les 2h a :30 Europe/Paris)."""
     logger.info("[scheduler] Synchronisation jeux API publique -> Supabase")
@@ -399,9 +391,14 @@ async def sync_jeux_task():
                 logger.warning("[scheduler] Reponse vide ou invalide depuis l'API publique")
     except Exception as e:
         logger.error("[scheduler] Erreur sync jeux : %s", e)
+        mark_job_failed()
+
+
+_DATE_REFRESH_SCRAPE_BUDGET = 500   # pages de threads scrapées au plus par passage
 
 
 @tasks.loop(hours=1)
+@instrument_job("configurable_date_refresh")
 async def configurable_date_refresh():
     """
     Rafraîchit f95_date_maj (date MAJ jeu sur F95Zone) selon la fréquence
@@ -463,25 +460,48 @@ async def configurable_date_refresh():
         # ── 4. Récupérer les jeux sans date OU non vérifiés depuis interval ─
         cutoff_iso = (now - datetime.timedelta(hours=interval_hours)).isoformat()
 
-        res_jeux = (
-            sb.table("f95_jeux")
-            .select("site_id, nom_url")
-            .or_(f"f95_date_maj.is.null,updated_at.lt.{cutoff_iso}")
-            .not_.is_("nom_url", "null")
-            .not_.is_("site_id", "null")
-            .limit(500)
-            .execute()
-        )
-
-        jeux = [
-            r for r in (res_jeux.data or [])
-            if r.get("nom_url") and "f95zone.to" in (r.get("nom_url") or "").lower()
-        ]
+        jeux: list[dict] = []
+        offset = 0
+        while True:
+            res_jeux = (
+                sb.table("f95_jeux")
+                .select("site_id, nom_url, f95_date_maj")
+                .or_(f"f95_date_maj.is.null,updated_at.lt.{cutoff_iso}")
+                .not_.is_("nom_url", "null")
+                .not_.is_("site_id", "null")
+                .range(offset, offset + 999)
+                .execute()
+            )
+            page = res_jeux.data or []
+            jeux.extend(
+                r for r in page
+                if r.get("nom_url") and "f95zone.to" in (r.get("nom_url") or "").lower()
+            )
+            if len(page) < 1000:
+                break
+            offset += 1000
 
         if not jeux:
             logger.info("[scheduler] configurable_date_refresh : aucun jeu à traiter")
+            # File vidée des jeux qui ne sont plus candidats
+            await asyncio.get_event_loop().run_in_executor(None, _enqueue_scrape_candidates_sync, [])
         else:
-            logger.info("[scheduler] configurable_date_refresh : %d jeux à scraper", len(jeux))
+            logger.info("[scheduler] configurable_date_refresh : %d jeux à vérifier", len(jeux))
+            loop = asyncio.get_event_loop()
+
+            # ── 4b. File priorisée : possession, ancienneté de la date, activité RSS ─
+            await loop.run_in_executor(None, _enqueue_scrape_candidates_sync, jeux)
+            queue_head = await loop.run_in_executor(
+                None, _next_scrape_batch_sync, _DATE_REFRESH_SCRAPE_BUDGET,
+            )
+            priority = {
+                int(r["site_id"]): float(r.get("priority") or 0) / (1 + int(r.get("attempts") or 0))
+                for r in queue_head
+            }
+            scraped: list[int] = []
+
+            async def _on_scraped(_current, _total, site_id, _date):
+                scraped.append(site_id)
 
             # ── 5. Enrichir les dates : API publique d'abord, scraping en secours ─
             async with aiohttp.ClientSession() as session:
@@ -494,20 +514,50 @@ async def configurable_date_refresh():
                         "[scheduler] configurable_date_refresh : API publique indisponible : %s",
                         api_err,
                     )
+                # Registre RSS + flux courant : évite de scraper des dates déjà vues
+                ledger_dates = await loop.run_in_executor(
+                    None, _fetch_rss_ledger_dates_sync, [int(j["site_id"]) for j in jeux],
+                )
+                rss_dates = merge_date_maps(ledger_dates, await get_rss_date_map(session))
                 date_map = await enrich_dates_with_fallback(
                     session,
                     jeux=jeux,
-                    rss_date_map={},
+                    rss_date_map=rss_dates,
                     api_date_map=api_dates,
                     scrape_delay=3.0,
+                    progress_callback=_on_scraped,
+                    priority=priority,
+                    max_scrapes=_DATE_REFRESH_SCRAPE_BUDGET,
                 )
 
+            # Sortie de file : jeux datés retirés, scrapings infructueux reculés (attempts + 1)
+            await loop.run_in_executor(
+                None,
+                _complete_scrape_batch_sync,
+                list(date_map),
+                [sid for sid in scraped if sid not in date_map],
+            )
+
             # ── 6. Écrire dans f95_date_maj via _update_date_maj_bulk_sync ──
-            if date_map:
-                updated = _update_date_maj_bulk_sync(date_map)
+            # Dates identiques à celles déjà lues : rien à écrire
+            known_dates: dict[int, set] = {}
+            for j in jeux:
+                known_dates.setdefault(int(j["site_id"]), set()).add(j.get("f95_date_maj"))
+            changed = {
+                sid: d for sid, d in date_map.items()
+                if known_dates.get(int(sid)) != {d}
+            }
+            if changed:
+                updated = await loop.run_in_executor(None, _update_date_maj_bulk_sync, changed)
+                logger.info(
+                    "[scheduler] configurable_date_refresh : %d/%d date(s) f95_date_maj mises à jour "
+                    "(%d inchangée(s))",
+                    updated, len(changed), len(date_map) - len(changed),
+                )
+            elif date_map:
                 logger.info(
-                    "[scheduler] configurable_date_refresh : %d/%d date(s) f95_date_maj mises à jour",
-                    updated, len(date_map),
+                    "[scheduler] configurable_date_refresh : %d date(s) extraite(s), toutes inchangées",
+                    len(date_map),
                 )
             else:
                 logger.info("[scheduler] configurable_date_refresh : aucune date extraite")
@@ -521,6 +571,7 @@ async def configurable_date_refresh():
 
     except Exception as e:
         logger.error("[scheduler] configurable_date_refresh erreur : %s", e, exc_info=True)
+        mark_job_failed()
 
 
 # ==================== DEMARRAGE ====================
@@ -532,6 +583,7 @@ async def configurable_date_refresh():
         tzinfo=ZoneInfo("Europe/Paris"),
     )
 )
+@instrument_job("daily_work_tracking_refresh")
 async def daily_work_tracking_refresh():
     """Contrôle quotidien suivi d'œuvres : avance chapitres (En cours) + alerte MP (Payant)."""
     logger.info(
@@ -545,6 +597,7 @@ async def daily_work_tracking_refresh():
         await run_work_tracking_refresh_once(bot)
     except Exception as e:
         logger.error("[scheduler] Erreur refresh suivi d'œuvres : %s", e)
+        mark_job_failed()
 
 
 @tasks.loop(
@@ -554,6 +607,7 @@ async def daily_work_tracking_refresh():
         tzinfo=ZoneInfo("Europe/Paris"),
     )
 )
+@instrument_job("daily_work_tracking_yesterday_digest")
 async def daily_work_tracking_yesterday_digest():
     """Rappel MP unique à 09:00 : sorties de la veille (Europe/Paris)."""
     logger.info(
@@ -567,6 +621,7 @@ async def daily_work_tracking_yesterday_digest():
         await run_work_tracking_yesterday_digest(bot)
     except Exception as e:
         logger.error("[scheduler] Erreur digest suivi d'œuvres : %s", e)
+        mark_job_failed()
 
 
 def start_all_tasks():
@@ -598,6 +653,13 @@ def start_all_tasks():
             "[scheduler] Suivi RSS f95_date_maj démarré (toutes les heures)"
         )
 
+    if not rss_ledger_sample.is_running():
+        rss_ledger_sample.start()
+        logger.info(
+            "[scheduler] Registre dates RSS démarré (toutes les %d min)",
+            config.RSS_LEDGER_INTERVAL_MINUTES,
+        )
+
     if not daily_work_tracking_refresh.is_running():
         daily_work_tracking_refresh.start()
         logger.info(
@@ -10,7 +10,7 @@ Fonctions disponibles :
   - scrape_thread_updated_date()    : date "Thread Updated" via requête HTTP
   - enrich_dates_with_fallback()    : hybride API + RSS + scraping pour enrichir date_maj
 
-Dépendances : aiohttp, beautifulsoup4, lxml
+Dépendances : aiohttp, beautifulsoup4, lxml, metrics
 Logger       : [scraper]
 """
 
@@ -23,6 +23,8 @@ from urllib.parse import urljoin
 import aiohttp
 from bs4 import BeautifulSoup, NavigableString
 
+from metrics import track_upstream
+
 logger = logging.getLogger("scraper")
 
 
@@ -358,28 +360,30 @@ async def scrape_thread_updated_date(
     headers = _f95_headers_with_cookies(cookies)
     try:
         logger.info("[scraper] Scraping Thread Updated : %s", url)
-        async with session.get(
-            url,
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=30),
-            allow_redirects=True,
-        ) as response:
-            final_url = str(response.url)
-
-            # ── Détection login / accès refusé ───────────────────────────────
-            if response.status == 403:
-                logger.debug("[scraper] 403 pour %s — page restreinte", url)
-                return None
-            if response.status != 200:
-                logger.warning("[scraper] HTTP %d pour %s", response.status, url)
-                return None
-
-            # Redirection vers login (URL change)
-            if "login" in final_url.lower() or "log-in" in final_url.lower():
-                logger.debug("[scraper] Redirection login pour %s", url)
-                return None
-
-            html = await response.text(errors="replace")
+        with track_upstream("f95", "scrape_thread_updated") as call:
+            async with session.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30),
+                allow_redirects=True,
+            ) as response:
+                call.status = response.status
+                final_url = str(response.url)
+
+                # ── Détection login / accès refusé ───────────────────────────────
+                if response.status == 403:
+                    logger.debug("[scraper] 403 pour %s — page restreinte", url)
+                    return None
+                if response.status != 200:
+                    logger.warning("[scraper] HTTP %d pour %s", response.status, url)
+                    return None
+
+                # Redirection vers login (URL change)
+                if "login" in final_url.lower() or "log-in" in final_url.lower():
+                    logger.debug("[scraper] Redirection login pour %s", url)
+                    return None
+
+                html = await response.text(errors="replace")
 
         if not html or len(html) < 500:
             return None
@@ -421,6 +425,8 @@ async def enrich_dates_with_fallback(
     cookies: Optional[str] = None,
     scrape_delay: float = 2.0,
     progress_callback=None,
+    priority: dict[int, float] | None = None,
+    max_scrapes: int | None = None,
 ) -> dict[int, str]:
     """
     Stratégie hybride pour récupérer les dates de MAJ sur l'ensemble d'un catalogue :
@@ -438,6 +444,8 @@ async def enrich_dates_with_fallback(
     cookies           : Cookie xf_session optionnel pour les jeux 18+.
     scrape_delay      : Délai en secondes entre chaque scrape (défaut 2 s).
     progress_callback : Coroutine async(current, total, site_id, date) optionnelle.
+    priority          : {site_id: score} ; les jeux à scraper sont traités par score décroissant.
+    max_scrapes       : Budget de scraping (None = illimité) ; les moins prioritaires sont reportés.
 
     Retourne
     --------
@@ -468,11 +476,19 @@ async def enrich_dates_with_fallback(
         else:
             to_scrape.append(jeu)
 
+    if priority:
+        to_scrape.sort(key=lambda j: priority.get(int(j.get("site_id") or 0), -1.0), reverse=True)
+    deferred = 0
+    if max_scrapes is not None and len(to_scrape) > max_scrapes:
+        deferred = len(to_scrape) - max_scrapes
+        to_scrape = to_scrape[:max_scrapes]
+
     logger.info(
-        "[scraper] enrich_dates : %d depuis API, %d depuis RSS, %d à scraper",
+        "[scraper] enrich_dates : %d depuis API, %d depuis RSS, %d à scraper (%d reporté(s))",
         api_hit_count,
         rss_hit_count,
         len(to_scrape),
+        deferred,
     )
 
     # Phase 2 : scraper les jeux absents du RSS
@@ -533,20 +549,22 @@ async def scrape_f95_synopsis(
 
         logger.info("[scraper] scrape_f95_synopsis: %s", url)
 
-        async with session.get(url, headers=headers, timeout=30) as response:
-            final_url  = str(response.url)
-            id_str     = extract_f95_thread_id(final_url)
-            scraped_id = int(id_str) if id_str else None
+        with track_upstream("f95", "scrape_synopsis") as call:
+            async with session.get(url, headers=headers, timeout=30) as response:
+                call.status = response.status
+                final_url  = str(response.url)
+                id_str     = extract_f95_thread_id(final_url)
+                scraped_id = int(id_str) if id_str else None
 
-            if response.status != 200:
-                logger.warning("[scraper] HTTP %d pour %s", response.status, url)
-                return None, scraped_id
+                if response.status != 200:
+                    logger.warning("[scraper] HTTP %d pour %s", response.status, url)
+                    return None, scraped_id
 
-            html = await response.text()
+                html = await response.text()
 
-            if not html or len(html) < 100:
-                logger.warning("[scraper] HTML vide ou trop court pour %s", url)
-                return None, scraped_id
+                if not html or len(html) < 100:
+                    logger.warning("[scraper] HTML vide ou trop court pour %s", url)
+                    return None, scraped_id
 
         soup = BeautifulSoup(html, "html.parser")
 
@@ -663,10 +681,12 @@ async def scrape_f95_title(session, url: str) -> Optional[str]:
             "Accept":          "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
         }
-        async with session.get(url, headers=headers, timeout=15) as response:
-            if response.status != 200:
-                return None
-            html = await response.text()
+        with track_upstream("f95", "scrape_title") as call:
+            async with session.get(url, headers=headers, timeout=15) as response:
+                call.status = response.status
+                if response.status != 200:
+                    return None
+                html = await response.text()
         if not html or len(html) < 100:
             return None
         soup = BeautifulSoup(html, "html.parser")
@@ -714,11 +734,13 @@ async def scrape_f95_game_data(
         return None
     try:
         headers = _f95_headers_with_cookies(cookies)
-        async with session.get(url, headers=headers, timeout=30) as response:
-            if response.status != 200:
-                logger.warning("[scraper] HTTP %d pour %s", response.status, url)
-                return None
-            html = await response.text()
+        with track_upstream("f95", "scrape_game_data") as call:
+            async with session.get(url, headers=headers, timeout=30) as response:
+                call.status = response.status
+                if response.status != 200:
+                    logger.warning("[scraper] HTTP %d pour %s", response.status, url)
+                    return None
+                html = await response.text()
         if not html or len(html) < 500:
             return None
         soup = BeautifulSoup(html, "html.parser")
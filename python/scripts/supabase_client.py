@@ -1,11 +1,12 @@
 """
 Client Supabase + toutes les operations CRUD (fonctions sync).
-Dependances : config
+Dependances : config, metrics
 Logger       : [supabase]
 """
 
 import os
 import json
+import math
 import time
 import logging
 import datetime
@@ -13,6 +14,7 @@ from typing import Optional, Dict
 from zoneinfo import ZoneInfo
 
 from config import config
+from metrics import install_httpx_metrics
 from f95_public_api_client import map_public_games_to_legacy_rows
 
 logger = logging.getLogger("supabase")
@@ -41,6 +43,10 @@ def _init_supabase():
         return None
     try:
         _supabase_client = create_client(url, key)
+        try:
+            install_httpx_metrics(_supabase_client.postgrest.session, "supabase")
+        except Exception as e:
+            logger.warning("[supabase] Metriques des requetes indisponibles : %s", e)
         logger.info("[supabase] Client initialise")
         return _supabase_client
     except Exception as e:
@@ -463,9 +469,21 @@ def _normalize_history_row(row: Dict) -> Dict:
 
 # ==================== JEUX ====================
 
-def _fetch_all_jeux_sync() -> list:
+# Projection légère pour les listes (bibliothèque, filtres) : sans synopsis ni
+# champs longs. Le détail complet est servi à la demande par _fetch_jeu_detail_sync.
+JEUX_LIST_COLUMNS = (
+    "id, game_uuid, site_id, site, nom_du_jeu, nom_url, version, trad_ver, lien_trad, "
+    "statut, tags, type, traducteur, traducteur_url, type_de_traduction, ac, image, "
+    "type_maj, date_maj, f95_date_maj, published_post_id, updated_at, variants"
+)
+JEUX_LONG_FIELDS = ("synopsis_en", "synopsis_fr", "synopsis", "synced_at", "created_at")
+
+
+def _fetch_all_jeux_sync(columns: str = "*", canonical_only: bool = False) -> list:
     """
     Recupere TOUS les jeux de f95_jeux avec pagination (contourne la limite 1000 Supabase).
+    columns        : projection PostgREST (ex. JEUX_LIST_COLUMNS pour la liste légère).
+    canonical_only : ne lit que les lignes principales (déjà dédupliquées à la sync).
     """
     sb = _get_supabase()
     if not sb:
@@ -475,9 +493,11 @@ def _fetch_all_jeux_sync() -> list:
     offset = 0
     while True:
         try:
+            query = sb.table("f95_jeux").select(columns)
+            if canonical_only:
+                query = query.eq("is_canonical", True)
             res = (
-                sb.table("f95_jeux")
-                .select("*")
+                query
                 .order("nom_du_jeu")
                 .range(offset, offset + PAGE_SIZE - 1)
                 .execute()
@@ -495,6 +515,27 @@ def _fetch_all_jeux_sync() -> list:
     return all_rows
 
 
+def _fetch_jeu_detail_sync(jeu_id: int) -> Optional[Dict]:
+    """
+    Recupere une ligne f95_jeux complete (synopsis et champs longs inclus).
+    Retourne None si la ligne n'existe pas.
+    """
+    sb = _get_supabase()
+    if not sb:
+        return None
+    try:
+        res = sb.table("f95_jeux").select("*").eq("id", jeu_id).limit(1).execute()
+        return res.data[0] if res.data else None
+    except Exception as e:
+        logger.warning("[supabase] fetch_jeu_detail id=%s : %s", jeu_id, e)
+        return None
+
+
+def _strip_jeux_long_fields(rows: list) -> list:
+    """Retire les champs longs (synopsis…) d'une liste de jeux déjà chargée."""
+    return [{k: v for k, v in r.items() if k not in JEUX_LONG_FIELDS} for r in rows]
+
+
 def _norm_nom_url(url) -> Optional[str]:
     """Normalise nom_url pour regroupement (sans utiliser nom_du_jeu)."""
     if not url or not isinstance(url, str):
@@ -505,60 +546,77 @@ def _norm_nom_url(url) -> Optional[str]:
     return u if u else None
 
 
-def _dedupe_jeux_by_site(rows: list) -> list:
+def _jeux_group_key(r: dict) -> tuple:
     """
-    Déduplique visuellement les lignes f95_jeux : même jeu = une seule entrée affichée.
+    Clé de regroupement d'une ligne f95_jeux (même clé = même jeu logique).
+
+    Par priorité :
+      1. game_uuid        — UUID du jeu depuis l'API publique ; regroupe toutes les
+                            plateformes (F95Zone + LewdCorner) du même jeu.
+      2. (site_id, site)  — threadId unique par jeu sur chaque plateforme.
+      3. nom_url normalisé — fallback pour les entrées sans site_id (jeux manuels, etc.)
+      4. id seul          — dernier recours pour les lignes totalement orphelines.
+    """
+    game_uuid = (r.get("game_uuid") or "").strip()
+    if game_uuid:
+        return ("uuid", game_uuid)
+    sid = r.get("site_id")
+    if sid is not None:
+        site = (r.get("site") or "").strip()
+        try:
+            return ("sid", int(sid), site)
+        except (TypeError, ValueError):
+            return ("sid", sid, site)
+    norm_url = _norm_nom_url(r.get("nom_url"))
+    if norm_url:
+        return ("url", norm_url)
+    return ("orphan", r.get("id"))
+
 
-    Clé de regroupement (par priorité) :
-      1. (site_id, site) — fiable car le threadId est unique par jeu sur chaque
-         plateforme (F95Zone, LewdCorner). Correspond directement au gameId UUID de
-         l'API publique : toutes les traductions d'un même jeu partagent le même threadId.
-      2. nom_url normalisé — fallback pour les entrées sans site_id (jeux manuels, etc.)
-      3. id seul          — dernier recours pour les lignes totalement orphelines.
+def _jeux_variant_payload(v: dict) -> dict:
+    """Sous-ensemble d'une ligne secondaire exposé dans le champ "variants"."""
+    return {
+        "id": v.get("id"),
+        "trad_ver": v.get("trad_ver"),
+        "lien_trad": v.get("lien_trad"),
+        "type_de_traduction": v.get("type_de_traduction"),
+        "nom_url": v.get("nom_url"),
+        "traducteur": v.get("traducteur"),
+        "traducteur_url": v.get("traducteur_url"),
+        "version": v.get("version"),
+        "statut": v.get("statut"),
+    }
 
-    Ligne principale : ac='1' (prioritaire) sinon la plus récente par updated_at.
-    Autres lignes     → champ "variants" (saisons / traductions alternatives).
+
+def _group_jeux_canonical(rows: list) -> list:
+    """
+    Regroupe les lignes f95_jeux par jeu logique (cf. _jeux_group_key) et élit la
+    ligne principale de chaque groupe.
+
+    Ligne principale : ac='1' (prioritaire) sinon heuristique de complétude,
+    puis date_maj, puis updated_at.
+    Retourne [(key, primary, variants)] — variants triées, sans la principale.
+    Les lignes orphelines sans id forment chacune leur propre groupe.
     """
     if not rows:
         return []
     from collections import defaultdict
     groups = defaultdict(list)
     for r in rows:
-        game_uuid = (r.get("game_uuid") or "").strip()
-        sid       = r.get("site_id")
-        site      = (r.get("site") or "").strip()
-
-        if game_uuid:
-            # Clé la plus fiable : UUID du jeu depuis l'API publique
-            # Regroupe toutes les plateformes (F95Zone + LewdCorner) du même jeu
-            key = ("uuid", game_uuid)
-        elif sid is not None:
-            # Fallback : threadId unique par plateforme
-            try:
-                key = ("sid", int(sid), site)
-            except (TypeError, ValueError):
-                key = ("sid", sid, site)
-        else:
-            norm_url = _norm_nom_url(r.get("nom_url"))
-            if norm_url:
-                key = ("url", norm_url)
-            else:
-                key = ("orphan", r.get("id"))
-        groups[key].append(r)
+        groups[_jeux_group_key(r)].append(r)
 
     out = []
     for key, group in groups.items():
         if not group:
             continue
-        # Lignes orphelines sans aucune clé exploitable : renvoyer telles quelles
         if key[0] == "orphan" and key[1] is None:
-            out.extend(group)
+            out.extend((key, r, []) for r in group)
             continue
         # Trier : ac='1' en premier ; sinon heuristique de complétude
         ac_main  = [r for r in group if str(r.get("ac") or "").strip() == "1"]
         ac_other = [r for r in group if str(r.get("ac") or "").strip() != "1"]
 
-        game_version = (ac_main[0].get("version") if ac_main else (group[0].get("version") if group else "")) or ""
+        game_version = (ac_main[0].get("version") if ac_main else group[0].get("version")) or ""
 
         def _sort_key(r: dict, gv: str = game_version) -> tuple:
             """Tri décroissant : score complétude, date_maj, updated_at."""
@@ -573,30 +631,180 @@ def _dedupe_jeux_by_site(rows: list) -> list:
         ac_main.sort(key=_sort_key, reverse=True)
         ac_other.sort(key=_sort_key, reverse=True)
         group_sorted = ac_main + ac_other
-        primary = group_sorted[0] if group_sorted else group[0]
-        variants = (group_sorted[1:] if len(group_sorted) > 1 else [])
+        out.append((key, group_sorted[0], group_sorted[1:]))
+    return out
 
-        variant_payload = []
-        for v in variants:
-            variant_payload.append({
-                "id": v.get("id"),
-                "trad_ver": v.get("trad_ver"),
-                "lien_trad": v.get("lien_trad"),
-                "type_de_traduction": v.get("type_de_traduction"),
-                "nom_url": v.get("nom_url"),
-                "traducteur": v.get("traducteur"),
-                "traducteur_url": v.get("traducteur_url"),
-                "version": v.get("version"),
-                "statut": v.get("statut"),
-            })
 
+def _dedupe_jeux_by_site(rows: list) -> list:
+    """
+    Déduplique visuellement les lignes f95_jeux : même jeu = une seule entrée affichée.
+
+    Utilisé uniquement sur le chemin de secours (API publique) : en lecture cache,
+    la ligne principale est pré-calculée à la sync (colonnes is_canonical / variants,
+    cf. _recompute_jeux_canonical_sync).
+    Autres lignes → champ "variants" (saisons / traductions alternatives).
+    """
+    out = []
+    for _key, primary, variants in _group_jeux_canonical(rows):
         merged = dict(primary)
-        merged["variants"] = variant_payload
+        merged["variants"] = [_jeux_variant_payload(v) for v in variants]
         out.append(merged)
-
     return out
 
 
+# Colonnes nécessaires au calcul de la ligne principale (+ état persisté actuel)
+_JEUX_CANONICAL_COLUMNS = (
+    "id, game_uuid, site_id, site, nom_url, ac, version, trad_ver, lien_trad, statut, "
+    "traducteur, traducteur_url, type_de_traduction, date_maj, updated_at, "
+    "is_canonical, variants"
+)
+# Au-delà de ce nombre de clés, un balayage complet coûte moins que des filtres .in_()
+_CANONICAL_FULL_SCAN_THRESHOLD = 500
+
+
+def _select_jeux_paged(sb, columns: str, apply=None) -> list:
+    """Lecture paginée de f95_jeux (blocs de 1000, ordre id) ; apply(query) ajoute les filtres."""
+    PAGE_SIZE = 1000
+    rows: list = []
+    offset = 0
+    while True:
+        query = sb.table("f95_jeux").select(columns)
+        if apply is not None:
+            query = apply(query)
+        res = query.order("id").range(offset, offset + PAGE_SIZE - 1).execute()
+        batch = res.data or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return rows
+
+
+def _recompute_jeux_canonical_sync(
+    sb,
+    game_uuids: set | None = None,
+    site_ids: set | None = None,
+    jeu_ids: set | None = None,
+) -> int:
+    """
+    Pré-calcule la déduplication de f95_jeux : is_canonical=true sur la ligne
+    principale de chaque groupe (avec ses variantes dans "variants"), false ailleurs.
+
+    Sans périmètre (None) : recalcul sur toute la table.
+    Avec périmètre : seuls les groupes dont l'UUID ou le site_id est listé (ou qui
+    contiennent une ligne de jeu_ids) sont recalculés, ainsi que tous les groupes
+    sans UUID ni site_id (clé nom_url / orphelins : lignes manuelles, peu nombreuses,
+    toujours chargées en entier). Les autres groupes chargés au passage peuvent être incomplets.
+    N'écrit que les lignes dont l'état change. Retourne ce nombre de lignes.
+    """
+    scoped = game_uuids is not None or site_ids is not None or jeu_ids is not None
+    game_uuids = {u for u in (game_uuids or set()) if u}
+    site_ids = {int(s) for s in (site_ids or set()) if s is not None}
+    jeu_ids = sorted({int(i) for i in (jeu_ids or set()) if i is not None})
+    chunk_size = 200
+    # Lignes modifiées par id : leur groupe est désigné par leur UUID / site_id
+    for i in range(0, len(jeu_ids), chunk_size):
+        res = (
+            sb.table("f95_jeux")
+            .select("id, game_uuid, site_id")
+            .in_("id", jeu_ids[i:i + chunk_size])
+            .execute()
+        )
+        for row in (res.data or []):
+            if (row.get("game_uuid") or "").strip():
+                game_uuids.add(row["game_uuid"].strip())
+            elif row.get("site_id") is not None:
+                site_ids.add(int(row["site_id"]))
+    if scoped and len(game_uuids) + len(site_ids) > _CANONICAL_FULL_SCAN_THRESHOLD:
+        scoped = False
+
+    rows_by_id: dict = {}
+    if scoped:
+        for column, values in (("game_uuid", sorted(game_uuids)), ("site_id", sorted(site_ids))):
+            for i in range(0, len(values), chunk_size):
+                res = (
+                    sb.table("f95_jeux")
+                    .select(_JEUX_CANONICAL_COLUMNS)
+                    .in_(column, values[i:i + chunk_size])
+                    .execute()
+                )
+                for row in (res.data or []):
+                    rows_by_id[row.get("id")] = row
+        unkeyed = _select_jeux_paged(
+            sb, _JEUX_CANONICAL_COLUMNS,
+            lambda q: q.or_("game_uuid.is.null,game_uuid.eq.").is_("site_id", "null"),
+        )
+        for row in unkeyed:
+            rows_by_id[row.get("id")] = row
+    else:
+        for row in _select_jeux_paged(sb, _JEUX_CANONICAL_COLUMNS):
+            rows_by_id[row.get("id")] = row
+
+    def _in_scope(key: tuple) -> bool:
+        if not scoped:
+            return True
+        if key[0] == "uuid":
+            return key[1] in game_uuids
+        if key[0] == "sid":
+            return key[1] in site_ids
+        # Clé nom_url / orphelin : groupe chargé en entier (cf. unkeyed)
+        return True
+
+    demote_ids: list = []
+    promote_ids: list = []
+    promote_with_variants: list = []
+    for key, primary, variants in _group_jeux_canonical(list(rows_by_id.values())):
+        if not _in_scope(key) or primary.get("id") is None:
+            continue
+        payload = [_jeux_variant_payload(v) for v in variants]
+        if primary.get("is_canonical") is not True or (primary.get("variants") or []) != payload:
+            if payload:
+                promote_with_variants.append((primary["id"], payload))
+            else:
+                promote_ids.append(primary["id"])
+        for v in variants:
+            if v.get("id") is not None and (v.get("is_canonical") is not False or v.get("variants")):
+                demote_ids.append(v["id"])
+
+    changed = 0
+    for ids, values in ((demote_ids, {"is_canonical": False, "variants": []}),
+                        (promote_ids, {"is_canonical": True, "variants": []})):
+        for i in range(0, len(ids), 200):
+            part = ids[i:i + 200]
+            try:
+                sb.table("f95_jeux").update(values).in_("id", part).execute()
+                changed += len(part)
+            except Exception as exc:
+                logger.warning("[supabase] canonical_jeux update chunk %d : %s", i // 200, exc)
+    for jeu_id, payload in promote_with_variants:
+        try:
+            sb.table("f95_jeux").update({"is_canonical": True, "variants": payload}).eq("id", jeu_id).execute()
+            changed += 1
+        except Exception as exc:
+            logger.warning("[supabase] canonical_jeux update id=%s : %s", jeu_id, exc)
+
+    logger.info(
+        "[supabase] canonical_jeux : %d ligne(s) analysée(s), %d mise(s) à jour (%s)",
+        len(rows_by_id), changed, "périmètre" if scoped else "table complète",
+    )
+    return changed
+
+
+def _refresh_jeux_canonical_sync(site_ids=None, jeu_ids=None) -> int:
+    """
+    Recalcul de la ligne principale des groupes touchés par une écriture hors sync
+    (updated_at départage les lignes ex æquo). Erreurs journalisées, jamais propagées.
+    """
+    sb = _get_supabase()
+    if not sb or not (site_ids or jeu_ids):
+        return 0
+    try:
+        return _recompute_jeux_canonical_sync(sb, site_ids=set(site_ids or ()), jeu_ids=set(jeu_ids or ()))
+    except Exception as exc:
+        logger.warning("[supabase] canonical_jeux erreur : %s", exc)
+        return 0
+
+
 def _normalize_legacy_site_labels(sb) -> None:
     """
     Corrige en base les anciennes valeurs du champ 'site' héritées de l'API précédente.
@@ -919,17 +1127,28 @@ def _sync_jeux_to_supabase(
             site_to_current_ids.setdefault(sid, set()).add(rid)
         pruned_count = _prune_stale_rows_for_sites(site_to_current_ids)
 
+        # Migration des labels site hérités de l'ancienne API (ex. 'F95z' → 'F95Zone')
+        # S'exécute uniquement après une sync depuis l'API publique, avant le regroupement
+        # (le label site fait partie de la clé de groupe).
+        if is_public_payload:
+            _normalize_legacy_site_labels(sb)
+
+        # Déduplication pré-calculée pour les lecteurs (is_canonical / variants)
+        try:
+            _recompute_jeux_canonical_sync(
+                sb,
+                game_uuids={row["game_uuid"] for row in rows if row.get("game_uuid")},
+                site_ids=set(site_to_current_ids),
+            )
+        except Exception as exc:
+            logger.warning("[supabase] canonical_jeux erreur : %s", exc)
+
         logger.info(
             "[supabase] sync_jeux : %d lignes synchronisees, %d ligne(s) obsolète(s) supprimée(s)",
             len(rows),
             pruned_count,
         )
 
-        # Migration des labels site hérités de l'ancienne API (ex. 'F95z' → 'F95Zone')
-        # S'exécute uniquement après une sync depuis l'API publique.
-        if is_public_payload:
-            _normalize_legacy_site_labels(sb)
-
     except Exception as e:
         logger.warning("[supabase] sync_jeux erreur : %s", e)
 
@@ -1054,27 +1273,462 @@ def _relink_scraped_entries_to_catalogue(site_ids: list[int]) -> None:
 
 def _update_date_maj_bulk_sync(date_map: dict[int, str]) -> int:
     """
-    Met à jour le champ date_maj dans f95_jeux pour une liste de jeux.
+    Met à jour le champ f95_date_maj dans f95_jeux pour une liste de jeux.
     date_map : {site_id: "YYYY-MM-DD"}
-    Retourne le nombre de lignes mises à jour avec succès.
+    Une requête par lot de 200 (RPC f95_jeux_set_date_maj) ; repli ligne à ligne si la
+    fonction n'est pas déployée. Retourne le nombre de site_id mis à jour avec succès.
     """
     sb = _get_supabase()
     if not sb or not date_map:
         return 0
     ok = 0
     now = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
-    for site_id, date_str in date_map.items():
+    items = list(date_map.items())
+    for i in range(0, len(items), 200):
+        chunk = items[i:i + 200]
         try:
-            sb.table("f95_jeux").update({
-                "f95_date_maj":   date_str,
-                "updated_at": now,
-            }).eq("site_id", site_id).execute()
-            ok += 1
+            sb.rpc("f95_jeux_set_date_maj", {
+                "p_rows": [{"site_id": sid, "f95_date_maj": d} for sid, d in chunk],
+            }).execute()
+            ok += len(chunk)
+            continue
         except Exception as e:
-            logger.warning("[supabase] _update_date_maj_bulk site_id=%s : %s", site_id, e)
+            logger.debug("[supabase] f95_jeux_set_date_maj indisponible (%s), écriture ligne à ligne", e)
+        for site_id, date_str in chunk:
+            try:
+                sb.table("f95_jeux").update({
+                    "f95_date_maj":   date_str,
+                    "updated_at": now,
+                }).eq("site_id", site_id).execute()
+                ok += 1
+            except Exception as e:
+                logger.warning("[supabase] _update_date_maj_bulk site_id=%s : %s", site_id, e)
     logger.info("[supabase] _update_date_maj_bulk : %d/%d mis à jour", ok, len(date_map))
+    if ok:
+        _refresh_jeux_canonical_sync(site_ids=date_map.keys())
     return ok
 
+
+def _update_jeux_synopsis_bulk_sync(updates: list[dict]) -> list[bool]:
+    """
+    Écrit synopsis_en / synopsis_fr pour des groupes de lignes f95_jeux.
+    updates : [{"ids": [id, ...], "synopsis_en": str, "synopsis_fr": str}]
+    Une requête par groupe (filtre id IN). Retourne le succès de chaque groupe, dans l'ordre.
+    """
+    sb = _get_supabase()
+    if not sb:
+        return [False] * len(updates)
+    now = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
+    results: list[bool] = []
+    for upd in updates:
+        ids = [i for i in (upd.get("ids") or []) if i is not None]
+        if not ids:
+            results.append(False)
+            continue
+        try:
+            sb.table("f95_jeux").update({
+                "synopsis_en": upd.get("synopsis_en"),
+                "synopsis_fr": upd.get("synopsis_fr"),
+                "updated_at" : now,
+            }).in_("id", ids).execute()
+            results.append(True)
+        except Exception as e:
+            logger.warning("[supabase] _update_jeux_synopsis_bulk ids=%s : %s", ids[:5], e)
+            results.append(False)
+    written = [i for upd, ok in zip(updates, results) if ok for i in upd.get("ids") or [] if i is not None]
+    if written:
+        _refresh_jeux_canonical_sync(jeu_ids=written)
+    return results
+
+# ==================== RSS DATE LEDGER ====================
+
+def _record_rss_dates_sync(date_map: dict[int, str], titles: dict[int, str] | None = None) -> int:
+    """
+    Enregistre dans f95_rss_date_ledger chaque (thread_id, date) vu dans le flux RSS.
+    Le flux ne montre que ~90 lignes : le registre conserve les dates sorties de la fenêtre.
+    N'écrit que les threads nouveaux ou dont la date avance. Retourne ce nombre.
+    """
+    sb = _get_supabase()
+    if not sb or not date_map:
+        return 0
+    thread_ids = sorted(date_map)
+    known = _fetch_rss_ledger_dates_sync(thread_ids)
+    now = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
+    rows = []
+    for tid in thread_ids:
+        date_str = (date_map.get(tid) or "")[:10]
+        if not date_str or (known.get(tid) and known[tid] >= date_str):
+            continue
+        rows.append({
+            "thread_id"   : tid,
+            "date_maj"    : date_str,
+            "title"       : (titles or {}).get(tid) or None,
+            "last_seen_at": now,
+        })
+    for i in range(0, len(rows), 200):
+        try:
+            sb.table("f95_rss_date_ledger").upsert(rows[i:i + 200], on_conflict="thread_id").execute()
+        except Exception as e:
+            logger.warning("[supabase] rss_ledger upsert chunk %d : %s", i // 200, e)
+            return i
+    if rows:
+        logger.info("[supabase] rss_ledger : %d date(s) enregistrée(s)", len(rows))
+    return len(rows)
+
+
+def _fetch_rss_ledger_dates_sync(thread_ids: list[int]) -> dict[int, str]:
+    """
+    Retourne {thread_id: "YYYY-MM-DD"} depuis le registre RSS pour les threads demandés.
+    À consulter avant de planifier un scraping de page de thread.
+    """
+    sb = _get_supabase()
+    if not sb or not thread_ids:
+        return {}
+    out: dict[int, str] = {}
+    ids = sorted({int(t) for t in thread_ids if t is not None})
+    chunk_size = 300
+    for i in range(0, len(ids), chunk_size):
+        try:
+            res = (
+                sb.table("f95_rss_date_ledger")
+                .select("thread_id, date_maj")
+                .in_("thread_id", ids[i:i + chunk_size])
+                .execute()
+            )
+            for row in (res.data or []):
+                if row.get("thread_id") is not None and row.get("date_maj"):
+                    out[int(row["thread_id"])] = str(row["date_maj"])[:10]
+        except Exception as e:
+            logger.warning("[supabase] rss_ledger lecture chunk %d : %s", i // chunk_size, e)
+    return out
+
+# ==================== FILE DE SCRAPING PRIORISÉE ====================
+
+# Poids de la priorité : possession (user_collection), ancienneté de f95_date_maj, activité RSS
+_SCRAPE_WEIGHT_OWNERS     = 10.0   # × log2(1 + nb d'entrées user_collection)
+_SCRAPE_WEIGHT_STALENESS  = 5.0    # × min(jours depuis f95_date_maj, 365) / 365 (date absente = max)
+_SCRAPE_WEIGHT_RSS_RECENT = 3.0    # vu dans le flux RSS depuis moins de _SCRAPE_RSS_RECENT_DAYS
+_SCRAPE_RSS_RECENT_DAYS   = 14
+
+
+def _count_owners_by_thread_sync(sb, thread_ids: list[int]) -> dict[int, int]:
+    """
+    Nombre d'entrées user_collection référençant chaque thread.
+    Agrégé en base (RPC f95_count_collection_owners : une ligne par thread, < 1000 par paquet) ;
+    repli sur une lecture paginée des lignes si la fonction n'est pas déployée.
+    """
+    counts: dict[int, int] = {}
+    for i in range(0, len(thread_ids), 500):
+        chunk = thread_ids[i:i + 500]
+        try:
+            res = sb.rpc("f95_count_collection_owners", {"p_thread_ids": chunk}).execute()
+            for row in (res.data or []):
+                if row.get("f95_thread_id") is not None:
+                    counts[int(row["f95_thread_id"])] = int(row.get("owners") or 0)
+            continue
+        except Exception as e:
+            logger.debug("[supabase] scrape_queue owners RPC indisponible (%s), lecture paginée", e)
+        try:
+            offset = 0
+            while True:
+                res = (
+                    sb.table("user_collection")
+                    .select("f95_thread_id")
+                    .in_("f95_thread_id", chunk)
+                    .order("id")
+                    .range(offset, offset + 999)
+                    .execute()
+                )
+                page = res.data or []
+                for row in page:
+                    tid = row.get("f95_thread_id")
+                    if tid is not None:
+                        counts[int(tid)] = counts.get(int(tid), 0) + 1
+                if len(page) < 1000:
+                    break
+                offset += 1000
+        except Exception as e:
+            logger.warning("[supabase] scrape_queue owners chunk %d : %s", i // 500, e)
+    return counts
+
+
+def _recent_rss_threads_sync(sb, thread_ids: list[int]) -> set[int]:
+    """Threads vus dans le flux RSS (registre) depuis moins de _SCRAPE_RSS_RECENT_DAYS."""
+    cutoff = (
+        datetime.datetime.now(ZoneInfo("UTC")) - datetime.timedelta(days=_SCRAPE_RSS_RECENT_DAYS)
+    ).isoformat()
+    recent: set[int] = set()
+    for i in range(0, len(thread_ids), 300):
+        try:
+            res = (
+                sb.table("f95_rss_date_ledger")
+                .select("thread_id")
+                .in_("thread_id", thread_ids[i:i + 300])
+                .gte("last_seen_at", cutoff)
+                .execute()
+            )
+            recent.update(int(r["thread_id"]) for r in (res.data or []) if r.get("thread_id") is not None)
+        except Exception as e:
+            logger.warning("[supabase] scrape_queue rss chunk %d : %s", i // 300, e)
+    return recent
+
+
+def _compute_scrape_priorities_sync(jeux: list[dict]) -> dict[int, float]:
+    """
+    Calcule la priorité de scraping de chaque jeu {site_id, f95_date_maj?}.
+    Plus la valeur est haute, plus le jeu est vu par des utilisateurs et plus sa date est périmée.
+    """
+    sb = _get_supabase()
+    site_ids = sorted({int(j["site_id"]) for j in jeux if j.get("site_id") is not None})
+    if not sb or not site_ids:
+        return {}
+    owners = _count_owners_by_thread_sync(sb, site_ids)
+    rss_recent = _recent_rss_threads_sync(sb, site_ids)
+    today = datetime.date.today()
+
+    priorities: dict[int, float] = {}
+    for j in jeux:
+        if j.get("site_id") is None:
+            continue
+        sid = int(j["site_id"])
+        raw_date = str(j.get("f95_date_maj") or "")[:10]
+        try:
+            if not raw_date or raw_date == "2020-01-01":
+                raise ValueError
+            days = (today - datetime.date.fromisoformat(raw_date)).days
+        except ValueError:
+            days = 365
+        priority = (
+            _SCRAPE_WEIGHT_OWNERS * math.log2(1 + owners.get(sid, 0))
+            + _SCRAPE_WEIGHT_STALENESS * min(max(days, 0), 365) / 365
+            + (_SCRAPE_WEIGHT_RSS_RECENT if sid in rss_recent else 0.0)
+        )
+        priorities[sid] = max(priority, priorities.get(sid, 0.0))
+    return priorities
+
+
+def _enqueue_scrape_candidates_sync(jeux: list[dict]) -> int:
+    """
+    (Ré)insère les jeux à scraper dans f95_scrape_queue avec leur priorité à jour,
+    puis retire les lignes des jeux absents de `jeux` (liste complète des candidats).
+    Les compteurs d'échecs (attempts) des lignes déjà en file sont conservés.
+    Retourne le nombre de lignes écrites.
+    """
+    sb = _get_supabase()
+    if not sb:
+        return 0
+    priorities = _compute_scrape_priorities_sync(jeux) if jeux else {}
+    now = datetime.datetime.now(ZoneInfo("UTC")).isoformat()
+    rows, seen = [], set()
+    for j in jeux:
+        sid = j.get("site_id")
+        if sid is None or int(sid) in seen:
+            continue
+        seen.add(int(sid))
+        rows.append({
+            "site_id"    : int(sid),
+            "nom_url"    : j.get("nom_url"),
+            "priority"   : round(priorities.get(int(sid), 0.0), 4),
+            "enqueued_at": now,
+        })
+    written = 0
+    for i in range(0, len(rows), 200):
+        try:
+            sb.table("f95_scrape_queue").upsert(rows[i:i + 200], on_conflict="site_id").execute()
+            written += len(rows[i:i + 200])
+        except Exception as e:
+            logger.warning("[supabase] scrape_queue upsert chunk %d : %s", i // 200, e)
+    # Jeux qui ne sont plus candidats (date rafraîchie par une autre voie, URL retirée…)
+    try:
+        res = sb.rpc("f95_scrape_queue_prune", {"p_site_ids": sorted(seen)}).execute()
+        if res.data:
+            logger.info("[supabase] scrape_queue : %s jeu(x) retiré(s), plus candidats", res.data)
+    except Exception as e:
+        logger.warning("[supabase] scrape_queue purge : %s", e)
+    logger.info("[supabase] scrape_queue : %d jeu(x) en file", written)
+    return written
+
+
+def _next_scrape_batch_sync(limit: int) -> list[dict]:
+    """
+    Retourne les `limit` jeux les plus prioritaires de la file ({site_id, nom_url}).
+    Les échecs répétés reculent : tri sur priority / (1 + attempts) via la colonne effective_priority.
+    """
+    sb = _get_supabase()
+    if not sb or limit <= 0:
+        return []
+    try:
+        res = (
+            sb.table("f95_scrape_queue")
+            .select("site_id, nom_url, priority, attempts")
+            .order("effective_priority", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return res.data or []
+    except Exception as e:
+        logger.warning("[supabase] scrape_queue lecture : %s", e)
+        return []
+
+
+def _complete_scrape_batch_sync(done_site_ids: list[int], failed_site_ids: list[int]) -> None:
+    """Retire de la file les jeux traités ; incrémente attempts pour ceux sans date trouvée."""
+    sb = _get_supabase()
+    if not sb:
+        return
+    for i in range(0, len(done_site_ids), 200):
+        try:
+            sb.table("f95_scrape_queue").delete().in_("site_id", done_site_ids[i:i + 200]).execute()
+        except Exception as e:
+            logger.warning("[supabase] scrape_queue suppression chunk %d : %s", i // 200, e)
+    if failed_site_ids:
+        try:
+            sb.rpc("f95_scrape_queue_mark_failed", {"p_site_ids": failed_site_ids}).execute()
+        except Exception as e:
+            logger.warning("[supabase] scrape_queue mark_failed : %s", e)
+
+# ==================== MÉMOIRE DE TRADUCTION ====================
+
+def _fetch_translation_memory_sync(key: str) -> Optional[str]:
+    """Traduction mémorisée pour une clé (sha256 texte + langues), None si absente."""
+    sb = _get_supabase()
+    if not sb:
+        return None
+    try:
+        res = (
+            sb.table("translation_memory")
+            .select("translated")
+            .eq("key", key)
+            .limit(1)
+            .execute()
+        )
+        rows = res.data or []
+        return rows[0].get("translated") if rows else None
+    except Exception as e:
+        logger.warning("[supabase] translation_memory lecture : %s", e)
+        return None
+
+
+def _store_translation_memory_sync(key: str, source_lang: str, target_lang: str,
+                                   source_len: int, translated: str) -> bool:
+    """Enregistre (upsert) une traduction réussie dans la mémoire persistante."""
+    sb = _get_supabase()
+    if not sb:
+        return False
+    try:
+        sb.table("translation_memory").upsert({
+            "key"        : key,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "source_len" : source_len,
+            "translated" : translated,
+            "updated_at" : datetime.datetime.now(ZoneInfo("UTC")).isoformat(),
+        }, on_conflict="key").execute()
+        return True
+    except Exception as e:
+        logger.warning("[supabase] translation_memory écriture : %s", e)
+        return False
+
+
+# ==================== OUTBOX DISCORD ====================
+
+def _outbox_claim_sync(key: str, op: str, payload: dict) -> Optional[dict]:
+    """
+    Enregistre un job d'outbox (status pending) s'il n'existe pas encore.
+    INSERT ... ON CONFLICT DO NOTHING : un seul appelant concurrent obtient l'insertion.
+    Retourne la ligne existante si la clé est déjà connue ({} si insérée, None si Supabase indisponible,
+    {"status": "unknown"} si la clé existe mais que sa ligne n'a pas pu être relue).
+    """
+    sb = _get_supabase()
+    if not sb:
+        return None
+    try:
+        res = sb.table("discord_outbox").upsert({
+            "idempotency_key": key,
+            "op"             : op,
+            "payload"        : payload,
+            "status"         : "pending",
+        }, on_conflict="idempotency_key", ignore_duplicates=True).execute()
+        if res.data:
+            return {}
+        existing = _outbox_fetch_sync(key)
+        return existing if existing is not None else {"idempotency_key": key, "status": "unknown"}
+    except Exception as e:
+        logger.warning("[supabase] discord_outbox enregistrement %s : %s", op, e)
+        return None
+
+
+def _outbox_fetch_sync(key: str) -> Optional[dict]:
+    """Ligne discord_outbox pour une clé d'idempotence (None si absente ou Supabase indisponible)."""
+    sb = _get_supabase()
+    if not sb:
+        return None
+    try:
+        res = sb.table("discord_outbox").select("*").eq("idempotency_key", key).limit(1).execute()
+        return res.data[0] if res.data else None
+    except Exception as e:
+        logger.warning("[supabase] discord_outbox lecture %s : %s", key[:16], e)
+        return None
+
+
+def _outbox_retry_failed_sync(key: str) -> bool:
+    """
+    Repasse un job failed en pending (nouvel essai demandé par le client).
+    Conditionnel sur status=failed : True seulement pour l'appelant qui a effectué la transition.
+    """
+    sb = _get_supabase()
+    if not sb:
+        return False
+    try:
+        res = (
+            sb.table("discord_outbox")
+            .update({
+                "status"    : "pending",
+                "attempts"  : 0,
+                "updated_at": datetime.datetime.now(ZoneInfo("UTC")).isoformat(),
+            })
+            .eq("idempotency_key", key)
+            .eq("status", "failed")
+            .execute()
+        )
+        return bool(res.data)
+    except Exception as e:
+        logger.warning("[supabase] discord_outbox relance %s : %s", key[:16], e)
+        return False
+
+
+def _outbox_update_sync(key: str, fields: dict) -> None:
+    """Met à jour un job d'outbox (status, attempts, result, last_error…)."""
+    sb = _get_supabase()
+    if not sb:
+        return
+    try:
+        fields = dict(fields, updated_at=datetime.datetime.now(ZoneInfo("UTC")).isoformat())
+        sb.table("discord_outbox").update(fields).eq("idempotency_key", key).execute()
+    except Exception as e:
+        logger.warning("[supabase] discord_outbox MAJ %s : %s", key[:16], e)
+
+
+def _outbox_fetch_unfinished_sync() -> list[dict]:
+    """Jobs pending / running (reprise au démarrage), du plus ancien au plus récent."""
+    sb = _get_supabase()
+    if not sb:
+        return []
+    try:
+        res = (
+            sb.table("discord_outbox")
+            .select("*")
+            .in_("status", ["pending", "running"])
+            .order("created_at")
+            .limit(500)
+            .execute()
+        )
+        return res.data or []
+    except Exception as e:
+        logger.warning("[supabase] discord_outbox lecture : %s", e)
+        return []
+
+
 # ==================== API KEYS ====================
 
 def _update_key_usage_sync(key_hash: str):
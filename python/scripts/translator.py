@@ -1,24 +1,111 @@
 """
 Module de traduction via Google Translate API non-officielle (gratuite).
-Dépendances : aiohttp
+Mémoire de traduction : RAM (LRU) puis Supabase (translation_memory) avant tout appel réseau.
+Dépendances : aiohttp, metrics
 Logger : [translator]
 """
 
+import asyncio
+import hashlib
 import logging
+import re
 import urllib.parse
+from collections import OrderedDict
 from typing import Optional
 
 import aiohttp
 
+from config import config
+from metrics import track_upstream
+from supabase_client import _fetch_translation_memory_sync, _store_translation_memory_sync
+
 logger = logging.getLogger("translator")
 
 # API Google Translate non-officielle (gratuite, pas de clé requise)
 GOOGLE_TRANSLATE_API = "https://translate.googleapis.com/translate_a/single"
 
+_MAX_CHARS_PER_REQUEST = 4500          # sous la limite Google (~5000), marge pour l'encodage
+_PACK_SEPARATOR = "\n\n###\n\n"        # séparateur des textes courts regroupés en une requête
+_PACK_SPLIT_RE = re.compile(r"\s*#\s*#\s*#\s*")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+_THROTTLE_STATUSES = (429, 503)
+_MAX_ATTEMPTS = 4
+
+
+def translation_memory_key(text: str, source_lang: str, target_lang: str) -> str:
+    """Clé de mémoire : sha256 de (langue source, langue cible, texte normalisé)."""
+    raw = f"{source_lang.lower()}\x1f{target_lang.lower()}\x1f{text.strip()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _TranslationMemory:
+    """
+    Mémoire de traduction à deux niveaux : LRU en RAM puis table Supabase translation_memory.
+    Seules les traductions réussies sont mémorisées. Compteurs de hits pour le suivi du ratio.
+    """
+
+    def __init__(self, max_entries: int):
+        self._store: "OrderedDict[str, str]" = OrderedDict()
+        self._max_entries = max_entries
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, translated: str) -> None:
+        if self._max_entries <= 0:
+            return
+        self._store[key] = translated
+        self._store.move_to_end(key)
+        while len(self._store) > self._max_entries:
+            self._store.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        cached = self._store.get(key)
+        if cached is not None:
+            self._store.move_to_end(key)
+            self.local_hits += 1
+            return cached
+        loop = asyncio.get_event_loop()
+        cached = await loop.run_in_executor(None, _fetch_translation_memory_sync, key)
+        if cached:
+            self._remember(key, cached)
+            self.remote_hits += 1
+            return cached
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, source_lang: str, target_lang: str, source_len: int, translated: str) -> None:
+        self._remember(key, translated)
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None, _store_translation_memory_sync, key, source_lang, target_lang, source_len, translated,
+        )
+
+    def get_info(self) -> dict:
+        lookups = self.local_hits + self.remote_hits + self.misses
+        return {
+            "entries":     len(self._store),
+            "max_entries": self._max_entries,
+            "local_hits":  self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses":      self.misses,
+            "hit_ratio":   round((self.local_hits + self.remote_hits) / lookups, 3) if lookups else None,
+        }
+
+
+_memory = _TranslationMemory(max_entries=config.TRANSLATION_MEMORY_MAX_ENTRIES)
+
+
+def get_translation_memory_info() -> dict:
+    """Statistiques de la mémoire de traduction (taille RAM, hits locaux/Supabase, ratio)."""
+    return _memory.get_info()
+
 
 async def translate_text(session, text: str, source_lang: str = "en", target_lang: str = "fr") -> Optional[str]:
     """
     Traduit un texte via l'API Google Translate non-officielle.
+    Un texte déjà traduit (mêmes langues) est servi par la mémoire de traduction sans appel réseau.
+    Les textes longs sont découpés aux limites de paragraphes / phrases puis réassemblés.
     
     Args:
         session: aiohttp.ClientSession
@@ -34,90 +121,290 @@ async def translate_text(session, text: str, source_lang: str = "en", target_lan
         return None
     
     text = text.strip()
-    
+    key = translation_memory_key(text, source_lang, target_lang)
+    cached = await _memory.get(key)
+    if cached:
+        logger.info("[translator] Mémoire de traduction : %s → %s (%d chars)", source_lang, target_lang, len(text))
+        return cached
+
+    if len(text) <= _MAX_CHARS_PER_REQUEST:
+        translated = await _translate_remote(session, text, source_lang, target_lang)
+    else:
+        translated = await _translate_chunked(session, text, source_lang, target_lang)
+    if translated:
+        await _memory.put(key, source_lang, target_lang, len(text), translated)
+    return translated
+
+
+def _split_for_translation(text: str, limit: int = _MAX_CHARS_PER_REQUEST) -> list[tuple[str, str]]:
+    """
+    Découpe un texte en morceaux <= limit : paragraphes d'abord, puis phrases,
+    coupe franche en dernier recours. Retourne [(séparateur précédent, morceau)] pour réassembler.
+    """
+    chunks: list[tuple[str, str]] = []
+    current, current_sep = "", ""
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        pieces = [para] if len(para) <= limit else _split_paragraph(para, limit)
+        for n, piece in enumerate(pieces):
+            sep = "\n\n" if n == 0 else " "
+            candidate = f"{current}{sep}{piece}" if current else piece
+            if len(candidate) <= limit:
+                if not current:
+                    current_sep = sep
+                current = candidate
+            else:
+                if current:
+                    chunks.append((current_sep, current))
+                current, current_sep = piece, sep
+    if current:
+        chunks.append((current_sep, current))
+    return chunks
+
+
+def _split_paragraph(para: str, limit: int) -> list[str]:
+    """Regroupe les phrases d'un paragraphe trop long en morceaux <= limit."""
+    pieces: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(para):
+        while len(sentence) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:limit])
+            sentence = sentence[limit:]
+        candidate = f"{current} {sentence}" if current else sentence
+        if len(candidate) <= limit:
+            current = candidate
+        else:
+            pieces.append(current)
+            current = sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+async def _translate_chunked(
+    session,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Optional[str]:
+    """
+    Traduit un texte long morceau par morceau ; None si un morceau échoue.
+    semaphore : borne partagée avec l'appelant (lot), sinon config.TRANSLATION_CONCURRENCY.
+    """
+    chunks = _split_for_translation(text)
+    logger.info("[translator] Texte long (%d chars) découpé en %d morceau(x)", len(text), len(chunks))
+    semaphore = semaphore or asyncio.Semaphore(config.TRANSLATION_CONCURRENCY)
+
+    async def _one(chunk: str) -> Optional[str]:
+        async with semaphore:
+            return await _translate_remote(session, chunk, source_lang, target_lang, min_length=1)
+
+    parts = await asyncio.gather(*(_one(c) for _, c in chunks))
+    if any(p is None for p in parts):
+        logger.warning("[translator] Traduction découpée incomplète (%d/%d morceaux)",
+                       sum(p is not None for p in parts), len(parts))
+        return None
+    return "".join(
+        (sep if n else "") + part for n, ((sep, _), part) in enumerate(zip(chunks, parts))
+    )
+
+
+async def _translate_remote(
+    session,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    *,
+    min_length: int = 11,
+) -> Optional[str]:
+    """
+    Appel Google Translate (texte déjà nettoyé, <= _MAX_CHARS_PER_REQUEST) ; None en cas d'erreur.
+    Réessaie avec backoff exponentiel sur throttling (HTTP 429 / 503, Retry-After respecté).
+    """
     # Limiter la longueur (Google Translate a une limite)
     if len(text) > 5000:
         logger.warning("[translator] Texte trop long (%d chars), troncature à 5000", len(text))
         text = text[:5000]
     
-    try:
-        # URL de l'API Google Translate non-officielle
-        base_url = "https://translate.googleapis.com/translate_a/single"
+    params = {
+        "client": "gtx",
+        "sl": source_lang,
+        "tl": target_lang,
+        "dt": "t",
+        "q": text
+    }
+    
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    
+    logger.info("[translator] Traduction %s → %s (%d chars)", source_lang, target_lang, len(text))
+    
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        delay = None
+        try:
+            with track_upstream("google_translate", "translate") as call:
+                async with session.get(GOOGLE_TRANSLATE_API, params=params, headers=headers, timeout=30) as response:
+                    call.status = response.status
+                    if response.status in _THROTTLE_STATUSES and attempt < _MAX_ATTEMPTS:
+                        retry_after = response.headers.get("Retry-After", "")
+                        delay = float(retry_after) if retry_after.isdigit() else 2.0 ** attempt
+                        logger.warning("[translator] HTTP %d (throttling), nouvel essai dans %.0fs (%d/%d)",
+                                       response.status, delay, attempt, _MAX_ATTEMPTS)
+                    elif response.status != 200:
+                        logger.warning("[translator] HTTP %d", response.status)
+                        return None
+                    else:
+                        data = await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            if attempt < _MAX_ATTEMPTS:
+                logger.warning("[translator] Timeout, nouvel essai (%d/%d)", attempt, _MAX_ATTEMPTS)
+                await asyncio.sleep(2.0 ** attempt)
+                continue
+            logger.error("[translator] Timeout après %d essais", _MAX_ATTEMPTS)
+            return None
+        except Exception as e:
+            logger.error("[translator] Exception: %s", e, exc_info=True)
+            return None
+        if delay is not None:
+            # Attente hors de la mesure de latence de l'appel
+            await asyncio.sleep(delay)
+            continue
         
-        params = {
-            "client": "gtx",
-            "sl": source_lang,
-            "tl": target_lang,
-            "dt": "t",
-            "q": text
-        }
+        # La réponse est une structure complexe: [[["texte_traduit", "texte_source", null, null, 3], ...], ...]
+        if not data or not isinstance(data, list) or len(data) == 0 or not isinstance(data[0], list):
+            logger.warning("[translator] Réponse vide ou invalide")
+            return None
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
+        # Extraire les segments traduits
+        translated_parts = []
         
-        logger.info("[translator] Traduction %s → %s (%d chars)", source_lang, target_lang, len(text))
+        for segment in data[0]:
+            if isinstance(segment, list) and len(segment) > 0:
+                translated_text = segment[0]
+                if translated_text and isinstance(translated_text, str):
+                    translated_parts.append(translated_text)
         
-        async with session.get(base_url, params=params, headers=headers, timeout=30) as response:
-            if response.status != 200:
-                logger.warning("[translator] HTTP %d", response.status)
-                return None
-            
-            data = await response.json()
-            
-            # La réponse est une structure complexe: [[["texte_traduit", "texte_source", null, null, 3], ...], ...]
-            if not data or not isinstance(data, list) or len(data) == 0:
-                logger.warning("[translator] Réponse vide ou invalide")
-                return None
-            
-            # Extraire les segments traduits
-            translated_parts = []
-            
-            for segment in data[0]:
-                if isinstance(segment, list) and len(segment) > 0:
-                    translated_text = segment[0]
-                    if translated_text and isinstance(translated_text, str):
-                        translated_parts.append(translated_text)
-            
-            if not translated_parts:
-                logger.warning("[translator] Aucune traduction extraite")
-                return None
-            
-            result = "".join(translated_parts).strip()
-            
-            if result and len(result) > 10:
-                logger.info("[translator] ✅ Traduction réussie (%d chars)", len(result))
-                return result
-            else:
-                logger.warning("[translator] Traduction trop courte (%d chars)", len(result) if result else 0)
-                return None
-    
-    except Exception as e:
-        logger.error("[translator] Exception: %s", e, exc_info=True)
+        if not translated_parts:
+            logger.warning("[translator] Aucune traduction extraite")
+            return None
+        
+        result = "".join(translated_parts).strip()
+        
+        if result and len(result) >= min_length:
+            logger.info("[translator] ✅ Traduction réussie (%d chars)", len(result))
+            return result
+        logger.warning("[translator] Traduction trop courte (%d chars)", len(result) if result else 0)
         return None
+    return None
+
+
+def _pack_texts(items: list[tuple[int, str]], limit: int = _MAX_CHARS_PER_REQUEST) -> list[list[tuple[int, str]]]:
+    """Regroupe des textes courts (index, texte) en paquets dont la jointure tient dans une requête."""
+    packs: list[list[tuple[int, str]]] = []
+    current: list[tuple[int, str]] = []
+    size = 0
+    for idx, text in items:
+        added = len(text) + (len(_PACK_SEPARATOR) if current else 0)
+        if current and size + added > limit:
+            packs.append(current)
+            current, size = [], 0
+            added = len(text)
+        current.append((idx, text))
+        size += added
+    if current:
+        packs.append(current)
+    return packs
 
 
 async def translate_synopsis_batch(
     session: aiohttp.ClientSession,
-    synopsis_list: list[dict]
+    synopsis_list: list[dict],
+    *,
+    source_lang: str = "en",
+    target_lang: str = "fr",
+    concurrency: Optional[int] = None,
 ) -> list[dict]:
     """
     Traduit un lot de synopsis (avec gestion d'erreurs individuelles).
+    Mémoire de traduction consultée d'abord ; les textes courts restants partagent une requête
+    (séparateur vérifié au retour, repli texte par texte sinon), les longs sont découpés.
+    Requêtes en parallèle, bornées par concurrency (défaut config.TRANSLATION_CONCURRENCY).
     
     Args:
         session: Session aiohttp
         synopsis_list: Liste de dicts {"game_id": ..., "synopsis_en": ...}
     
     Returns:
-        Liste de dicts {"game_id": ..., "synopsis_fr": ..., "success": bool}
+        Liste de dicts {"game_id": ..., "synopsis_fr": ..., "success": bool} (même ordre)
     """
+    translations: dict[int, Optional[str]] = {}
+    to_pack: list[tuple[int, str]] = []
+    to_split: list[tuple[int, str]] = []
+
+    for idx, item in enumerate(synopsis_list):
+        synopsis_en = (item.get("synopsis_en") or "").strip()
+        if not synopsis_en:
+            continue
+        cached = await _memory.get(translation_memory_key(synopsis_en, source_lang, target_lang))
+        if cached:
+            translations[idx] = cached
+        elif len(synopsis_en) > _MAX_CHARS_PER_REQUEST // 2:
+            to_split.append((idx, synopsis_en))
+        else:
+            to_pack.append((idx, synopsis_en))
+
+    semaphore = asyncio.Semaphore(concurrency or config.TRANSLATION_CONCURRENCY)
+
+    async def _translate_one(idx: int, text: str) -> None:
+        # Mémoire déjà consultée : appel direct, chaque requête prend le sémaphore une seule fois
+        if len(text) <= _MAX_CHARS_PER_REQUEST:
+            async with semaphore:
+                translated = await _translate_remote(session, text, source_lang, target_lang)
+        else:
+            translated = await _translate_chunked(session, text, source_lang, target_lang, semaphore)
+        translations[idx] = translated
+        if translated:
+            await _memory.put(
+                translation_memory_key(text, source_lang, target_lang),
+                source_lang, target_lang, len(text), translated,
+            )
+
+    async def _translate_pack(pack: list[tuple[int, str]]) -> None:
+        if len(pack) == 1:
+            await _translate_one(*pack[0])
+            return
+        async with semaphore:
+            joined = await _translate_remote(
+                session, _PACK_SEPARATOR.join(t for _, t in pack), source_lang, target_lang,
+            )
+        parts = [p.strip() for p in _PACK_SPLIT_RE.split(joined)] if joined else []
+        if len(parts) != len(pack) or not all(parts):
+            logger.warning("[translator] Paquet de %d textes non séparable, repli texte par texte", len(pack))
+            await asyncio.gather(*(_translate_one(i, t) for i, t in pack))
+            return
+        for (idx, text), translated in zip(pack, parts):
+            translations[idx] = translated
+            await _memory.put(
+                translation_memory_key(text, source_lang, target_lang),
+                source_lang, target_lang, len(text), translated,
+            )
+
+    await asyncio.gather(
+        *(_translate_pack(p) for p in _pack_texts(to_pack)),
+        *(_translate_one(i, t) for i, t in to_split),
+    )
+
     results = []
-    
-    for item in synopsis_list:
+    for idx, item in enumerate(synopsis_list):
         game_id = item.get("game_id")
-        synopsis_en = item.get("synopsis_en", "")
-        
-        if not synopsis_en or not synopsis_en.strip():
+        if not (item.get("synopsis_en") or "").strip():
             results.append({
                 "game_id": game_id,
                 "synopsis_fr": None,
@@ -125,9 +412,7 @@ async def translate_synopsis_batch(
                 "error": "Synopsis vide"
             })
             continue
-        
-        synopsis_fr = await translate_text(session, synopsis_en, "en", "fr")
-        
+        synopsis_fr = translations.get(idx)
         results.append({
             "game_id": game_id,
             "synopsis_fr": synopsis_fr,
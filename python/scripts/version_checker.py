@@ -1,7 +1,7 @@
 """
 Controle des versions F95 via l'API checker.php + systeme anti-doublon.
 Parcourt tous les salons forum du serveur (salon principal + mappings + traducteurs externes).
-Dependances : config, content_parser, supabase_client, discord_api, forum_manager
+Dependances : config, content_parser, supabase_client, discord_api, forum_manager, metrics
 Logger       : [f95]
 """
 
@@ -13,6 +13,7 @@ from typing import Optional, List, Dict
 import aiohttp
 
 from config import config
+from metrics import track_upstream
 from content_parser import _normalize_version, _extract_f95_thread_id
 from forum_manager import (
     _collect_all_forum_threads,
@@ -70,45 +71,98 @@ class VersionAlert:
         f95_version:  Optional[str],
         post_version: Optional[str],
         updated:      bool,
+        forum_name:   str = "",
     ):
         self.thread_name  = thread_name
         self.thread_url   = thread_url
         self.f95_version  = f95_version
         self.post_version = post_version
         self.updated      = updated
+        self.forum_name   = forum_name
+
+
+_DISCORD_CONTENT_LIMIT = 2000
+_HEADER_RESERVE = 80          # place gardee pour l'en-tete "Mises a jour detectees (suite x/y)"
+_MAX_THREAD_NAME = 200
+
+
+def _format_alert(alert: VersionAlert) -> str:
+    name = alert.thread_name if len(alert.thread_name) <= _MAX_THREAD_NAME else alert.thread_name[:_MAX_THREAD_NAME - 1] + "…"
+    if alert.f95_version:
+        return (
+            f"**{name}**\n"
+            f"├ Version F95 : `{alert.f95_version}`\n"
+            f"├ Version du poste : `{alert.post_version or 'Non renseignee'}`\n"
+            f"├ Version modifiee : {'OUI ✅' if alert.updated else 'NON ❌'}\n"
+            f"└ Lien : {alert.thread_url}\n"
+        )
+    return (
+        f"**{name}**\n"
+        f"├ Version F95 : Non detectable ⚠️\n"
+        f"├ Version du poste : `{alert.post_version or 'Non renseignee'}`\n"
+        f"├ Version modifiee : NON\n"
+        f"└ Lien : {alert.thread_url}\n"
+    )
+
+
+def _pack_alerts(alerts: List[VersionAlert]) -> List[str]:
+    """
+    Regroupe les alertes par salon forum et remplit chaque message jusqu'a la limite Discord
+    (2000 caracteres) au lieu d'un nombre fixe d'alertes. L'en-tete d'un salon est repete
+    (suite) quand son groupe deborde sur le message suivant.
+    """
+    by_forum: Dict[str, List[VersionAlert]] = {}
+    for alert in alerts:
+        by_forum.setdefault(alert.forum_name or "", []).append(alert)
+
+    budget = _DISCORD_CONTENT_LIMIT - _HEADER_RESERVE
+    bodies: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            bodies.append("\n".join(current))
+        current, size = [], 0
+
+    for forum_name, group in by_forum.items():
+        forum_header = f"📂 **{forum_name}**" if forum_name else ""
+        header_pending = bool(forum_header)
+        for alert in group:
+            block = _format_alert(alert)
+            needed = len(block) + 1 + (len(forum_header) + 1 if header_pending or not current else 0)
+            if current and size + needed > budget:
+                flush()
+            if forum_header and (header_pending or not current):
+                line = forum_header if header_pending else f"{forum_header} (suite)"
+                current.append(line)
+                size += len(line) + 1
+                header_pending = False
+            current.append(block)
+            size += len(block) + 1
+    flush()
+
+    title = f"🚨 **Mises a jour detectees** ({len(alerts)} jeux)"
+    if len(bodies) == 1:
+        return [f"{title}\n\n{bodies[0]}"]
+    return [f"{title} — {i}/{len(bodies)}\n\n{body}" for i, body in enumerate(bodies, 1)]
 
 
 async def _group_and_send_alerts(channel, alerts: List[VersionAlert]):
-    """Envoie les alertes groupees dans le salon de notification (max 10 par message)."""
+    """
+    Envoie les alertes groupees par salon forum dans le salon de notification,
+    en messages remplis jusqu'a 2000 caracteres. Le rythme d'envoi est laisse au
+    gestionnaire de rate limit de discord.py (attente sur 429 / bucket epuise)
+    plutot qu'a une pause fixe entre messages.
+    """
     if not alerts:
         return
 
-    title = f"🚨 **Mises a jour detectees** ({len(alerts)} jeux)"
-
-    for i in range(0, len(alerts), 10):
-        batch     = alerts[i:i + 10]
-        msg_parts = [title, ""]
-
-        for alert in batch:
-            if alert.f95_version:
-                msg_parts.append(
-                    f"**{alert.thread_name}**\n"
-                    f"├ Version F95 : `{alert.f95_version}`\n"
-                    f"├ Version du poste : `{alert.post_version or 'Non renseignee'}`\n"
-                    f"├ Version modifiee : {'OUI ✅' if alert.updated else 'NON ❌'}\n"
-                    f"└ Lien : {alert.thread_url}\n"
-                )
-            else:
-                msg_parts.append(
-                    f"**{alert.thread_name}**\n"
-                    f"├ Version F95 : Non detectable ⚠️\n"
-                    f"├ Version du poste : `{alert.post_version or 'Non renseignee'}`\n"
-                    f"├ Version modifiee : NON\n"
-                    f"└ Lien : {alert.thread_url}\n"
-                )
-
-        await channel.send("\n".join(msg_parts))
-        await asyncio.sleep(1.5)
+    messages = _pack_alerts(alerts)
+    for content in messages:
+        await channel.send(content)
+    logger.info("[f95] %d alerte(s) envoyee(s) en %d message(s)", len(alerts), len(messages))
 
 
 # ==================== API F95 ====================
@@ -143,17 +197,19 @@ async def fetch_f95_versions_by_ids(
         checker_url = f"https://f95zone.to/sam/checker.php?threads={ids_str}"
 
         try:
-            async with session.get(checker_url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                if resp.status != 200:
-                    logger.warning("[f95] Checker API HTTP %d pour le bloc %d", resp.status, chunk_num)
-                    continue
-                data = await resp.json()
-                if data.get("status") == "ok" and "msg" in data:
-                    chunk_versions = data["msg"]
-                    logger.info("[f95] Bloc %d : %d versions recuperees", chunk_num, len(chunk_versions))
-                    all_versions.update(chunk_versions)
-                else:
-                    logger.warning("[f95] Bloc %d : reponse invalide", chunk_num)
+            with track_upstream("f95", "checker") as call:
+                async with session.get(checker_url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                    call.status = resp.status
+                    if resp.status != 200:
+                        logger.warning("[f95] Checker API HTTP %d pour le bloc %d", resp.status, chunk_num)
+                        continue
+                    data = await resp.json()
+                    if data.get("status") == "ok" and "msg" in data:
+                        chunk_versions = data["msg"]
+                        logger.info("[f95] Bloc %d : %d versions recuperees", chunk_num, len(chunk_versions))
+                        all_versions.update(chunk_versions)
+                    else:
+                        logger.warning("[f95] Bloc %d : reponse invalide", chunk_num)
         except Exception as e:
             logger.warning("[f95] Erreur bloc %d : %s", chunk_num, e)
 
@@ -231,7 +287,7 @@ async def run_version_check_once():
     logger.info("[f95] %d threads au total a verifier (actifs + archives)", len(threads_with_forum))
 
     async with aiohttp.ClientSession(headers=headers) as session:
-        for _forum_name, thread in threads_with_forum:
+        for forum_name, thread in threads_with_forum:
             await asyncio.sleep(0.3)
 
             game_link, post_version = await _extract_post_data(thread)
@@ -250,7 +306,7 @@ async def run_version_check_once():
                 logger.warning("[f95] Impossible d'extraire l'ID F95 depuis : %s", game_link)
                 continue
 
-            thread_mapping[f95_id] = (thread, post_version)
+            thread_mapping[f95_id] = (thread, post_version, forum_name)
             logger.info("[f95] Thread mappe : %s -> ID F95 %s", thread.name, f95_id)
 
         if not thread_mapping:
@@ -267,7 +323,7 @@ async def run_version_check_once():
             return
 
         # ── Phase 3 : comparaison ─────────────────────────────────────────────
-        for f95_id, (thread, post_version) in thread_mapping.items():
+        for f95_id, (thread, post_version, forum_name) in thread_mapping.items():
 
             # Log si l'API n'a pas retourne de version pour cet ID
             if f95_id not in f95_versions:
@@ -288,6 +344,7 @@ async def run_version_check_once():
                     all_alerts.append(VersionAlert(
                         thread.name, thread.jump_url,
                         api_version_clean, post_version_clean, update_success,
+                        forum_name=forum_name,
                     ))
                     _mark_as_notified(thread.id, api_version_clean)
             else:
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import datetime
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 PARIS_TZ = ZoneInfo("Europe/Paris")
@@ -128,6 +128,37 @@ def compute_next_release_date(from_iso: str, weekdays: List[int]) -> Optional[st
     return None
 
 
+def compute_release_calendar(
+    anchor_iso: str,
+    chapter: str,
+    weekdays: List[int],
+    monthly: bool = False,
+    *,
+    horizon_days: int = 60,
+    max_entries: int = 60,
+) -> List[Tuple[str, str]]:
+    """
+    Sorties [(YYYY-MM-DD, chapitre)] à partir de l'ancre (incluse, même passée)
+    jusqu'à aujourd'hui + horizon_days. Sans jours de sortie : l'ancre seule.
+    """
+    resolved = resolve_stored_date_value(anchor_iso)
+    try:
+        datetime.date.fromisoformat(resolved)
+    except ValueError:
+        return []
+    end = (today_paris() + datetime.timedelta(days=horizon_days)).isoformat()
+    entries: List[Tuple[str, str]] = []
+    current, current_ch = resolved, (chapter or "").strip()
+    while len(entries) < max_entries:
+        entries.append((current, current_ch))
+        nxt = compute_next_release_date_by_mode(current, weekdays, monthly)
+        if not nxt or nxt <= current or nxt > end:
+            break
+        current = nxt
+        current_ch = increment_chapter(current_ch) if current_ch else ""
+    return entries
+
+
 def is_release_date_passed(date_iso: str) -> bool:
     """True si la date de sortie est strictement avant aujourd'hui (Europe/Paris)."""
     resolved = resolve_stored_date_value(date_iso)
@@ -5,7 +5,10 @@ Logger : [work_tracking]
 
 from __future__ import annotations
 
+import asyncio
 import datetime
+import hashlib
+import json
 import logging
 from typing import Any, Optional
 from zoneinfo import ZoneInfo
@@ -14,15 +17,33 @@ from config import config
 from supabase_client import _get_supabase
 from work_tracking_dates import (
     compute_next_release_date_by_mode,
+    compute_release_calendar,
     increment_chapter,
     is_release_date_passed,
+    parse_days_offset,
+    parse_release_weekdays,
     resolve_stored_date_value,
+    today_paris,
+)
+from work_tracking_render import (
+    content_fingerprint,
+    render_work_publication_message,
+    work_publication_to_saved_inputs,
 )
-from work_tracking_render import render_work_publication_message, work_publication_to_saved_inputs
 
 logger = logging.getLogger("work_tracking")
 PARIS_TZ = ZoneInfo("Europe/Paris")
 _DIGEST_SENT_KEY = "work_tracking_last_digest_date"
+_PAGE_SIZE = 1000
+_BULK_CHUNK = 200
+_RATE_LIMIT_RESERVE = 2   # requêtes Discord gardées en réserve avant d'attendre le reset
+_CALENDAR_TABLE = "work_release_calendar"
+_CALENDAR_HORIZON_DAYS = 60
+_ADVANCED_FIELDS = ("date_next_release", "chapter_next_release", "progress_current")
+_SCHEDULE_FIELDS = (
+    "id, work_status, chapter_control_enabled, date_next_release, chapter_next_release, "
+    "progress_current, release_weekdays, release_monthly"
+)
 
 
 async def _send_admin_dm(bot, message: str) -> bool:
@@ -190,26 +211,60 @@ async def _send_chapter_release_dm(bot, releases: list[dict[str, str]], header:
     return await _send_admin_dm(bot, msg)
 
 
-async def _patch_discord_message(thread_id: str, message_id: str, content: str) -> bool:
+async def _respect_rate_limit() -> None:
+    from discord_api import rate_limiter
+
+    info = rate_limiter.get_info()
+    remaining, reset_in = info.get("remaining"), info.get("reset_in_seconds")
+    if remaining is not None and remaining <= _RATE_LIMIT_RESERVE and reset_in:
+        logger.info("[work_tracking] Budget Discord bas (%d restante(s)), pause %ds", remaining, reset_in)
+        await asyncio.sleep(reset_in)
+
+
+async def _patch_discord_messages(edits: list[tuple[str, str, str, str]]) -> set[str]:
+    """
+    Édite les messages Discord [(wp_id, thread_id, message_id, content)] en parallèle
+    (WORK_TRACKING_EDIT_CONCURRENCY requêtes en vol, une seule session HTTP).
+    Pause si le budget rate limit est presque épuisé ; un 429 est réessayé après retry_after.
+    Retourne les wp_id dont l'édition a échoué.
+    """
     import aiohttp
     from discord_api import _discord_patch_json
 
-    if not thread_id or not message_id:
-        return False
+    failed: set[str] = set()
+    if not edits:
+        return failed
+    semaphore = asyncio.Semaphore(config.WORK_TRACKING_EDIT_CONCURRENCY)
+
+    async def _edit(session, wp_id: str, thread_id: str, message_id: str, content: str) -> None:
+        if not thread_id or not message_id:
+            failed.add(wp_id)
+            return
+        async with semaphore:
+            for _ in range(3):
+                await _respect_rate_limit()
+                status, data = await _discord_patch_json(
+                    session,
+                    f"/channels/{thread_id}/messages/{message_id}",
+                    {"content": content or " "},
+                )
+                if status == 429:
+                    retry_after = float((data or {}).get("retry_after", 1)) if isinstance(data, dict) else 1.0
+                    await asyncio.sleep(min(retry_after, 60))
+                    continue
+                if status >= 400:
+                    logger.warning("[work_tracking] PATCH Discord échoué %s : %s", status, data)
+                    failed.add(wp_id)
+                return
+            failed.add(wp_id)
+
     try:
         async with aiohttp.ClientSession() as session:
-            status, data = await _discord_patch_json(
-                session,
-                f"/channels/{thread_id}/messages/{message_id}",
-                {"content": content or " "},
-            )
-        if status >= 400:
-            logger.warning("[work_tracking] PATCH Discord échoué %s : %s", status, data)
-            return False
-        return True
+            await asyncio.gather(*(_edit(session, *edit) for edit in edits))
     except Exception as e:
         logger.warning("[work_tracking] PATCH Discord exception : %s", e)
-        return False
+        failed.update(edit[0] for edit in edits)
+    return failed
 
 
 def _should_send_paid_alert(wp: dict) -> bool:
@@ -226,8 +281,11 @@ def _should_send_paid_alert(wp: dict) -> bool:
         return True
 
 
-def _advance_ongoing_row(wp: dict) -> Optional[dict]:
-    """Rattrape toutes les sorties passées (pas une seule par passage)."""
+def _advance_ongoing_row(wp: dict, released: Optional[list] = None) -> Optional[dict]:
+    """
+    Rattrape toutes les sorties passées (pas une seule par passage).
+    released : si fourni, reçoit (date, chapitre) de chaque sortie rattrapée.
+    """
     updated = dict(wp)
     weekdays = list(wp.get("release_weekdays") or [])
     monthly = bool(wp.get("release_monthly"))
@@ -245,6 +303,8 @@ def _advance_ongoing_row(wp: dict) -> Optional[dict]:
         new_next_ch = increment_chapter(released_ch) if released_ch else ""
         new_next_date = compute_next_release_date_by_mode(resolved, weekdays, monthly) or resolved
 
+        if released is not None and resolved:
+            released.append((resolved, released_ch))
         updated["chapter_next_release"] = new_next_ch
         updated["date_next_release"] = new_next_date
         if released_ch:
@@ -268,11 +328,254 @@ async def _fetch_discord_url(sb, published_post_id: Any) -> str:
     return (post_row.get("discord_url") or "").strip()
 
 
+# ==================== ACCÈS SUPABASE EN LOT ====================
+
+def _fetch_work_publications_sync(sb, work_status: str, *, control_only: bool = False) -> list[dict]:
+    """Toutes les work_publications d'un statut (paginé par 1000)."""
+    rows: list[dict] = []
+    offset = 0
+    while True:
+        query = sb.table("work_publications").select("*").eq("work_status", work_status)
+        if control_only:
+            query = query.eq("chapter_control_enabled", True)
+        page = query.order("id").range(offset, offset + _PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        offset += _PAGE_SIZE
+
+
+def _fetch_posts_by_ids_sync(sb, post_ids: list, columns: str = "*") -> dict[str, dict]:
+    """{id: published_post} pour une liste d'IDs (requêtes .in_ par paquets)."""
+    posts: dict[str, dict] = {}
+    unique_ids = list(dict.fromkeys(pid for pid in post_ids if pid))
+    for i in range(0, len(unique_ids), _BULK_CHUNK):
+        chunk = unique_ids[i:i + _BULK_CHUNK]
+        res = sb.table("published_posts").select(columns).in_("id", chunk).execute()
+        for row in res.data or []:
+            posts[str(row.get("id"))] = row
+    return posts
+
+
+_BULK_UPDATE_RPC = {
+    "work_publications": "work_publications_bulk_update",
+    "published_posts": "published_posts_bulk_update",
+}
+
+
+def _bulk_update_sync(sb, table: str, rows: list[dict]) -> int:
+    """
+    UPDATE par paquets (RPC *_bulk_update : UPDATE ... FROM jsonb, jamais d'insertion).
+    Les lignes ne portent que id + les colonnes modifiées : une édition concurrente des autres
+    colonnes (re-routage : thread_id / message_id) n'est pas écrasée, et une ligne supprimée
+    entre-temps n'est pas recréée. Si un paquet échoue, repli ligne par ligne (UPDATE partiel)
+    pour isoler la ligne fautive. Retourne le nombre de lignes en erreur.
+    """
+    errors = 0
+    for i in range(0, len(rows), _BULK_CHUNK):
+        chunk = rows[i:i + _BULK_CHUNK]
+        try:
+            sb.rpc(_BULK_UPDATE_RPC[table], {"p_rows": chunk}).execute()
+        except Exception as chunk_err:
+            logger.warning("[work_tracking] Mise à jour %s en lot échouée (%s), repli ligne par ligne", table, chunk_err)
+            for row in chunk:
+                try:
+                    fields = {k: v for k, v in row.items() if k != "id"}
+                    sb.table(table).update(fields).eq("id", row["id"]).execute()
+                except Exception as row_err:
+                    errors += 1
+                    logger.error("[work_tracking] Erreur écriture %s %s : %s", table, row.get("id"), row_err)
+    return errors
+
+
+def _bulk_insert_sync(sb, table: str, rows: list[dict]) -> None:
+    for i in range(0, len(rows), _BULK_CHUNK):
+        sb.table(table).insert(rows[i:i + _BULK_CHUNK]).execute()
+
+
+# ==================== CALENDRIER MATÉRIALISÉ ====================
+
+def _is_calendar_active(wp: dict) -> bool:
+    return wp.get("work_status") == "ongoing" and bool(wp.get("chapter_control_enabled"))
+
+
+def _calendar_hash(wp: dict) -> str:
+    """Empreinte des champs de planning ; préfixe rel: si la date est relative (« +3 j »)."""
+    raw = json.dumps([
+        wp.get("work_status"), bool(wp.get("chapter_control_enabled")),
+        wp.get("date_next_release"), wp.get("chapter_next_release"), wp.get("progress_current"),
+        parse_release_weekdays(wp.get("release_weekdays")), bool(wp.get("release_monthly")),
+    ], default=str)
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+    return f"rel:{digest}" if parse_days_offset(wp.get("date_next_release") or "") is not None else digest
+
+
+def _calendar_entries(wp: dict) -> list[dict]:
+    if not _is_calendar_active(wp):
+        return []
+    chapter = (wp.get("chapter_next_release") or wp.get("progress_current") or "").strip()
+    return [
+        {"work_publication_id": wp["id"], "release_date": day, "chapter": ch, "released": False}
+        for day, ch in compute_release_calendar(
+            wp.get("date_next_release") or "",
+            chapter,
+            parse_release_weekdays(wp.get("release_weekdays")),
+            bool(wp.get("release_monthly")),
+            horizon_days=_CALENDAR_HORIZON_DAYS,
+        )
+    ]
+
+
+def _sync_release_calendar_sync(sb) -> int:
+    """
+    Recalcule le calendrier des seules œuvres dont le planning a changé (calendar_hash NULL,
+    remis à NULL par trigger) ou dont la date est relative. Les sorties passées (released)
+    sont conservées comme historique. Une œuvre modifiée pendant le calcul garde son
+    empreinte NULL et sera recalculée au passage suivant. Retourne le nombre d'œuvres recalculées.
+    """
+    stale: list[dict] = []
+    offset = 0
+    while True:
+        page = (
+            sb.table("work_publications")
+            .select(_SCHEDULE_FIELDS)
+            .or_("calendar_hash.is.null,calendar_hash.like.rel:*")
+            .order("id")
+            .range(offset, offset + _PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        stale.extend(page)
+        if len(page) < _PAGE_SIZE:
+            break
+        offset += _PAGE_SIZE
+    if not stale:
+        return 0
+
+    entries: list[dict] = []
+    for wp in stale:
+        entries.extend(_calendar_entries(wp))
+    ids = [wp["id"] for wp in stale]
+    for i in range(0, len(ids), _BULK_CHUNK):
+        (
+            sb.table(_CALENDAR_TABLE)
+            .delete()
+            .eq("released", False)
+            .in_("work_publication_id", ids[i:i + _BULK_CHUNK])
+            .execute()
+        )
+    for i in range(0, len(entries), _BULK_CHUNK):
+        # Une date déjà marquée released n'est pas écrasée
+        sb.table(_CALENDAR_TABLE).upsert(
+            entries[i:i + _BULK_CHUNK],
+            on_conflict="work_publication_id,release_date",
+            ignore_duplicates=True,
+        ).execute()
+    # Empreintes en lot, avec les champs lus : ignorées si le planning a changé entre-temps
+    hashes = [{**wp, "calendar_hash": _calendar_hash(wp)} for wp in stale]
+    for i in range(0, len(hashes), _BULK_CHUNK):
+        sb.rpc("work_publications_set_calendar_hashes", {"p_rows": hashes[i:i + _BULK_CHUNK]}).execute()
+    logger.info("[work_tracking] Calendrier recalculé : %d œuvre(s), %d date(s)", len(stale), len(entries))
+    return len(stale)
+
+
+def _due_work_publication_ids_sync(sb, day: datetime.date) -> list:
+    """IDs des œuvres ayant une sortie non traitée strictement avant day (index partiel)."""
+    ids: list = []
+    offset = 0
+    while True:
+        page = (
+            sb.table(_CALENDAR_TABLE)
+            .select("work_publication_id")
+            .eq("released", False)
+            .lt("release_date", day.isoformat())
+            .order("release_date")
+            .range(offset, offset + _PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        ids.extend(row["work_publication_id"] for row in page)
+        if len(page) < _PAGE_SIZE:
+            return list(dict.fromkeys(ids))
+        offset += _PAGE_SIZE
+
+
+def _fetch_work_publications_by_ids_sync(sb, ids: list) -> list[dict]:
+    rows: list[dict] = []
+    for i in range(0, len(ids), _BULK_CHUNK):
+        res = sb.table("work_publications").select("*").in_("id", ids[i:i + _BULK_CHUNK]).execute()
+        rows.extend(res.data or [])
+    return rows
+
+
+def _fetch_due_ongoing_sync(sb) -> list[dict]:
+    """
+    Œuvres En cours à avancer. Via le calendrier matérialisé (une requête indexée) ;
+    repli sur le parcours complet si la table n'est pas disponible.
+    """
+    try:
+        _sync_release_calendar_sync(sb)
+        ids = _due_work_publication_ids_sync(sb, today_paris())
+    except Exception as e:
+        logger.warning("[work_tracking] Calendrier indisponible (%s), parcours complet", e)
+        return _fetch_work_publications_sync(sb, "ongoing", control_only=True)
+    rows = _fetch_work_publications_by_ids_sync(sb, ids) if ids else []
+    return [wp for wp in rows if _is_calendar_active(wp)]
+
+
+def _record_releases_sync(sb, released: list[dict]) -> None:
+    """Historise les sorties rattrapées (released=true) puis recalcule les calendriers modifiés."""
+    try:
+        for i in range(0, len(released), _BULK_CHUNK):
+            sb.table(_CALENDAR_TABLE).upsert(
+                released[i:i + _BULK_CHUNK], on_conflict="work_publication_id,release_date",
+            ).execute()
+        _sync_release_calendar_sync(sb)
+    except Exception as e:
+        logger.warning("[work_tracking] Mise à jour du calendrier impossible : %s", e)
+
+
+def _released_on_sync(sb, day: datetime.date) -> list[dict]:
+    """Sorties historisées à la date day : [{title, chapter, url}] (lookup indexé + chargements en lot)."""
+    rows = (
+        sb.table(_CALENDAR_TABLE)
+        .select("work_publication_id, chapter")
+        .eq("released", True)
+        .eq("release_date", day.isoformat())
+        .execute()
+        .data or []
+    )
+    rows = [r for r in rows if (r.get("chapter") or "").strip()]
+    if not rows:
+        return []
+    wps = {
+        str(wp["id"]): wp
+        for wp in _fetch_work_publications_by_ids_sync(sb, [r["work_publication_id"] for r in rows])
+    }
+    posts = _fetch_posts_by_ids_sync(
+        sb, [wp.get("published_post_id") for wp in wps.values()], "id, discord_url",
+    )
+    releases: list[dict[str, str]] = []
+    for row in rows:
+        wp = wps.get(str(row["work_publication_id"])) or {}
+        post = posts.get(str(wp.get("published_post_id"))) or {}
+        releases.append({
+            "title": (wp.get("title") or "Œuvre").strip(),
+            "chapter": row["chapter"].strip(),
+            "url": (post.get("discord_url") or "").strip(),
+        })
+    return releases
+
+
+# ==================== REFRESH ====================
+
 async def run_work_tracking_refresh_once(bot=None) -> dict[str, int]:
     """
     Exécute un passage de contrôle suivi d'œuvres.
     Retourne des compteurs {advanced, paid_alerts, errors}.
     Les sorties sont notifiées uniquement via le digest matinal (09:00).
+    Traitement ensembliste : lignes et posts chargés en lot, calcul en mémoire,
+    écritures groupées par table, éditions Discord en parallèle.
     """
     sb = _get_supabase()
     stats = {"advanced": 0, "paid_alerts": 0, "errors": 0}
@@ -280,109 +583,174 @@ async def run_work_tracking_refresh_once(bot=None) -> dict[str, int]:
         logger.debug("[work_tracking] Supabase indisponible")
         return stats
 
+    loop = asyncio.get_event_loop()
     now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
     try:
-        ongoing_res = (
-            sb.table("work_publications")
-            .select("*")
-            .eq("chapter_control_enabled", True)
-            .eq("work_status", "ongoing")
-            .execute()
-        )
-        for wp in ongoing_res.data or []:
+        # ── En cours : avancement des chapitres ──────────────────────────────
+        ongoing = await loop.run_in_executor(None, _fetch_due_ongoing_sync, sb)
+        # (ligne, ligne avancée ou None, message rendu, empreinte) : rendus à confronter à Discord
+        rendered: list[tuple[dict, Optional[dict], str, str]] = []
+        released_entries: list[dict] = []
+        unchanged_renders = 0
+        for wp in ongoing:
             try:
-                advanced = _advance_ongoing_row(wp)
-                if not advanced:
+                released: list[tuple[str, str]] = []
+                advanced = _advance_ongoing_row(wp, released)
+                if not advanced and "render_fingerprint" not in wp:
                     continue
-
-                post_res = (
-                    sb.table("published_posts")
-                    .select("id, thread_id, message_id, discord_url")
-                    .eq("id", wp.get("published_post_id"))
-                    .limit(1)
-                    .execute()
-                )
-                post = (post_res.data or [None])[0]
-                if not post:
+                new_content = render_work_publication_message(advanced or wp)
+                fingerprint = content_fingerprint(new_content)
+                if not advanced and wp.get("render_fingerprint") == fingerprint:
+                    # Rien à rattraper et le rendu est celui déjà envoyé : ni post chargé ni PATCH
+                    unchanged_renders += 1
                     continue
-
-                payload = {
-                    **{k: advanced[k] for k in wp.keys() if k in advanced},
-                    "last_auto_refresh_at": now_iso,
-                    "updated_at": now_iso,
-                }
-                sb.table("work_publications").update(payload).eq("id", wp["id"]).execute()
-
-                saved_inputs = work_publication_to_saved_inputs(advanced)
-                new_content = render_work_publication_message(advanced)
-                sb.table("published_posts").update({
-                    "content": new_content,
-                    "saved_inputs": saved_inputs,
-                    "updated_at": now_iso,
-                }).eq("id", post["id"]).execute()
-
-                patched = await _patch_discord_message(
-                    str(post.get("thread_id") or ""),
-                    str(post.get("message_id") or ""),
-                    new_content,
+                rendered.append((wp, advanced, new_content, fingerprint))
+                released_entries.extend(
+                    {"work_publication_id": wp["id"], "release_date": day, "chapter": ch, "released": True}
+                    for day, ch in released
                 )
-                if not patched:
-                    logger.warning(
-                        "[work_tracking] PATCH Discord échoué pour %s — log digest quand même",
-                        wp.get("id"),
-                    )
-
-                sb.table("work_publication_refresh_log").insert({
-                    "work_publication_id": wp["id"],
-                    "action": "chapter_advanced",
-                    "old_values": {
-                        "date_next_release": wp.get("date_next_release"),
-                        "chapter_next_release": wp.get("chapter_next_release"),
-                        "progress_current": wp.get("progress_current"),
-                    },
-                    "new_values": {
-                        "date_next_release": advanced.get("date_next_release"),
-                        "chapter_next_release": advanced.get("chapter_next_release"),
-                        "progress_current": advanced.get("progress_current"),
-                    },
-                }).execute()
-                stats["advanced"] += 1
             except Exception as row_err:
                 stats["errors"] += 1
                 logger.error("[work_tracking] Erreur ongoing %s : %s", wp.get("id"), row_err)
 
-        paid_res = (
-            sb.table("work_publications")
-            .select("*")
-            .eq("work_status", "ongoing_paid")
-            .execute()
+        posts = await loop.run_in_executor(
+            None, _fetch_posts_by_ids_sync, sb, [wp.get("published_post_id") for wp, *_ in rendered],
+            "id, content, thread_id, message_id",
         )
-        for wp in paid_res.data or []:
-            try:
-                if not is_release_date_passed(wp.get("date_next_release") or ""):
-                    continue
-                if not _should_send_paid_alert(wp):
+
+        wp_updates: list[dict] = []
+        fingerprint_updates: list[dict] = []
+        post_updates: list[dict] = []
+        log_rows: list[dict] = []
+        edits: list[tuple[str, str, str, str]] = []
+        skipped_edits = 0
+        for wp, advanced, new_content, fingerprint in rendered:
+            post = posts.get(str(wp.get("published_post_id")))
+            if not post:
+                continue
+            unchanged = (
+                wp.get("render_fingerprint") == fingerprint
+                or (post.get("content") or "") == new_content
+            )
+            if not unchanged:
+                try:
+                    saved_inputs = work_publication_to_saved_inputs(advanced or wp)
+                except Exception as row_err:
+                    stats["errors"] += 1
+                    logger.error("[work_tracking] Erreur rendu %s : %s", wp.get("id"), row_err)
                     continue
 
-                title = (wp.get("title") or "Œuvre").strip()
-                url = await _fetch_discord_url(sb, wp.get("published_post_id"))
-                msg = (
-                    f"**Suivi d'œuvres — action requise**\n"
-                    f"**{title}** : tag Incomplet, date de sortie dépassée.\n"
-                    f"Vérifie le calendrier manuellement. Si la diffusion est redevenue complète, "
-                    f"retire le tag Incomplet pour réactiver le contrôle auto.\n"
-                    f"{url}".strip()
+            if advanced:
+                wp_row = {
+                    "id": wp["id"],
+                    **{k: advanced.get(k) for k in _ADVANCED_FIELDS},
+                    "last_auto_refresh_at": now_iso,
+                    "updated_at": now_iso,
+                }
+                if "render_fingerprint" in wp:
+                    wp_row["render_fingerprint"] = fingerprint
+                wp_updates.append(wp_row)
+                log_rows.append({
+                    "work_publication_id": wp["id"],
+                    "action": "chapter_advanced",
+                    "old_values": {k: wp.get(k) for k in _ADVANCED_FIELDS},
+                    "new_values": {k: advanced.get(k) for k in _ADVANCED_FIELDS},
+                })
+            else:
+                # Empreinte absente ou périmée (PATCH précédent échoué, gabarit modifié)
+                fingerprint_updates.append({"id": wp["id"], "render_fingerprint": fingerprint})
+
+            if unchanged:
+                # Rendu identique à ce qui est déjà sur Discord : ni PATCH ni réécriture du post
+                skipped_edits += 1
+                continue
+            post_updates.append({
+                "id": post["id"],
+                "content": new_content,
+                "saved_inputs": saved_inputs,
+                "updated_at": now_iso,
+            })
+            edits.append((
+                str(wp["id"]),
+                str(post.get("thread_id") or ""),
+                str(post.get("message_id") or ""),
+                new_content,
+            ))
+
+        if unchanged_renders:
+            logger.debug("[work_tracking] %d œuvre(s) due(s) au rendu inchangé", unchanged_renders)
+        for table, rows in (
+            ("work_publications", wp_updates),
+            ("work_publications", fingerprint_updates),
+            ("published_posts", post_updates),
+        ):
+            if rows:
+                stats["errors"] += await loop.run_in_executor(None, _bulk_update_sync, sb, table, rows)
+
+        if edits:
+            failed_edits = await _patch_discord_messages(edits)
+            for wp_id in failed_edits:
+                logger.warning(
+                    "[work_tracking] PATCH Discord échoué pour %s — log digest quand même", wp_id,
                 )
-                if await _send_admin_dm(bot, msg):
-                    sb.table("work_publications").update({
-                        "last_paid_alert_at": now_iso,
-                        "updated_at": now_iso,
-                    }).eq("id", wp["id"]).execute()
-                    stats["paid_alerts"] += 1
-            except Exception as row_err:
+            if failed_edits and any("render_fingerprint" in wp for wp, *_ in rendered):
+                # Empreinte effacée : l'édition est retentée la prochaine fois que l'œuvre est due
+                failed_ids = list(failed_edits)
+                await loop.run_in_executor(
+                    None,
+                    lambda: sb.table("work_publications").update({"render_fingerprint": None})
+                    .in_("id", failed_ids).execute(),
+                )
+        if skipped_edits:
+            logger.info("[work_tracking] %d message(s) Discord inchangé(s), PATCH évité", skipped_edits)
+
+        if wp_updates:
+            try:
+                await loop.run_in_executor(None, _bulk_insert_sync, sb, "work_publication_refresh_log", log_rows)
+            except Exception as log_err:
                 stats["errors"] += 1
-                logger.error("[work_tracking] Erreur paid %s : %s", wp.get("id"), row_err)
+                logger.error("[work_tracking] Erreur écriture refresh_log : %s", log_err)
+            await loop.run_in_executor(None, _record_releases_sync, sb, released_entries)
+            stats["advanced"] = len(wp_updates)
+
+        # ── Payant : alerte MP admin si la date est dépassée ─────────────────
+        paid = await loop.run_in_executor(None, _fetch_work_publications_sync, sb, "ongoing_paid")
+        due = [
+            wp for wp in paid
+            if is_release_date_passed(wp.get("date_next_release") or "") and _should_send_paid_alert(wp)
+        ]
+        if due:
+            urls = await loop.run_in_executor(
+                None,
+                lambda: _fetch_posts_by_ids_sync(sb, [wp.get("published_post_id") for wp in due], "id, discord_url"),
+            )
+            alerted_ids: list = []
+            for wp in due:
+                try:
+                    title = (wp.get("title") or "Œuvre").strip()
+                    url = ((urls.get(str(wp.get("published_post_id"))) or {}).get("discord_url") or "").strip()
+                    msg = (
+                        f"**Suivi d'œuvres — action requise**\n"
+                        f"**{title}** : tag Incomplet, date de sortie dépassée.\n"
+                        f"Vérifie le calendrier manuellement. Si la diffusion est redevenue complète, "
+                        f"retire le tag Incomplet pour réactiver le contrôle auto.\n"
+                        f"{url}".strip()
+                    )
+                    if await _send_admin_dm(bot, msg):
+                        alerted_ids.append(wp["id"])
+                except Exception as row_err:
+                    stats["errors"] += 1
+                    logger.error("[work_tracking] Erreur paid %s : %s", wp.get("id"), row_err)
+            if alerted_ids:
+                def _mark_alerted():
+                    for i in range(0, len(alerted_ids), _BULK_CHUNK):
+                        sb.table("work_publications").update({
+                            "last_paid_alert_at": now_iso,
+                            "updated_at": now_iso,
+                        }).in_("id", alerted_ids[i:i + _BULK_CHUNK]).execute()
+                await loop.run_in_executor(None, _mark_alerted)
+                stats["paid_alerts"] = len(alerted_ids)
 
     except Exception as e:
         logger.error("[work_tracking] Erreur globale refresh : %s", e, exc_info=True)
@@ -395,24 +763,10 @@ async def run_work_tracking_refresh_once(bot=None) -> dict[str, int]:
     return stats
 
 
-async def run_work_tracking_yesterday_digest(bot=None, *, force: bool = False) -> int:
-    """
-    MP unique à 09:00 : rappel des sorties de la veille (Europe/Paris).
-    Aucun MP lors du refresh de minuit (avancement silencieux).
-    """
-    sb = _get_supabase()
-    if not sb:
-        logger.error("[work_tracking] Digest : Supabase indisponible")
-        return 0
-
-    today = datetime.datetime.now(PARIS_TZ).date()
-    yesterday = today - datetime.timedelta(days=1)
-    yesterday_iso = yesterday.isoformat()
-
-    if not force and _digest_sent_today(sb, today):
-        logger.info("[work_tracking] Digest déjà envoyé pour %s", today.isoformat())
-        return 0
-
+async def _releases_from_refresh_log(
+    sb, today: datetime.date, yesterday_iso: str
+) -> Optional[list[dict[str, str]]]:
+    """Ancien chemin du digest (scan de refresh_log sur 7 jours). None si la lecture échoue."""
     since = (today - datetime.timedelta(days=7)).isoformat()
 
     try:
@@ -425,7 +779,7 @@ async def run_work_tracking_yesterday_digest(bot=None, *, force: bool = False) -
         )
     except Exception as e:
         logger.error("[work_tracking] Erreur lecture refresh_log digest : %s", e)
-        return 0
+        return None
 
     seen: set[str] = set()
     releases: list[dict[str, str]] = []
@@ -464,6 +818,36 @@ async def run_work_tracking_yesterday_digest(bot=None, *, force: bool = False) -
         except Exception as row_err:
             logger.warning("[work_tracking] Digest : œuvre %s ignorée : %s", wp_id, row_err)
 
+    return releases
+
+
+async def run_work_tracking_yesterday_digest(bot=None, *, force: bool = False) -> int:
+    """
+    MP unique à 09:00 : rappel des sorties de la veille (Europe/Paris).
+    Aucun MP lors du refresh de minuit (avancement silencieux).
+    """
+    sb = _get_supabase()
+    if not sb:
+        logger.error("[work_tracking] Digest : Supabase indisponible")
+        return 0
+
+    today = datetime.datetime.now(PARIS_TZ).date()
+    yesterday = today - datetime.timedelta(days=1)
+    yesterday_iso = yesterday.isoformat()
+
+    if not force and _digest_sent_today(sb, today):
+        logger.info("[work_tracking] Digest déjà envoyé pour %s", today.isoformat())
+        return 0
+
+    loop = asyncio.get_event_loop()
+    try:
+        releases = await loop.run_in_executor(None, _released_on_sync, sb, yesterday)
+    except Exception as e:
+        logger.warning("[work_tracking] Digest : calendrier indisponible (%s), lecture refresh_log", e)
+        releases = await _releases_from_refresh_log(sb, today, yesterday_iso)
+        if releases is None:
+            return 0
+
     if not releases:
         logger.info(
             "[work_tracking] Digest : aucune sortie pour la veille (%s)",
@@ -12,6 +12,7 @@ from __future__ import annotations
 
 
 
+import hashlib
 import json
 import re
 
@@ -447,6 +448,11 @@ TYPE_DISPLAY = {
 
 
 
+def content_fingerprint(content: str) -> str:
+    """Empreinte du message tel qu'envoyé sur Discord (colonne work_publications.render_fingerprint)."""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
 def render_work_publication_message(wp: dict) -> str:
 
     status = wp.get("work_status") or "ongoing"
@@ -0,0 +1,82 @@
+-- Déduplication pré-calculée de f95_jeux (ligne principale par jeu logique)
+-- Calculée à chaque sync (_sync_jeux_to_supabase) et après les écritures hors sync
+-- (_refresh_jeux_canonical_sync) : les lecteurs filtrent is_canonical = true.
+
+ALTER TABLE public.f95_jeux
+  ADD COLUMN IF NOT EXISTS is_canonical boolean NOT NULL DEFAULT true,
+  ADD COLUMN IF NOT EXISTS variants jsonb NOT NULL DEFAULT '[]'::jsonb;
+
+CREATE INDEX IF NOT EXISTS f95_jeux_canonical_nom_idx
+  ON public.f95_jeux(nom_du_jeu)
+  WHERE is_canonical = true;
+
+CREATE INDEX IF NOT EXISTS f95_jeux_game_uuid_idx
+  ON public.f95_jeux(game_uuid);
+
+-- Backfill : sans lui, le DEFAULT true rend canonique chaque variante existante jusqu'à la
+-- première sync. Même regroupement et même ordre que _group_jeux_canonical (supabase_client.py) :
+-- ac='1', complétude de la traduction, date_maj, updated_at ; la sync recalcule ensuite à l'identique.
+WITH keyed AS (
+  SELECT j.*,
+         CASE
+           WHEN nullif(btrim(j.game_uuid::text), '') IS NOT NULL THEN 'uuid:' || btrim(j.game_uuid::text)
+           WHEN j.site_id IS NOT NULL THEN 'sid:' || j.site_id::text || ':' || coalesce(btrim(j.site::text), '')
+           WHEN nullif(regexp_replace(lower(btrim(coalesce(j.nom_url, ''))), '/$', ''), '') IS NOT NULL
+             THEN 'url:' || regexp_replace(lower(btrim(j.nom_url)), '/$', '')
+           ELSE 'id:' || j.id::text
+         END AS group_key,
+         btrim(coalesce(j.ac::text, '')) = '1' AS is_ac
+    FROM public.f95_jeux j
+),
+versioned AS (
+  SELECT k.*,
+         coalesce(first_value(k.version::text) OVER (
+           PARTITION BY k.group_key ORDER BY k.is_ac DESC, k.id
+         ), '') AS game_version
+    FROM keyed k
+),
+ranked AS (
+  SELECT v.*,
+         row_number() OVER (
+           PARTITION BY v.group_key
+           ORDER BY v.is_ac DESC,
+                    CASE
+                      WHEN v.game_version <> '' AND btrim(coalesce(v.trad_ver::text, '')) = v.game_version THEN 2
+                      WHEN btrim(coalesce(v.trad_ver::text, '')) <> '' THEN 1
+                      ELSE 0
+                    END DESC,
+                    coalesce(v.date_maj::text, '0') DESC,
+                    coalesce(v.updated_at::text, '0') DESC,
+                    v.id
+         ) AS rank_in_group
+    FROM versioned v
+),
+variants AS (
+  SELECT r.group_key,
+         jsonb_agg(jsonb_build_object(
+           'id', r.id,
+           'trad_ver', r.trad_ver,
+           'lien_trad', r.lien_trad,
+           'type_de_traduction', r.type_de_traduction,
+           'nom_url', r.nom_url,
+           'traducteur', r.traducteur,
+           'traducteur_url', r.traducteur_url,
+           'version', r.version,
+           'statut', r.statut
+         ) ORDER BY r.rank_in_group) AS payload
+    FROM ranked r
+   WHERE r.rank_in_group > 1
+   GROUP BY r.group_key
+)
+UPDATE public.f95_jeux j
+   SET is_canonical = (r.rank_in_group = 1),
+       variants = CASE WHEN r.rank_in_group = 1 THEN coalesce(v.payload, '[]'::jsonb) ELSE '[]'::jsonb END
+  FROM ranked r
+  LEFT JOIN variants v ON v.group_key = r.group_key
+ WHERE j.id = r.id;
+
+COMMENT ON COLUMN public.f95_jeux.is_canonical IS
+  'Ligne principale de son groupe (game_uuid, sinon site_id/site, sinon nom_url) — recalculée à la sync.';
+
+COMMENT ON COLUMN public.f95_jeux.variants IS
+  'Lignes secondaires du groupe (saisons / traductions alternatives), renseigné sur la ligne principale.';
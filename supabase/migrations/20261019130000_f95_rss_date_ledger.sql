@@ -0,0 +1,18 @@
+-- Registre des dates vues dans le flux RSS F95Zone (fenêtre glissante de ~90 lignes)
+-- Alimenté par l'échantillonnage rss_ledger_sample ; consulté avant tout scraping de date.
+
+CREATE TABLE IF NOT EXISTS public.f95_rss_date_ledger (
+  thread_id bigint PRIMARY KEY,
+  date_maj date NOT NULL,
+  title text,
+  first_seen_at timestamptz NOT NULL DEFAULT now(),
+  last_seen_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS f95_rss_date_ledger_date_maj_idx
+  ON public.f95_rss_date_ledger(date_maj DESC);
+
+ALTER TABLE public.f95_rss_date_ledger ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.f95_rss_date_ledger IS
+  'Dernière date de MAJ connue par thread F95Zone, relevée dans le flux RSS (accès service role).';
@@ -0,0 +1,30 @@
+-- File de scraping des dates F95Zone priorisée (possession user_collection, ancienneté, activité RSS)
+-- Alimentée par configurable_date_refresh ; chaque budget de scraping prend la tête de file.
+
+CREATE TABLE IF NOT EXISTS public.f95_scrape_queue (
+  site_id bigint PRIMARY KEY,
+  nom_url text,
+  priority real NOT NULL DEFAULT 0,
+  attempts integer NOT NULL DEFAULT 0,
+  effective_priority real GENERATED ALWAYS AS (priority / (1 + attempts)) STORED,
+  enqueued_at timestamptz NOT NULL DEFAULT now(),
+  last_attempt_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS f95_scrape_queue_effective_priority_idx
+  ON public.f95_scrape_queue(effective_priority DESC);
+
+ALTER TABLE public.f95_scrape_queue ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.f95_scrape_queue_mark_failed(p_site_ids bigint[])
+RETURNS void
+LANGUAGE sql
+AS $$
+  UPDATE public.f95_scrape_queue
+     SET attempts = attempts + 1,
+         last_attempt_at = now()
+   WHERE site_id = ANY(p_site_ids);
+$$;
+
+COMMENT ON TABLE public.f95_scrape_queue IS
+  'Jeux en attente de scraping de date, triés par effective_priority (accès service role).';
@@ -0,0 +1,17 @@
+-- Mémoire de traduction (Google Translate) : une ligne par (texte source, langue source, langue cible).
+-- key = sha256 hexadécimal de "source_lang \x1f target_lang \x1f texte", calculé côté bot.
+
+CREATE TABLE IF NOT EXISTS public.translation_memory (
+  key text PRIMARY KEY,
+  source_lang text NOT NULL,
+  target_lang text NOT NULL,
+  source_len integer NOT NULL DEFAULT 0,
+  translated text NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.translation_memory ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.translation_memory IS
+  'Traductions déjà obtenues, réutilisées sans appel Google Translate (accès service role).';
@@ -0,0 +1,29 @@
+-- Outbox durable des mutations Discord (publication, mise à jour / re-routage de posts).
+-- Une ligne par mutation, identifiée par une clé d'idempotence ; rejouée au démarrage si non terminée.
+
+CREATE TABLE IF NOT EXISTS public.discord_outbox (
+  id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  idempotency_key text NOT NULL UNIQUE,
+  op text NOT NULL,
+  payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+  status text NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+  attempts integer NOT NULL DEFAULT 0,
+  result jsonb,
+  last_error text,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS discord_outbox_unfinished_idx
+  ON public.discord_outbox(created_at)
+  WHERE status IN ('pending', 'running');
+
+ALTER TABLE public.discord_outbox ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.discord_outbox IS
+  'Mutations Discord en attente / exécutées (accès service role). status done|failed = terminé.';
+
+-- Étapes déjà effectuées d'un job (ex. thread re-routé créé, annonce envoyée) : relues au rejeu.
+ALTER TABLE public.discord_outbox
+  ADD COLUMN IF NOT EXISTS checkpoint jsonb NOT NULL DEFAULT '{}'::jsonb;
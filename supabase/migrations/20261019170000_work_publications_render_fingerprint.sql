@@ -0,0 +1,7 @@
+-- Empreinte du dernier message Discord rendu pour une œuvre suivie
+
+ALTER TABLE public.work_publications
+  ADD COLUMN IF NOT EXISTS render_fingerprint text;
+
+COMMENT ON COLUMN public.work_publications.render_fingerprint IS
+  'sha256 du dernier contenu envoyé sur Discord — le refresh ne PATCH le message que si le rendu change (NULL = inconnu, édition forcée).';
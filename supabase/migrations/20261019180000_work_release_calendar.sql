@@ -0,0 +1,89 @@
+-- Calendrier matérialisé des sorties (suivi d'œuvres)
+-- Une ligne par sortie prévue / passée ; recalculé seulement quand le planning d'une œuvre change.
+
+CREATE TABLE IF NOT EXISTS public.work_release_calendar (
+  work_publication_id uuid NOT NULL REFERENCES public.work_publications(id) ON DELETE CASCADE,
+  release_date date NOT NULL,
+  chapter text NOT NULL DEFAULT '',
+  released boolean NOT NULL DEFAULT false,
+  computed_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (work_publication_id, release_date)
+);
+
+CREATE INDEX IF NOT EXISTS work_release_calendar_due_idx
+  ON public.work_release_calendar(release_date)
+  WHERE released = false;
+
+CREATE INDEX IF NOT EXISTS work_release_calendar_released_idx
+  ON public.work_release_calendar(release_date)
+  WHERE released = true;
+
+ALTER TABLE public.work_release_calendar ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.work_release_calendar IS
+  'Sorties matérialisées par œuvre : à venir (released=false) et historique des sorties avancées par le refresh (released=true).';
+
+-- Empreinte du planning ayant servi au calcul ; NULL = calendrier à recalculer
+
+ALTER TABLE public.work_publications
+  ADD COLUMN IF NOT EXISTS calendar_hash text;
+
+CREATE INDEX IF NOT EXISTS work_publications_calendar_stale_idx
+  ON public.work_publications(id)
+  WHERE calendar_hash IS NULL;
+
+COMMENT ON COLUMN public.work_publications.calendar_hash IS
+  'Empreinte des champs de planning du dernier calcul de work_release_calendar (NULL = à recalculer, préfixe rel: = date relative, recalculée chaque jour).';
+
+CREATE OR REPLACE FUNCTION public.work_publications_mark_calendar_stale()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.date_next_release IS DISTINCT FROM OLD.date_next_release
+     OR NEW.chapter_next_release IS DISTINCT FROM OLD.chapter_next_release
+     OR NEW.progress_current IS DISTINCT FROM OLD.progress_current
+     OR NEW.release_weekdays IS DISTINCT FROM OLD.release_weekdays
+     OR NEW.release_monthly IS DISTINCT FROM OLD.release_monthly
+     OR NEW.work_status IS DISTINCT FROM OLD.work_status
+     OR NEW.chapter_control_enabled IS DISTINCT FROM OLD.chapter_control_enabled THEN
+    NEW.calendar_hash := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS work_publications_calendar_stale ON public.work_publications;
+CREATE TRIGGER work_publications_calendar_stale
+  BEFORE UPDATE ON public.work_publications
+  FOR EACH ROW
+  EXECUTE FUNCTION public.work_publications_mark_calendar_stale();
+
+-- Écriture groupée des empreintes après recalcul : une requête par lot. N'écrit que si
+-- l'empreinte est encore NULL / rel:* et si les champs de planning sont toujours ceux du
+-- calcul (sinon une modification concurrente, remise à NULL par le trigger, serait masquée).
+
+CREATE OR REPLACE FUNCTION public.work_publications_set_calendar_hashes(p_rows jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.work_publications w
+       SET calendar_hash = r->>'calendar_hash'
+      FROM jsonb_array_elements(p_rows) AS r
+     WHERE w.id::text = r->>'id'
+       AND (w.calendar_hash IS NULL OR w.calendar_hash LIKE 'rel:%')
+       AND coalesce(to_jsonb(w.work_status), 'null'::jsonb)             = coalesce(r->'work_status', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.chapter_control_enabled), 'null'::jsonb) = coalesce(r->'chapter_control_enabled', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.date_next_release), 'null'::jsonb)       = coalesce(r->'date_next_release', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.chapter_next_release), 'null'::jsonb)    = coalesce(r->'chapter_next_release', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.progress_current), 'null'::jsonb)        = coalesce(r->'progress_current', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.release_weekdays), 'null'::jsonb)        = coalesce(r->'release_weekdays', 'null'::jsonb)
+       AND coalesce(to_jsonb(w.release_monthly), 'null'::jsonb)         = coalesce(r->'release_monthly', 'null'::jsonb)
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+COMMENT ON FUNCTION public.work_publications_set_calendar_hashes(jsonb) IS
+  'Enregistre calendar_hash pour [{id, calendar_hash, champs de planning lus}] si le planning n''a pas changé depuis la lecture.';
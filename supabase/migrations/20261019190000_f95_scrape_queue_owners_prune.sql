@@ -0,0 +1,30 @@
+-- File de scraping : comptage des possessions côté base (GROUP BY, sans plafond de 1000 lignes)
+-- et purge des jeux qui ne sont plus candidats au rafraîchissement de date.
+
+CREATE OR REPLACE FUNCTION public.f95_count_collection_owners(p_thread_ids bigint[])
+RETURNS TABLE (f95_thread_id bigint, owners bigint)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT uc.f95_thread_id::bigint, count(*)::bigint
+    FROM public.user_collection uc
+   WHERE uc.f95_thread_id::bigint = ANY(p_thread_ids)
+   GROUP BY uc.f95_thread_id;
+$$;
+
+CREATE OR REPLACE FUNCTION public.f95_scrape_queue_prune(p_site_ids bigint[])
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH removed AS (
+    DELETE FROM public.f95_scrape_queue
+     WHERE NOT (site_id = ANY(p_site_ids))
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM removed;
+$$;
+
+COMMENT ON FUNCTION public.f95_count_collection_owners(bigint[]) IS
+  'Nombre d''entrées user_collection par f95_thread_id (priorité de la file de scraping).';
+COMMENT ON FUNCTION public.f95_scrape_queue_prune(bigint[]) IS
+  'Retire de f95_scrape_queue les jeux absents de la liste des candidats courants.';
@@ -0,0 +1,21 @@
+-- Écriture groupée des dates F95 (rafraîchissement planifié / enrichissement) :
+-- une requête par lot au lieu d'un UPDATE par site_id ; les lignes déjà à jour ne sont pas réécrites.
+
+CREATE OR REPLACE FUNCTION public.f95_jeux_set_date_maj(p_rows jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.f95_jeux j
+       SET f95_date_maj = r.f95_date_maj,
+           updated_at   = now()
+      FROM jsonb_populate_recordset(NULL::public.f95_jeux, p_rows) AS r
+     WHERE j.site_id = r.site_id
+       AND j.f95_date_maj IS DISTINCT FROM r.f95_date_maj
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+COMMENT ON FUNCTION public.f95_jeux_set_date_maj(jsonb) IS
+  'Met à jour f95_date_maj (+ updated_at) pour [{site_id, f95_date_maj}] ; ignore les lignes déjà à cette date.';
@@ -0,0 +1,45 @@
+-- Écritures groupées du refresh suivi d'œuvres : UPDATE seul (jamais d'insertion), une requête par lot.
+-- Chaque élément de p_rows porte id + les colonnes à modifier ; les colonnes absentes sont conservées.
+-- Une ligne supprimée entre la lecture et l'écriture est simplement ignorée.
+
+CREATE OR REPLACE FUNCTION public.work_publications_bulk_update(p_rows jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.work_publications w
+       SET date_next_release    = CASE WHEN e.r ? 'date_next_release'    THEN v.date_next_release    ELSE w.date_next_release    END,
+           chapter_next_release = CASE WHEN e.r ? 'chapter_next_release' THEN v.chapter_next_release ELSE w.chapter_next_release END,
+           progress_current     = CASE WHEN e.r ? 'progress_current'     THEN v.progress_current     ELSE w.progress_current     END,
+           last_auto_refresh_at = CASE WHEN e.r ? 'last_auto_refresh_at' THEN v.last_auto_refresh_at ELSE w.last_auto_refresh_at END,
+           render_fingerprint   = CASE WHEN e.r ? 'render_fingerprint'   THEN v.render_fingerprint   ELSE w.render_fingerprint   END,
+           updated_at           = CASE WHEN e.r ? 'updated_at'           THEN v.updated_at           ELSE w.updated_at           END
+      FROM jsonb_array_elements(p_rows) AS e(r)
+      CROSS JOIN LATERAL jsonb_populate_record(NULL::public.work_publications, e.r) AS v
+     WHERE w.id = v.id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+CREATE OR REPLACE FUNCTION public.published_posts_bulk_update(p_rows jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.published_posts p
+       SET content      = CASE WHEN e.r ? 'content'      THEN v.content      ELSE p.content      END,
+           saved_inputs = CASE WHEN e.r ? 'saved_inputs' THEN v.saved_inputs ELSE p.saved_inputs END,
+           updated_at   = CASE WHEN e.r ? 'updated_at'   THEN v.updated_at   ELSE p.updated_at   END
+      FROM jsonb_array_elements(p_rows) AS e(r)
+      CROSS JOIN LATERAL jsonb_populate_record(NULL::public.published_posts, e.r) AS v
+     WHERE p.id = v.id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+COMMENT ON FUNCTION public.work_publications_bulk_update(jsonb) IS
+  'Refresh suivi d''œuvres : UPDATE partiel en lot de work_publications (chapitre avancé, empreinte de rendu), sans insertion.';
+COMMENT ON FUNCTION public.published_posts_bulk_update(jsonb) IS
+  'Refresh suivi d''œuvres : UPDATE partiel en lot de published_posts (contenu, saved_inputs), sans insertion.';